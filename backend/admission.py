@@ -0,0 +1,190 @@
+"""Admission control for expensive endpoints.
+
+Requests are sorted into classes by endpoint (``ADMISSION_ENDPOINT_CLASSES``):
+imports and other bulk writes, exports and reports; everything else is
+interactive. Each expensive class has a concurrency limit shared by all
+gunicorn workers, so a burst of uploads cannot occupy every worker while
+listings and edits wait behind them. A request that finds its class saturated
+is rejected at once with 429 and ``Retry-After`` instead of queueing.
+
+The shared limit is a set of slot files under ``ADMISSION_LOCK_DIR``; a
+request holds one slot by keeping an exclusive ``flock`` on it until its
+request context ends (after a streamed response finishes). The kernel drops
+the lock when a worker dies, so a crashed import never leaks a slot. Where
+``fcntl`` is unavailable the limit falls back to a per-process semaphore.
+
+Each client also has a token bucket per class (``ADMISSION_RATE_LIMITS``);
+buckets live in the worker process, so a client spreading requests over
+several workers gets up to that many times the rate.
+Clients are told apart by remote address, or by ``ADMISSION_CLIENT_HEADER``
+(e.g. ``X-Real-IP``) when a trusted proxy sets it.
+"""
+import math
+import os
+import random
+import threading
+import time
+
+from flask import g, jsonify, request
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+INTERACTIVE = 'interactive'
+# Idle buckets are dropped once a process tracks this many
+MAX_BUCKETS = 10000
+
+
+class SlotSemaphore:
+    """At most ``limit`` holders across processes, one ``flock``-ed file per slot."""
+
+    def __init__(self, directory, name, limit):
+        self.paths = [os.path.join(directory, f'{name}.{i}.lock') for i in range(limit)]
+        self.directory = directory
+
+    def acquire(self):
+        """A handle for a free slot, or None when every slot is taken."""
+        os.makedirs(self.directory, exist_ok=True)
+        # Start at a random slot so concurrent requests do not all probe slot 0 first
+        start = random.randrange(len(self.paths)) if self.paths else 0
+        for path in self.paths[start:] + self.paths[:start]:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    def release(self, fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+class ProcessSemaphore:
+    """Fallback without ``fcntl``: the limit applies per worker process."""
+
+    def __init__(self, directory, name, limit):
+        self.semaphore = threading.BoundedSemaphore(limit)
+
+    def acquire(self):
+        return True if self.semaphore.acquire(blocking=False) else None
+
+    def release(self, handle):
+        self.semaphore.release()
+
+
+class TokenBuckets:
+    """Per-client token buckets for one class: ``per_minute`` refill, up to ``burst`` tokens."""
+
+    def __init__(self, per_minute, burst):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def take(self, client, now=None):
+        """Spend a token; returns 0, or the seconds until the client has one again."""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            tokens, last = self.buckets.get(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens < 1:
+                self.buckets[client] = (tokens, now)
+                return (1 - tokens) / self.rate
+            if len(self.buckets) >= MAX_BUCKETS:
+                self._prune(now)
+            self.buckets[client] = (tokens - 1, now)
+            return 0
+
+    def refund(self, client):
+        with self.lock:
+            if client in self.buckets:
+                tokens, last = self.buckets[client]
+                self.buckets[client] = (min(self.burst, tokens + 1), last)
+
+    def _prune(self, now):
+        full_after = self.burst / self.rate
+        self.buckets = {client: state for client, state in self.buckets.items() if now - state[1] < full_after}
+
+
+class AdmissionControl:
+    def __init__(self, config):
+        self.endpoints = {endpoint: kind for kind, endpoints in config['ADMISSION_ENDPOINT_CLASSES'].items()
+                          for endpoint in endpoints}
+        self.retry_after = config['ADMISSION_RETRY_AFTER']
+        directory = config['ADMISSION_LOCK_DIR']
+        semaphore = SlotSemaphore if fcntl is not None else ProcessSemaphore
+        self.semaphores = {kind: semaphore(directory, kind, limit)
+                           for kind, limit in config['ADMISSION_CONCURRENCY'].items() if limit is not None}
+        self.buckets = {kind: TokenBuckets(*limit)
+                        for kind, limit in config['ADMISSION_RATE_LIMITS'].items() if limit is not None}
+
+    def classify(self, endpoint, args):
+        """The class of a request, or None for static files."""
+        if endpoint is None or endpoint == 'static':
+            return None
+        kind = self.endpoints.get(endpoint, INTERACTIVE)
+        if kind == 'report' and args.get('format') == 'xlsx':
+            return 'export'
+        return kind
+
+    def admit(self, kind, client):
+        """``(slot, None)`` when the request may run, else ``(None, (message, retry after seconds))``."""
+        buckets = self.buckets.get(kind)
+        if buckets is not None:
+            wait = buckets.take(client)
+            if wait:
+                return None, (f'Too many {kind} requests; slow down', wait)
+        semaphore = self.semaphores.get(kind)
+        if semaphore is None:
+            return True, None
+        slot = semaphore.acquire()
+        if slot is None:
+            # The request did not run, so it does not count against the client
+            if buckets is not None:
+                buckets.refund(client)
+            return None, (f'Too many concurrent {kind} requests; retry shortly', self.retry_after.get(kind, 1))
+        return slot, None
+
+    def release(self, kind, slot):
+        semaphore = self.semaphores.get(kind)
+        if semaphore is not None:
+            semaphore.release(slot)
+
+
+def init_admission(app):
+    """Register the hooks; call before other before_request hooks so rejected requests do no work."""
+    if not app.config['ADMISSION_ENABLED']:
+        return None
+    if app.config['ADMISSION_LOCK_DIR'] is None:
+        app.config['ADMISSION_LOCK_DIR'] = os.path.join(app.instance_path, 'admission')
+    control = AdmissionControl(app.config)
+    app.extensions['admission'] = control
+
+    @app.before_request
+    def admit_request():
+        kind = control.classify(request.endpoint, request.args)
+        if kind is None:
+            return None
+        header = app.config['ADMISSION_CLIENT_HEADER']
+        client = (header and request.headers.get(header)) or request.remote_addr or 'unknown'
+        slot, rejection = control.admit(kind, client)
+        if rejection is not None:
+            message, retry_after = rejection
+            response = jsonify({'error': message})
+            response.status_code = 429
+            response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+            return response
+        g.admission_slot = (kind, slot)
+        return None
+
+    @app.teardown_request
+    def release_slot(exc):
+        held = g.pop('admission_slot', None)
+        if held is not None:
+            control.release(*held)
+
+    return control
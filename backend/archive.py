@@ -0,0 +1,169 @@
+"""Move ITHC rows and releases of retired project versions to archive tables.
+
+``ithc_software`` gains a row per software per project version and keeps it
+forever; archiving moves old versions into ``ithc_software_archive`` (and
+optionally ``release`` into ``release_archive``) so the hot tables and their
+indexes stay small. Rows keep their ids, and restoring moves them back. A
+restored ITHC row whose id has been reused gets a new one, and its history
+entries follow it; a row whose (project, software, version) is live again
+stays archived and is reported as skipped.
+
+Rows move in batches of ``batch_size`` ids, each an INSERT ... SELECT into the
+target table and a DELETE from the source committed on its own, so a large
+archive run never holds one long write transaction. Moves are logged in the
+change log as deletes (archive) and inserts (restore), which is how they look
+to clients of the hot tables.
+"""
+from datetime import datetime
+
+from sqlalchemy import bindparam, delete, func, insert, literal, or_, select, tuple_, update
+from sqlalchemy.orm import aliased
+
+from changes import DELETE, INSERT, log_bulk
+from models.software import db, Project, Release, ITHCHistory, ITHCSoftware, ITHCSoftwareArchive, ReleaseArchive
+
+# (hot model, archive model, column holding the project version)
+TABLES = {
+    'ithc': (ITHCSoftware, ITHCSoftwareArchive, 'project_version'),
+    'releases': (Release, ReleaseArchive, 'version'),
+}
+# What makes an ITHC row unique among live rows
+ITHC_KEY = ('project_id', 'software_id', 'project_version')
+
+
+def _columns(model):
+    return [column.key for column in model.__table__.columns]
+
+
+def _version_filters(model, version_key, project_id, versions):
+    filters = [model.project_id == project_id]
+    if versions:
+        filters.append(getattr(model, version_key).in_(versions))
+    return filters
+
+
+def _next_batch(model, where, batch_size):
+    return list(db.session.execute(
+        select(model.id).where(*where).order_by(model.id).limit(batch_size)).scalars())
+
+
+def _archive_table(name, project_id, versions, batch_size):
+    model, archive_model, version_key = TABLES[name]
+    columns = _columns(model)
+    where = _version_filters(model, version_key, project_id, versions)
+    moved = 0
+    while ids := _next_batch(model, where, batch_size):
+        batch = model.id.in_(ids)
+        db.session.execute(insert(archive_model).from_select(
+            columns + ['archived_at'],
+            select(*(getattr(model, c) for c in columns), literal(datetime.utcnow(), db.DateTime))
+            .where(batch)))
+        log_bulk(model, DELETE, batch)
+        db.session.execute(delete(model).where(batch), execution_options={'synchronize_session': False})
+        db.session.commit()
+        moved += len(ids)
+    return moved
+
+
+def _key(model):
+    return [getattr(model, c) for c in ITHC_KEY]
+
+
+def _restorable_ithc():
+    """Archived ITHC rows that may go back: the latest archived copy of a key no live row holds."""
+    newer = aliased(ITHCSoftwareArchive)
+    live = select(ITHCSoftware.id).where(*(a == b for a, b in zip(_key(ITHCSoftware), _key(ITHCSoftwareArchive))))
+    latest = select(func.max(newer.id)).where(
+        *(a == b for a, b in zip(_key(newer), _key(ITHCSoftwareArchive)))).scalar_subquery()
+    return [~live.exists(), ITHCSoftwareArchive.id == latest]
+
+
+def _renumbered_ithc(old_ids):
+    """Ids given to restored ITHC rows in place of ``old_ids``; their history is repointed."""
+    archived = db.session.execute(
+        select(ITHCSoftwareArchive.id, *_key(ITHCSoftwareArchive)).where(ITHCSoftwareArchive.id.in_(old_ids))).all()
+    keys = [tuple(row[1:]) for row in archived]
+    live = {tuple(row[1:]): row[0] for row in db.session.execute(
+        select(ITHCSoftware.id, *_key(ITHCSoftware)).where(tuple_(*_key(ITHCSoftware)).in_(keys)))}
+    moves = [{'old_id': row[0], 'new_id': live[tuple(row[1:])], **dict(zip(('p', 's', 'v'), row[1:]))}
+             for row in archived]
+    # The old id may belong to another row now, so history is matched on the key too
+    history = ITHCHistory.__table__
+    db.session.execute(
+        update(history).where(history.c.ithc_id == bindparam('old_id'), history.c.project_id == bindparam('p'),
+                              history.c.software_id == bindparam('s'), history.c.project_version == bindparam('v'))
+        .values(ithc_id=bindparam('new_id')), moves)
+    return [move['new_id'] for move in moves]
+
+
+def _restore_table(name, project_id, versions, batch_size):
+    """Move archived rows back; returns (rows restored, rows left archived)."""
+    model, archive_model, version_key = TABLES[name]
+    columns = _columns(model)
+    filters = _version_filters(archive_model, version_key, project_id, versions)
+    where = filters + (_restorable_ithc() if model is ITHCSoftware else [])
+    moved = 0
+    while ids := _next_batch(archive_model, where, batch_size):
+        # An id taken in the hot table since archiving gets a fresh one on restore
+        taken = set(db.session.execute(select(model.id).where(model.id.in_(ids))).scalars())
+        kept = [i for i in ids if i not in taken]
+        last_id = db.session.execute(select(func.coalesce(func.max(model.id), 0))).scalar()
+        if kept:
+            db.session.execute(insert(model).from_select(
+                columns, select(*(getattr(archive_model, c) for c in columns)).where(archive_model.id.in_(kept))))
+        if taken:
+            renumbered = [c for c in columns if c != 'id']
+            db.session.execute(insert(model).from_select(
+                renumbered,
+                select(*(getattr(archive_model, c) for c in renumbered)).where(archive_model.id.in_(taken))))
+        if model is ITHCSoftware:
+            log_bulk(model, INSERT, model.id.in_(kept + (_renumbered_ithc(taken) if taken else [])))
+        else:
+            log_bulk(model, INSERT, or_(model.id.in_(kept), model.id > last_id) if taken else model.id.in_(kept))
+        db.session.execute(delete(archive_model).where(archive_model.id.in_(ids)),
+                           execution_options={'synchronize_session': False})
+        db.session.commit()
+        moved += len(ids)
+    skipped = 0
+    if model is ITHCSoftware:
+        skipped = db.session.execute(select(func.count()).select_from(archive_model).where(*filters)).scalar()
+    return moved, skipped
+
+
+def archive_versions(project_id, versions=None, include_releases=False, batch_size=5000):
+    """Archive a project's ITHC rows (and releases) for ``versions``, or all versions.
+
+    Returns the number of rows moved per table.
+    """
+    counts = {'ithc': _archive_table('ithc', project_id, versions, batch_size)}
+    if include_releases:
+        counts['releases'] = _archive_table('releases', project_id, versions, batch_size)
+    return counts
+
+
+def restore_versions(project_id, versions=None, include_releases=False, batch_size=5000):
+    """Move archived rows back; the reverse of :func:`archive_versions`.
+
+    Returns the rows moved per table and the ITHC rows left archived because a
+    live row has their key: ``({'ithc': n, 'releases': n}, {'ithc': n})``.
+    """
+    restored, skipped = _restore_table('ithc', project_id, versions, batch_size)
+    counts = {'ithc': restored}
+    if include_releases:
+        counts['releases'] = _restore_table('releases', project_id, versions, batch_size)[0]
+    return counts, {'ithc': skipped}
+
+
+def retired_versions(before):
+    """(project_id, project_version) pairs with no ITHC update since ``before``.
+
+    A project's current ``software_version`` is never considered retired.
+    """
+    return db.session.execute(
+        select(ITHCSoftware.project_id, ITHCSoftware.project_version)
+        .join(Project, ITHCSoftware.project_id == Project.id)
+        .where(ITHCSoftware.project_version != func.coalesce(Project.software_version, ''))
+        .group_by(ITHCSoftware.project_id, ITHCSoftware.project_version)
+        .having(func.max(ITHCSoftware.updated_at) < before)
+        .order_by(ITHCSoftware.project_id, ITHCSoftware.project_version)
+    ).all()
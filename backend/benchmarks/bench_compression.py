@@ -0,0 +1,69 @@
+"""Measure bytes saved and CPU cost of response compression per level.
+
+    python benchmarks/bench_compression.py --software 10000 --projects 40 --components 250
+
+Encodes the seeded listings with the app's JSON provider, plus a generated
+software import workbook, and compresses each body with gzip (and brotli when
+installed) at several levels (best of --repeat runs).
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from models.software import db  # noqa: E402
+from compression import ENCODERS  # noqa: E402
+from seed import generate_dataset, seed_database, write_workbook  # noqa: E402
+import queries  # noqa: E402
+
+LEVELS = {'gzip': (1, 6, 9), 'br': (1, 4, 9)}
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(func())
+        timings.append(time.perf_counter() - start)
+    return min(timings), size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--software', type=int, default=10000)
+    parser.add_argument('--projects', type=int, default=40)
+    parser.add_argument('--versions', type=int, default=5)
+    parser.add_argument('--customers', type=int, default=500)
+    parser.add_argument('--components', type=int, default=250)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        data = generate_dataset(1, args.software, args.projects, args.versions, args.customers, args.components)
+        seed_database(data)
+        workbook = io.BytesIO()
+        write_workbook('software', data, workbook)
+        bodies = [
+            ('software', app.json.dumps(queries.software_dicts()).encode()),
+            ('projects', app.json.dumps(queries.project_dicts()).encode()),
+            ('ithc', app.json.dumps(queries.ithc_dicts()).encode()),
+            ('xlsx', workbook.getvalue()),
+        ]
+
+    print(f"{'body':<10}{'KiB':>9}{'encoding':>10}{'level':>7}{'out KiB':>10}{'saved':>8}{'ms':>9}{'MB/s':>8}")
+    for name, body in bodies:
+        for encoding, encoder in ENCODERS.items():
+            for level in LEVELS[encoding]:
+                elapsed, size = best_of(args.repeat, lambda: encoder(level).compress(body))
+                print(f'{name:<10}{len(body) / 1024:>9.0f}{encoding:>10}{level:>7}{size / 1024:>10.0f}'
+                      f'{1 - size / len(body):>8.0%}{elapsed * 1000:>9.1f}{len(body) / elapsed / 1e6:>8.0f}')
+
+
+if __name__ == '__main__':
+    main()
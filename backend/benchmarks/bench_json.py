@@ -0,0 +1,64 @@
+"""Compare the stdlib and orjson JSON providers on the large listings.
+
+    python benchmarks/bench_json.py --software 10000 --projects 40 --components 250
+
+Seeds an in-memory SQLite database with ``seed.generate_dataset``, builds the
+listing dicts once through ``queries.py`` and times ``app.json.response`` for
+each provider (best of --repeat runs).
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from models.software import db  # noqa: E402
+from json_provider import OrjsonProvider, StdlibJSONProvider, orjson  # noqa: E402
+from seed import generate_dataset, seed_database  # noqa: E402
+import queries  # noqa: E402
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(func().get_data())
+        timings.append(time.perf_counter() - start)
+    return min(timings), size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--software', type=int, default=10000)
+    parser.add_argument('--projects', type=int, default=40)
+    parser.add_argument('--versions', type=int, default=5)
+    parser.add_argument('--customers', type=int, default=500)
+    parser.add_argument('--components', type=int, default=250)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+    if orjson is None:
+        parser.error('orjson is not installed')
+
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        seed_database(generate_dataset(1, args.software, args.projects, args.versions,
+                                       args.customers, args.components))
+        listings = [
+            ('software', queries.software_dicts()),
+            ('projects', queries.project_dicts()),
+            ('ithc', queries.ithc_dicts()),
+        ]
+        stdlib, fast = StdlibJSONProvider(app), OrjsonProvider(app)
+        print(f"{'listing':<12}{'rows':>8}{'KiB':>9}{'stdlib ms':>11}{'orjson ms':>11}{'speedup':>9}")
+        for name, items in listings:
+            stdlib_time, size = best_of(args.repeat, lambda: stdlib.response(items))
+            fast_time, _ = best_of(args.repeat, lambda: fast.response(items))
+            print(f'{name:<12}{len(items):>8}{size / 1024:>9.0f}{stdlib_time * 1000:>11.1f}'
+                  f'{fast_time * 1000:>11.1f}{stdlib_time / fast_time:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
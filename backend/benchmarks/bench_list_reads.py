@@ -0,0 +1,61 @@
+"""Compare the ORM and Core read paths for the collection endpoints.
+
+    python benchmarks/bench_list_reads.py --software 10000 --projects 40 --components 250
+
+Seeds an in-memory SQLite database with ``seed.generate_dataset`` and times
+building the response dicts both ways (best of --repeat runs).
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from models.software import db, Software, Project, Customer, ITHCSoftware  # noqa: E402
+from seed import generate_dataset, seed_database  # noqa: E402
+import queries  # noqa: E402
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(result)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--software', type=int, default=10000)
+    parser.add_argument('--projects', type=int, default=40)
+    parser.add_argument('--versions', type=int, default=5)
+    parser.add_argument('--customers', type=int, default=500)
+    parser.add_argument('--components', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        seed_database(generate_dataset(1, args.software, args.projects, args.versions,
+                                       args.customers, args.components))
+        cases = [
+            ('software', lambda: [s.to_dict() for s in Software.query.all()], queries.software_dicts),
+            ('customers', lambda: [c.to_dict() for c in Customer.query.all()], queries.customer_dicts),
+            ('projects', lambda: [p.to_dict() for p in Project.query.all()], queries.project_dicts),
+            ('ithc', lambda: [i.to_dict() for i in ITHCSoftware.query.all()], queries.ithc_dicts),
+        ]
+        print(f"{'collection':<12}{'rows':>8}{'orm ms':>10}{'core ms':>10}{'speedup':>9}")
+        for name, orm_path, core_path in cases:
+            orm_time, rows = best_of(args.repeat, orm_path)
+            core_time, _ = best_of(args.repeat, core_path)
+            print(f'{name:<12}{rows:>8}{orm_time * 1000:>10.1f}{core_time * 1000:>10.1f}'
+                  f'{orm_time / core_time:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
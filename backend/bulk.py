@@ -0,0 +1,196 @@
+"""Set-based writes that bypass the ORM.
+
+Each operation runs a fixed number of statements however many rows it touches
+and logs its changes with ``changes.log_bulk``/``log_rows`` (and ITHC history
+with ``history.record_bulk``) in the same transaction. Callers commit.
+"""
+from datetime import datetime
+
+from sqlalchemy import case, delete, insert, literal, select, update
+
+from changes import DELETE, INSERT, UPDATE, log_bulk
+from history import record_bulk
+from models.software import db, Software, Project, Release, Customer, ITHCSoftware, project_customer
+
+
+class VersionExists(ValueError):
+    """The target project version already has ITHC rows."""
+
+
+class UnknownIds(ValueError):
+    """Some of the requested ids do not exist."""
+
+    def __init__(self, kind, ids):
+        super().__init__(f"Unknown {kind} ids: {', '.join(map(str, sorted(ids)))}")
+        self.kind = kind
+        self.ids = ids
+
+
+def _existing_ids(model, ids):
+    return set(db.session.execute(select(model.id).where(model.id.in_(ids))).scalars())
+
+
+def _check_ids(model, kind, ids):
+    missing = set(ids) - _existing_ids(model, ids) if ids else set()
+    if missing:
+        raise UnknownIds(kind, missing)
+
+
+def update_links(owner_column, owner_id, other_column, add=(), remove=(), replace=None):
+    """Apply a membership diff on ``project_customer`` for one project or customer.
+
+    ``owner_column`` is the link column holding ``owner_id`` and
+    ``other_column`` the one holding the ids in ``add``/``remove``. With
+    ``replace`` the final set is exactly ``replace``; otherwise ``add`` and
+    ``remove`` are applied to the current set.
+    """
+    current = set(db.session.execute(select(other_column).where(owner_column == owner_id)).scalars())
+    if replace is not None:
+        to_add, to_remove = set(replace) - current, current - set(replace)
+    else:
+        to_add, to_remove = set(add) - current, (set(remove) & current) - set(add)
+
+    if to_remove:
+        removed = (owner_column == owner_id, other_column.in_(to_remove))
+        log_bulk(project_customer, DELETE, *removed)
+        db.session.execute(delete(project_customer).where(*removed))
+    if to_add:
+        db.session.execute(insert(project_customer),
+                           [{owner_column.key: owner_id, other_column.key: other_id} for other_id in to_add])
+        log_bulk(project_customer, INSERT, owner_column == owner_id, other_column.in_(to_add))
+    return {'added': len(to_add), 'removed': len(to_remove), 'total': len(current - to_remove) + len(to_add)}
+
+
+def set_project_customers(project_id, add=(), remove=(), replace=None):
+    _check_ids(Customer, 'customer', set(add) | set(remove) | set(replace or ()))
+    summary = update_links(project_customer.c.project_id, project_id, project_customer.c.customer_id,
+                           add, remove, replace)
+    return {'project_id': project_id, 'added': summary['added'], 'removed': summary['removed'],
+            'customer_count': summary['total']}
+
+
+def set_customer_projects(customer_id, add=(), remove=(), replace=None):
+    _check_ids(Project, 'project', set(add) | set(remove) | set(replace or ()))
+    summary = update_links(project_customer.c.customer_id, customer_id, project_customer.c.project_id,
+                           add, remove, replace)
+    return {'customer_id': customer_id, 'added': summary['added'], 'removed': summary['removed'],
+            'project_count': summary['total']}
+
+
+def _delete(model, *where):
+    return db.session.execute(delete(model).where(*where), execution_options={'synchronize_session': False}).rowcount
+
+
+def delete_ithc(*where):
+    """Delete the ITHC rows matching ``where``; returns ``{'ithc': count}``."""
+    log_bulk(ITHCSoftware, DELETE, *where)
+    record_bulk(*where, removed=True)
+    return {'ithc': _delete(ITHCSoftware, *where)}
+
+
+def delete_projects(*where):
+    """Delete matching projects with their ITHC rows, releases and customer links.
+
+    Children are removed explicitly rather than left to ON DELETE CASCADE so
+    each gets a change-log entry and databases created before the cascades
+    were added behave the same.
+    """
+    project_ids = select(Project.id).where(*where).scalar_subquery()
+    counts = delete_ithc(ITHCSoftware.project_id.in_(project_ids))
+    log_bulk(Release, DELETE, Release.project_id.in_(project_ids))
+    counts['releases'] = _delete(Release, Release.project_id.in_(project_ids))
+    log_bulk(project_customer, DELETE, project_customer.c.project_id.in_(project_ids))
+    counts['customer_links'] = db.session.execute(
+        delete(project_customer).where(project_customer.c.project_id.in_(project_ids))).rowcount
+    log_bulk(Project, DELETE, *where)
+    counts['projects'] = _delete(Project, *where)
+    return counts
+
+
+def delete_software(*where):
+    """Delete matching software with its ITHC rows; projects using it keep no software."""
+    software_ids = select(Software.id).where(*where).scalar_subquery()
+    counts = delete_ithc(ITHCSoftware.software_id.in_(software_ids))
+    detached = (Project.software_id.in_(software_ids),)
+    log_bulk(Project, UPDATE, *detached)
+    counts['projects_detached'] = db.session.execute(
+        update(Project).where(*detached).values(software_id=None),
+        execution_options={'synchronize_session': False}).rowcount
+    log_bulk(Software, DELETE, *where)
+    counts['software'] = _delete(Software, *where)
+    return counts
+
+
+def clone_ithc(project_id, from_version, to_version, overrides=None, create_release=True, release_notes=''):
+    """Copy a project version's ITHC rows to a new version in one INSERT ... SELECT.
+
+    ``overrides`` maps software ids of the source version to the version
+    their copies get instead; other ids raise UnknownIds. With ``create_release`` a ``Release`` for ``to_version``
+    is added unless the project already has one. Returns
+    ``{'ithc': rows copied, 'release': the new Release or None}``.
+    """
+    overrides = overrides or {}
+    source = (ITHCSoftware.project_id == project_id, ITHCSoftware.project_version == from_version)
+    target = (ITHCSoftware.project_id == project_id, ITHCSoftware.project_version == to_version)
+    if db.session.execute(select(ITHCSoftware.id).where(*target).limit(1)).first():
+        raise VersionExists(f'Project version {to_version} already has ITHC entries')
+    if overrides:
+        in_source = set(db.session.execute(
+            select(ITHCSoftware.software_id).where(*source, ITHCSoftware.software_id.in_(overrides))).scalars())
+        if set(overrides) - in_source:
+            raise UnknownIds('software', set(overrides) - in_source)
+        version = case({software_id: literal(v) for software_id, v in overrides.items()},
+                       value=ITHCSoftware.software_id, else_=ITHCSoftware.current_software_version)
+    else:
+        version = ITHCSoftware.current_software_version
+    now = literal(datetime.utcnow(), db.DateTime)
+    rows = select(ITHCSoftware.project_id, ITHCSoftware.software_id, literal(to_version), version, now, now) \
+        .where(*source)
+    cloned = db.session.execute(insert(ITHCSoftware).from_select(
+        ['project_id', 'software_id', 'project_version', 'current_software_version', 'created_at', 'updated_at'],
+        rows)).rowcount
+    if cloned:
+        log_bulk(ITHCSoftware, INSERT, *target)
+        record_bulk(*target)
+
+    release = None
+    if cloned and create_release and not db.session.execute(
+            select(Release.id).where(Release.project_id == project_id, Release.version == to_version).limit(1)).first():
+        release = Release(project_id=project_id, version=to_version, notes=release_notes)
+        db.session.add(release)
+        db.session.flush()
+    return {'ithc': cloned, 'release': release}
+
+
+def upgrade_ithc(project_id, project_version, software_type=None, software_ids=None, batch_size=500):
+    """Set the project version's ITHC rows to their software's latest version.
+
+    One correlated UPDATE over the rows whose version differs from
+    ``Software.latest_version``, optionally only for ``software_type`` or
+    ``software_ids``. Returns the changed rows with their old and new versions.
+    """
+    latest = select(Software.latest_version).where(Software.id == ITHCSoftware.software_id) \
+        .correlate(ITHCSoftware).scalar_subquery()
+    where = [ITHCSoftware.project_id == project_id, ITHCSoftware.project_version == project_version,
+             ITHCSoftware.current_software_version != latest]
+    if software_ids is not None:
+        where.append(ITHCSoftware.software_id.in_(software_ids))
+    if software_type is not None:
+        where.append(ITHCSoftware.software_id.in_(select(Software.id).where(Software.software_type == software_type)))
+    changed = db.session.execute(
+        select(ITHCSoftware.id, ITHCSoftware.software_id, Software.name, ITHCSoftware.current_software_version,
+               Software.latest_version)
+        .join(Software, ITHCSoftware.software_id == Software.id).where(*where).order_by(Software.name)
+    ).all()
+    if not changed:
+        return []
+    db.session.execute(update(ITHCSoftware).where(*where)
+                       .values(current_software_version=latest, updated_at=datetime.utcnow()),
+                       execution_options={'synchronize_session': False})
+    ids = [row[0] for row in changed]
+    for start in range(0, len(ids), batch_size):
+        batch = ITHCSoftware.id.in_(ids[start:start + batch_size])
+        log_bulk(ITHCSoftware, UPDATE, batch)
+        record_bulk(batch)
+    return [{'id': row[0], 'software_id': row[1], 'software_name': row[2], 'from_version': row[3],
+             'to_version': row[4]} for row in changed]
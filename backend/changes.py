@@ -0,0 +1,202 @@
+"""Change log for incremental sync.
+
+Every ORM flush that inserts, updates or deletes a tracked entity writes a
+``change_log`` row in the same transaction, so importers and API handlers are
+covered without any extra code. Core statements that bypass the ORM (bulk
+inserts, set-based updates and deletes) call :func:`log_bulk` or
+:func:`log_rows` themselves.
+
+``/api/changes?since=<token>`` (see :func:`changes_since`) returns the entities
+changed after ``token``, coalesced to their current state, plus the next token.
+"""
+from datetime import datetime
+
+from sqlalchemy import event, insert, inspect, literal, null, select, tuple_
+
+from models.session import RoutingSession
+from models.software import (db, ChangeLog, ChangeLogPrune, Software, Project, Release, Customer, ITHCSoftware,
+                             project_customer)
+
+INSERT, UPDATE, DELETE = 'insert', 'update', 'delete'
+
+ENTITIES = {
+    Software: 'software',
+    Project: 'project',
+    Release: 'release',
+    Customer: 'customer',
+    ITHCSoftware: 'ithc',
+}
+LINK = 'project_customer'
+
+
+def _scope(obj):
+    """(project_id, project_version) a change is filed under, for subscribers."""
+    if isinstance(obj, Project):
+        return obj.id, obj.software_version
+    if isinstance(obj, Release):
+        return obj.project_id, obj.version
+    if isinstance(obj, ITHCSoftware):
+        return obj.project_id, obj.project_version
+    return None, None
+
+
+def scope_columns(model):
+    """SQL counterpart of :func:`_scope` for INSERT ... SELECT logging."""
+    if model is Project:
+        return Project.id, Project.software_version
+    if model is Release:
+        return Release.project_id, Release.version
+    if model is ITHCSoftware:
+        return ITHCSoftware.project_id, ITHCSoftware.project_version
+    if model is project_customer:
+        return project_customer.c.project_id, null()
+    return null(), null()
+
+
+def _entry(entity, entity_id, op, scope, changed_at):
+    return {'entity': entity, 'entity_id': entity_id, 'op': op,
+            'project_id': scope[0], 'project_version': scope[1], 'changed_at': changed_at}
+
+
+def _link_entries(project, changed_at):
+    history = inspect(project).attrs.customers.history
+    for customer in history.added or ():
+        yield _entry(LINK, customer.id, INSERT, (project.id, None), changed_at)
+    for customer in history.deleted or ():
+        yield _entry(LINK, customer.id, DELETE, (project.id, None), changed_at)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def record_flush(session, flush_context):
+    now = datetime.utcnow()
+    entries = []
+    for objects, op in ((session.new, INSERT), (session.dirty, UPDATE), (session.deleted, DELETE)):
+        for obj in objects:
+            entity = ENTITIES.get(type(obj))
+            if entity is None:
+                continue
+            if isinstance(obj, Project) and op != DELETE:
+                entries.extend(_link_entries(obj, now))
+            if op == UPDATE and not session.is_modified(obj, include_collections=False):
+                continue
+            entries.append(_entry(entity, obj.id, op, _scope(obj), now))
+    if entries:
+        session.connection().execute(insert(ChangeLog), entries)
+
+
+def log_rows(entries):
+    """Log explicit ``{'entity', 'entity_id', 'op', 'project_id', 'project_version'}`` dicts."""
+    now = datetime.utcnow()
+    rows = [{'project_id': None, 'project_version': None, 'changed_at': now, **entry} for entry in entries]
+    if rows:
+        db.session.execute(insert(ChangeLog), rows)
+
+
+def log_bulk(model, op, *where):
+    """Log ``op`` for every row of ``model`` matching ``where`` in one INSERT ... SELECT.
+
+    Call after a bulk insert or update, and before a bulk delete. ``model`` is
+    a tracked model class or the ``project_customer`` table. Returns the
+    number of rows logged.
+    """
+    if model is project_customer:
+        entity, entity_id = LINK, project_customer.c.customer_id
+    else:
+        entity, entity_id = ENTITIES[model], model.id
+    rows = select(literal(entity), entity_id, literal(op), *scope_columns(model),
+                  literal(datetime.utcnow())).where(*where)
+    return db.session.execute(insert(ChangeLog).from_select(
+        ['entity', 'entity_id', 'op', 'project_id', 'project_version', 'changed_at'], rows)).rowcount
+
+
+def pruned_through():
+    """Highest change log id removed by :func:`prune`, or 0."""
+    return db.session.execute(select(db.func.coalesce(db.func.max(ChangeLogPrune.pruned_through), 0))).scalar()
+
+
+def latest_token():
+    # Never below the watermark, so an emptied log does not hand out token 0 again
+    latest = db.session.execute(select(db.func.max(ChangeLog.id))).scalar()
+    return max(latest or 0, pruned_through())
+
+
+def log_covers(token, watermark=None):
+    """Whether the log still holds every entry after ``token``; pass ``watermark`` to reuse one lookup."""
+    return token >= (pruned_through() if watermark is None else watermark)
+
+
+def _columns(model):
+    return [column.key for column in model.__table__.columns]
+
+
+def _current_rows(model, ids):
+    columns = _columns(model)
+    rows = db.session.execute(select(*(getattr(model, c) for c in columns)).where(model.id.in_(ids)))
+    return {row[0]: dict(zip(columns, row)) for row in rows}
+
+
+class TokenExpired(Exception):
+    """Entries after the token have been pruned; the client must resync."""
+
+
+def changes_since(since, limit):
+    """Coalesced deltas for changes after ``since``, at most ``limit`` log entries.
+
+    Returns ``{'token', 'more', 'changes'}`` where ``changes`` maps each entity
+    to ``{'upserted': [rows], 'deleted': [ids]}`` (customer links use
+    ``{'project_id', 'customer_id'}`` pairs). Entries already superseded by a
+    later delete within the batch are reported only as deletes.
+    """
+    if not log_covers(since):
+        raise TokenExpired(since)
+
+    entries = db.session.execute(
+        select(ChangeLog.id, ChangeLog.entity, ChangeLog.entity_id, ChangeLog.op, ChangeLog.project_id)
+        .where(ChangeLog.id > since).order_by(ChangeLog.id).limit(limit + 1)
+    ).all()
+    more = len(entries) > limit
+    entries = entries[:limit]
+
+    latest = {}
+    for _, entity, entity_id, op, project_id in entries:
+        key = (project_id, entity_id) if entity == LINK else entity_id
+        latest[entity, key] = op
+
+    changes = {}
+    for model, entity in ENTITIES.items():
+        touched = {key: op for (e, key), op in latest.items() if e == entity}
+        if not touched:
+            continue
+        current = _current_rows(model, [key for key, op in touched.items() if op != DELETE])
+        changes[entity] = {
+            'upserted': list(current.values()),
+            'deleted': sorted(key for key in touched if key not in current),
+        }
+
+    links = [key for (entity, key) in latest if entity == LINK]
+    if links:
+        existing = set(db.session.execute(
+            select(project_customer.c.project_id, project_customer.c.customer_id)
+            .where(tuple_(project_customer.c.project_id, project_customer.c.customer_id).in_(links))
+        ).all())
+        changes[LINK] = {
+            'upserted': [{'project_id': p, 'customer_id': c} for p, c in links if (p, c) in existing],
+            'deleted': [{'project_id': p, 'customer_id': c} for p, c in links if (p, c) not in existing],
+        }
+
+    token = entries[-1][0] if entries else max(since, 0)
+    return {'token': token, 'more': more, 'changes': changes}
+
+
+def prune(before):
+    """Delete change log entries older than ``before``; returns the number removed.
+
+    The highest removed id is kept as the watermark (see :func:`pruned_through`).
+    """
+    highest = db.session.execute(select(db.func.max(ChangeLog.id)).where(ChangeLog.changed_at < before)).scalar()
+    if highest is None:
+        return 0
+    result = db.session.execute(db.delete(ChangeLog).where(ChangeLog.changed_at < before))
+    db.session.add(ChangeLogPrune(pruned_through=highest, removed=result.rowcount))
+    db.session.commit()
+    return result.rowcount
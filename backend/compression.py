@@ -0,0 +1,126 @@
+"""Content-negotiated gzip/brotli compression of responses.
+
+Runs as the last ``after_request`` hook. A response is compressed when the
+client accepts an encoding we support, its mimetype is in
+``COMPRESSION_MIMETYPES`` and it is at least ``COMPRESSION_MIN_SIZE`` bytes.
+Streamed responses (unknown length) are compressed chunk by chunk and flushed
+after every chunk, so a client still sees each chunk as soon as it is produced.
+Brotli is used only if the ``brotli`` package is installed.
+"""
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+
+class GzipEncoder:
+    def __init__(self, level):
+        # wbits=31: zlib stream with a gzip header and trailer
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_FINISH)
+
+    def chunk(self, data):
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    def __init__(self, level):
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self.compressor.process(data) + self.compressor.finish()
+
+    def chunk(self, data):
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+ENCODERS = {'gzip': GzipEncoder}
+if brotli is not None:
+    ENCODERS['br'] = BrotliEncoder
+
+
+def negotiate(accept_encodings, preferred):
+    """Pick the encoding with the highest client quality; ties go to ``preferred`` order."""
+    best, best_quality = None, 0
+    for encoding in preferred:
+        if encoding not in ENCODERS:
+            continue
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def level_for(config, encoding):
+    return config['COMPRESSION_BR_LEVEL'] if encoding == 'br' else config['COMPRESSION_GZIP_LEVEL']
+
+
+def compress_stream(chunks, encoder):
+    for data in chunks:
+        if isinstance(data, str):
+            data = data.encode()
+        if data:
+            compressed = encoder.chunk(data)
+            if compressed:
+                yield compressed
+    yield encoder.finish()
+
+
+def compress_response(response, config):
+    if (not config['COMPRESSION_ENABLED']
+            or request.method == 'HEAD'
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in config['COMPRESSION_MIMETYPES']):
+        return response
+    response.vary.add('Accept-Encoding')
+    if 'no-transform' in (response.headers.get('Cache-Control') or ''):
+        return response
+
+    encoding = negotiate(request.accept_encodings, config['COMPRESSION_ALGORITHMS'])
+    if encoding is None:
+        return response
+    length = response.content_length
+    if length is not None and length < config['COMPRESSION_MIN_SIZE']:
+        return response
+    encoder = ENCODERS[encoding](level_for(config, encoding))
+
+    if response.is_streamed or response.direct_passthrough:
+        chunks = response.response
+        response.response = compress_stream(chunks, encoder)
+        response.direct_passthrough = False
+        if hasattr(chunks, 'close'):
+            response.call_on_close(chunks.close)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < config['COMPRESSION_MIN_SIZE']:
+            return response
+        response.set_data(encoder.compress(data))
+
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # The compressed bytes differ from the identity representation
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    """Register the hook; call before other after_request hooks so it runs last."""
+
+    @app.after_request
+    def compress(response):
+        return compress_response(response, app.config)
@@ -0,0 +1,77 @@
+"""Per-backend database engine tuning.
+
+``DB_ENGINE_PROFILE = 'tuned'`` (the default) applies the settings below;
+``'default'`` leaves the driver and SQLAlchemy defaults untouched.
+"""
+from sqlalchemy import event
+
+# Applied to every new SQLite connection. WAL lets readers run while an import
+# holds the write lock, and busy_timeout makes writers wait instead of failing
+# with "database is locked".
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64000,  # negative values are KiB, so ~64 MB
+    'temp_store': 'MEMORY',
+}
+
+
+def is_sqlite(uri):
+    return uri.startswith('sqlite')
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database and profile."""
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if config.get('DB_ENGINE_PROFILE', 'tuned') != 'tuned' or is_sqlite(config['SQLALCHEMY_DATABASE_URI']):
+        return options
+    # Server databases: size the pool per worker process, recycle connections
+    # before the server's wait_timeout drops them and test them on checkout.
+    options.setdefault('pool_size', config['DB_POOL_SIZE'])
+    options.setdefault('max_overflow', config['DB_MAX_OVERFLOW'])
+    options.setdefault('pool_recycle', config['DB_POOL_RECYCLE'])
+    options.setdefault('pool_pre_ping', config['DB_POOL_PRE_PING'])
+    return options
+
+
+def sqlite_pragmas(config):
+    return {**SQLITE_PRAGMAS, **(config.get('SQLITE_PRAGMAS') or {})}
+
+
+def apply_engine_profile(engine, config, read_only=False):
+    """Register connect/close listeners implementing the profile on ``engine``.
+
+    ``read_only`` engines (the SQLite read replica snapshot) keep the file's own
+    journal mode and refuse writes. SQLite foreign keys are enforced under every
+    profile, since the models rely on their ON DELETE actions.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def enforce_foreign_keys(dbapi_connection, connection_record):
+        dbapi_connection.execute('PRAGMA foreign_keys=ON')
+
+    if config.get('DB_ENGINE_PROFILE', 'tuned') != 'tuned':
+        return
+    pragmas = sqlite_pragmas(config)
+    if read_only:
+        pragmas = {name: value for name, value in pragmas.items() if name not in ('journal_mode', 'synchronous')}
+        pragmas['query_only'] = 'ON'
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+    @event.listens_for(engine, 'close')
+    def optimize_sqlite(dbapi_connection, connection_record):
+        # Recommended before closing long-lived connections; refreshes planner stats
+        try:
+            dbapi_connection.execute('PRAGMA optimize')
+        except Exception:
+            pass
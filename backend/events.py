@@ -0,0 +1,196 @@
+"""Server-Sent Events stream of inventory changes.
+
+The ``change_log`` table (see changes.py) is the publish channel: every worker
+process runs one :class:`ChangeBroadcaster` thread that polls it for new
+entries and fans them out to that process's open streams, so changes made
+through any worker reach every client without an external message broker, and
+the number of connected clients does not add database load.
+
+Clients reconnect with ``Last-Event-ID`` (EventSource does this automatically)
+and receive the entries they missed from the log before live events resume.
+Streams are closed after ``EVENTS_STREAM_SECONDS`` so a sync worker is never
+held past gunicorn's timeout; the browser reconnects on its own.
+"""
+import json
+import os
+import queue
+import threading
+import time
+
+from flask import Response, jsonify, request
+from sqlalchemy import select
+
+import changes
+from models.software import db, ChangeLog
+
+# Entities filed under a project version rather than only a project
+VERSIONED = {'ithc', 'release'}
+
+
+def _event(row):
+    change_id, entity, entity_id, op, project_id, project_version = row
+    return change_id, {'entity': entity, 'id': entity_id, 'op': op,
+                       'project_id': project_id, 'project_version': project_version}
+
+
+def _entries_after(change_id, limit):
+    return db.session.execute(
+        select(ChangeLog.id, ChangeLog.entity, ChangeLog.entity_id, ChangeLog.op,
+               ChangeLog.project_id, ChangeLog.project_version)
+        .where(ChangeLog.id > change_id).order_by(ChangeLog.id).limit(limit)
+    ).all()
+
+
+class Subscription:
+    def __init__(self, entities, project_id, project_version, size):
+        self.entities = entities
+        self.project_id = project_id
+        self.project_version = project_version
+        self.queue = queue.Queue(maxsize=size)
+        self.overflowed = False
+
+    def wants(self, event):
+        if self.entities and event['entity'] not in self.entities:
+            return False
+        if self.project_id is None or event['entity'] in ('software', 'customer'):
+            return True
+        if event['project_id'] != self.project_id:
+            return False
+        return (self.project_version is None or event['entity'] not in VERSIONED
+                or event['project_version'] == self.project_version)
+
+    def deliver(self, change_id, event):
+        try:
+            self.queue.put_nowait((change_id, event))
+        except queue.Full:
+            # A client this far behind catches up from the log when it reconnects
+            self.overflowed = True
+
+
+class ChangeBroadcaster:
+    """Polls the change log while this process has subscribers."""
+
+    def __init__(self, app):
+        self.app = app
+        self.interval = app.config['EVENTS_POLL_INTERVAL']
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.thread = None
+        self.pid = None
+
+    def subscribe(self, subscription):
+        with self.lock:
+            if len(self.subscribers) >= self.app.config['EVENTS_MAX_CLIENTS']:
+                return False
+            self.subscribers.add(subscription)
+            # Threads do not survive a fork, so a preloaded app starts one per worker
+            if self.thread is None or not self.thread.is_alive() or self.pid != os.getpid():
+                with self.app.app_context():
+                    last_id = changes.latest_token()
+                    db.session.remove()
+                self.pid = os.getpid()
+                self.thread = threading.Thread(target=self.run, args=(last_id,), daemon=True)
+                self.thread.start()
+        return True
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+    def publish(self, change_id, event):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscription in subscribers:
+            if subscription.wants(event):
+                subscription.deliver(change_id, event)
+
+    def run(self, last_id):
+        while True:
+            with self.lock:
+                if not self.subscribers:
+                    self.thread = None
+                    return
+            try:
+                with self.app.app_context():
+                    rows = _entries_after(last_id, 500)
+                    db.session.remove()
+            except Exception as e:
+                self.app.logger.warning('Change event poll failed: %s', e)
+                rows = []
+            for row in rows:
+                last_id, event = _event(row)
+                self.publish(last_id, event)
+            if len(rows) < 500:
+                time.sleep(self.interval)
+
+
+def _format(change_id, event):
+    return f'id: {change_id}\nevent: change\ndata: {json.dumps(event)}\n\n'
+
+
+def init_events(app):
+    """Register ``GET /api/events``."""
+    broadcaster = ChangeBroadcaster(app)
+    app.extensions['change_events'] = broadcaster
+
+    @app.route('/api/events', methods=['GET'])
+    def stream_events():
+        entities = {e for e in request.args.get('entities', '').split(',') if e}
+        project_id = request.args.get('project_id', type=int)
+        project_version = request.args.get('project_version') or None
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        subscription = Subscription(entities, project_id, project_version, app.config['EVENTS_QUEUE_SIZE'])
+        if not broadcaster.subscribe(subscription):
+            response = jsonify({'error': 'Too many event streams; retry shortly'})
+            response.status_code = 503
+            response.headers['Retry-After'] = '5'
+            return response
+
+        # Catch up from the log before the stream starts; the subscription is
+        # already registered, so nothing committed after this query is missed
+        backlog, resync = [], False
+        if last_event_id is not None:
+            try:
+                since = int(last_event_id)
+                limit = app.config['CHANGES_PAGE_SIZE']
+                rows = _entries_after(since, limit + 1)
+                resync = len(rows) > limit or not changes.log_covers(since)
+                backlog = [] if resync else [_event(row) for row in rows]
+            except ValueError:
+                resync = True
+            db.session.remove()
+
+        heartbeat = app.config['EVENTS_HEARTBEAT']
+        deadline = time.monotonic() + app.config['EVENTS_STREAM_SECONDS']
+
+        def generate():
+            yield f"retry: {app.config['EVENTS_RETRY_MS']}\n\n"
+            if resync:
+                # Too far behind to replay: the client reloads its collections
+                yield 'event: resync\ndata: {}\n\n'
+            sent = int(last_event_id) if last_event_id and not resync else 0
+            for change_id, event in backlog:
+                if subscription.wants(event):
+                    yield _format(change_id, event)
+                sent = change_id
+            while not subscription.overflowed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    change_id, event = subscription.queue.get(timeout=min(heartbeat, remaining))
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                if change_id > sent:
+                    yield _format(change_id, event)
+                    sent = change_id
+
+        response = Response(generate(), mimetype='text/event-stream')
+        # Runs even if the client goes away before the generator starts
+        response.call_on_close(lambda: broadcaster.unsubscribe(subscription))
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'  # stop nginx from buffering the stream
+        return response
+
+    return broadcaster
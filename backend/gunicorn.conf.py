@@ -0,0 +1,100 @@
+"""Gunicorn production profile.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Every setting can be overridden through GUNICORN_* environment variables
+(or on the command line, which takes precedence over this file).
+"""
+import multiprocessing
+import os
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8000')
+workers = _env_int('GUNICORN_WORKERS', min(multiprocessing.cpu_count() * 2 + 1, 8))
+threads = _env_int('GUNICORN_THREADS', 1)
+# gthread lets one worker overlap several slow requests; plain sync otherwise
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread' if threads > 1 else 'sync')
+
+# Import the app once in the master so workers share its memory pages
+preload_app = True
+
+# Recycle workers to cap memory growth; jitter avoids restarting them all at once
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+# Imports of large workbooks can run well past the 30s default
+timeout = _env_int('GUNICORN_TIMEOUT', 120)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = os.environ.get('GUNICORN_ERROR_LOG', '-')
+
+# Each worker handles at most `threads` requests at once, so that is all the
+# connections its pool needs, however many workers there are (the pool is per
+# process); config.py reads these when the app is preloaded. That happens before
+# command-line options are known, so pass threads as GUNICORN_THREADS, not --threads.
+os.environ.setdefault('DB_POOL_SIZE', str(threads))
+os.environ.setdefault('DB_MAX_OVERFLOW', str(max(2, threads // 2)))
+# An /api/events stream holds its thread for up to EVENTS_STREAM_SECONDS; give
+# streams at most half the threads so API requests always find one free. A sync
+# worker (one thread) serves no streams and pages fall back to manual refresh.
+_default_stream_cap = 'EVENTS_MAX_CLIENTS' not in os.environ
+os.environ.setdefault('EVENTS_MAX_CLIENTS', str(threads // 2))
+
+
+def app_engines(app):
+    from models.software import db
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    replica = app.extensions.get('read_replica')
+    if replica is not None:
+        engines.append(replica.engine)
+    return engines
+
+
+def dispose_engines(app):
+    """Drop pooled connections inherited from the master without closing them.
+
+    ``close=False`` leaves the parent's sockets alone, so a connection opened
+    during preload is never shared between processes.
+    """
+    for engine in app_engines(app):
+        engine.dispose(close=False)
+
+
+def size_for_threads(app, worker_threads):
+    """Follow a thread count given on the command line where the app allows it.
+
+    The stream cap is read per request; the pool was built at preload and
+    keeps its size (on_starting warns about that).
+    """
+    if _default_stream_cap:
+        app.config['EVENTS_MAX_CLIENTS'] = worker_threads // 2
+
+
+def on_starting(server):
+    if server.cfg.threads != threads:
+        server.log.warning('Running %s threads per worker but DB_POOL_SIZE was sized for GUNICORN_THREADS=%s; '
+                           'set GUNICORN_THREADS instead of --threads', server.cfg.threads, threads)
+
+
+def post_fork(server, worker):
+    from app import app
+
+    dispose_engines(app)
+    size_for_threads(app, server.cfg.threads)
+    server.log.debug('Worker %s: database engines disposed after fork', worker.pid)
+
+
+def worker_exit(server, worker):
+    # Closing pooled connections lets SQLite run PRAGMA optimize (see engine_profiles.py)
+    from app import app
+
+    for engine in app_engines(app):
+        engine.dispose()
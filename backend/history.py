@@ -0,0 +1,123 @@
+"""Append-only history of ITHC software versions.
+
+Every ORM flush that adds, changes or removes ITHC rows appends their new state
+to ``ithc_history`` in one multi-row INSERT, in the same transaction, so the
+API handlers and the Excel importer are covered without extra code. Core
+statements that bypass the ORM call :func:`record_bulk` themselves, as they do
+``changes.log_bulk``. Archiving (archive.py) moves rows without changing what
+is deployed and writes no history.
+
+A history row is keyed by (project, project version, software) and holds the
+version in effect from ``valid_from`` until the next row for the same key;
+``current_software_version`` is ``None`` once the entry is removed.
+:func:`snapshot` answers "what was deployed in this project version at time T"
+with one query over the ``ix_ithc_history_as_of`` index.
+"""
+from datetime import datetime
+
+from sqlalchemy import and_, event, exists, func, insert, inspect, literal, null, select
+
+from models.session import RoutingSession
+from models.software import db, Software, ITHCSoftware, ITHCSoftwareArchive, ITHCHistory
+
+KEY = ('project_id', 'project_version', 'software_id')
+TRACKED = KEY + ('current_software_version',)
+
+
+def _row(ithc_id, key, version, valid_from):
+    project_id, project_version, software_id = key
+    return {'ithc_id': ithc_id, 'project_id': project_id, 'project_version': project_version,
+            'software_id': software_id, 'current_software_version': version, 'valid_from': valid_from}
+
+
+def _previous(obj, attr):
+    history = inspect(obj).attrs[attr].history
+    return history.deleted[0] if history.deleted else getattr(obj, attr)
+
+
+def _changed_rows(obj, now):
+    """History rows for an updated ITHC entry: nothing, a new version, or a move."""
+    if not any(inspect(obj).attrs[attr].history.has_changes() for attr in TRACKED):
+        return []
+    old_key = tuple(_previous(obj, attr) for attr in KEY)
+    new_key = tuple(getattr(obj, attr) for attr in KEY)
+    rows = [] if old_key == new_key else [_row(obj.id, old_key, None, now)]
+    if old_key != new_key or _previous(obj, 'current_software_version') != obj.current_software_version:
+        rows.append(_row(obj.id, new_key, obj.current_software_version, now))
+    return rows
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def record_flush(session, flush_context):
+    now = datetime.utcnow()
+    rows = []
+    for obj in session.new:
+        if isinstance(obj, ITHCSoftware):
+            rows.append(_row(obj.id, tuple(getattr(obj, attr) for attr in KEY), obj.current_software_version, now))
+    for obj in session.dirty:
+        if isinstance(obj, ITHCSoftware):
+            rows.extend(_changed_rows(obj, now))
+    for obj in session.deleted:
+        if isinstance(obj, ITHCSoftware):
+            rows.append(_row(obj.id, tuple(_previous(obj, attr) for attr in KEY), None, now))
+    if rows:
+        session.connection().execute(insert(ITHCHistory), rows)
+
+
+def record_bulk(*where, removed=False, valid_from=None):
+    """Append the current state of the ITHC rows matching ``where`` in one INSERT ... SELECT.
+
+    Call after a bulk insert or update, and with ``removed=True`` before a bulk
+    delete. Returns the number of rows recorded.
+    """
+    version = null() if removed else ITHCSoftware.current_software_version
+    stamp = valid_from if valid_from is not None else literal(datetime.utcnow(), db.DateTime)
+    rows = select(ITHCSoftware.id, ITHCSoftware.project_id, ITHCSoftware.project_version,
+                  ITHCSoftware.software_id, version, stamp).where(*where)
+    return db.session.execute(insert(ITHCHistory).from_select(
+        ['ithc_id', 'project_id', 'project_version', 'software_id', 'current_software_version', 'valid_from'],
+        rows)).rowcount
+
+
+def snapshot(project_id, project_version, as_of):
+    """Software deployed in a project version at ``as_of``, ordered by software name."""
+    ranked = (
+        select(ITHCHistory.ithc_id, ITHCHistory.software_id, ITHCHistory.current_software_version,
+               ITHCHistory.valid_from,
+               func.row_number().over(partition_by=ITHCHistory.software_id,
+                                      order_by=(ITHCHistory.valid_from.desc(), ITHCHistory.id.desc()))
+               .label('rank'))
+        .where(ITHCHistory.project_id == project_id, ITHCHistory.project_version == project_version,
+               ITHCHistory.valid_from <= as_of)
+        .subquery()
+    )
+    rows = db.session.execute(
+        select(ranked.c.ithc_id, ranked.c.software_id, Software.name, ranked.c.current_software_version,
+               ranked.c.valid_from)
+        .outerjoin(Software, ranked.c.software_id == Software.id)
+        .where(ranked.c.rank == 1, ranked.c.current_software_version.is_not(None))
+        .order_by(Software.name, ranked.c.software_id)
+    ).all()
+    return [{'ithc_id': row[0], 'software_id': row[1], 'software_name': row[2],
+             'current_software_version': row[3], 'since': row[4]} for row in rows]
+
+
+def backfill():
+    """Record ITHC rows (live and archived) that have no history yet.
+
+    Their state is dated from ``updated_at`` (or ``created_at``) since nothing
+    earlier is known. Returns the number of rows recorded.
+    """
+    recorded = 0
+    for model in (ITHCSoftware, ITHCSoftwareArchive):
+        missing = ~exists().where(and_(ITHCHistory.project_id == model.project_id,
+                                       ITHCHistory.project_version == model.project_version,
+                                       ITHCHistory.software_id == model.software_id))
+        rows = select(model.id, model.project_id, model.project_version, model.software_id,
+                      model.current_software_version,
+                      func.coalesce(model.updated_at, model.created_at, literal(datetime.utcnow(), db.DateTime))
+                      ).where(missing)
+        recorded += db.session.execute(insert(ITHCHistory).from_select(
+            ['ithc_id', 'project_id', 'project_version', 'software_id', 'current_software_version', 'valid_from'],
+            rows)).rowcount
+    return recorded
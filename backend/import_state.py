@@ -0,0 +1,135 @@
+"""Content hashes that let a re-imported workbook skip work already done.
+
+A workbook's SHA-256 is stored once it has been imported, and each row's
+normalized content hash is stored under a hash of its key (the name, or
+project/version/software for ITHC rows). Uploading the same file again is a
+no-op, and rows whose content matches the stored hash are skipped, so a
+re-import only writes the rows that changed.
+
+A stored hash only stands for the database state while the entity it
+produced is unchanged. Each hash records the change log token (changes.py) at
+the time of the import; when the entity has a change log entry after that
+token (an API edit, a delete), or the log has been pruned past it, the row is
+imported again. The same applies to whole files and to the change log entries
+of the file's entity type.
+"""
+import hashlib
+import json
+
+from sqlalchemy import delete, func, insert, select
+
+from changes import latest_token, log_covers, pruned_through
+from models.software import db, ChangeLog, ImportFile, ImportRowHash
+
+# Entity name in the change log for each import kind
+ENTITIES = {'software': 'software', 'project': 'project', 'customer': 'customer', 'ithc': 'ithc'}
+# Entities whose changes invalidate a whole file: its own and those its rows
+# name, since a new project or software can resolve rows skipped before
+FILE_ENTITIES = {
+    'software': ('software',),
+    'project': ('project', 'software'),
+    'customer': ('customer',),
+    'ithc': ('ithc', 'project', 'software'),
+    'workbook': tuple(ENTITIES.values()),
+}
+
+
+def file_digest(stream, chunk_size=1 << 20):
+    """SHA-256 of an uploaded file; the stream is rewound afterwards."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def _normalize(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def content_hash(values):
+    """Hash of a row's values; empty cells, surrounding spaces and 1 vs 1.0 do not matter."""
+    return hashlib.sha256(json.dumps([_normalize(v) for v in values]).encode()).hexdigest()
+
+
+def previous_import(kind, digest):
+    """Row count of this exact file's earlier import, or None.
+
+    None too when anything of the file's kind has changed since, in which case
+    the rows are checked one by one.
+    """
+    previous = db.session.execute(
+        select(ImportFile.rows, ImportFile.change_token)
+        .where(ImportFile.kind == kind, ImportFile.sha256 == digest)
+    ).first()
+    if previous is None or not log_covers(previous[1]):
+        return None
+    changed = db.session.execute(
+        select(ChangeLog.id).where(ChangeLog.entity.in_(FILE_ENTITIES[kind]), ChangeLog.id > previous[1]).limit(1)
+    ).first()
+    return None if changed else previous[0]
+
+
+def record_file(kind, digest, filename, rows):
+    db.session.execute(delete(ImportFile).where(ImportFile.kind == kind, ImportFile.sha256 == digest))
+    db.session.add(ImportFile(kind=kind, sha256=digest, filename=filename, rows=rows,
+                              change_token=latest_token()))
+
+
+class RowHashes:
+    """Stored row hashes for one import kind, loaded in one query.
+
+    ``unchanged(key, values)`` tells the importer to skip a row;
+    ``record(key, values, entity_id)`` notes a row it wrote, and ``save()``
+    stores the new hashes in one batch at the end of the import.
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        rows = db.session.execute(
+            select(ImportRowHash.key_hash, ImportRowHash.row_hash, ImportRowHash.entity_id,
+                   ImportRowHash.change_token).where(ImportRowHash.kind == kind)
+        ).all()
+        oldest_token = min((row[3] for row in rows), default=None)
+        changed = {}
+        if oldest_token is not None:
+            # Latest change per entity since the oldest stored hash, in one grouped query
+            changed = dict(db.session.execute(
+                select(ChangeLog.entity_id, func.max(ChangeLog.id))
+                .where(ChangeLog.entity == ENTITIES[kind], ChangeLog.id > oldest_token)
+                .group_by(ChangeLog.entity_id)
+            ).all())
+        watermark = pruned_through()
+        self.stored = {}
+        for key_hash, row_hash, entity_id, token in rows:
+            if log_covers(token, watermark) and changed.get(entity_id, 0) <= token:
+                self.stored[key_hash] = row_hash
+        self.pending = {}
+
+    @staticmethod
+    def key_hash(key):
+        return content_hash(key if isinstance(key, (list, tuple)) else [key])
+
+    def unchanged(self, key, values):
+        return self.stored.get(self.key_hash(key)) == content_hash(values)
+
+    def record(self, key, values, entity_id):
+        self.pending[self.key_hash(key)] = (content_hash(values), entity_id)
+
+    def save(self):
+        """Store the recorded hashes; the caller commits."""
+        if not self.pending:
+            return
+        token = latest_token()
+        keys = list(self.pending)
+        for start in range(0, len(keys), 500):
+            db.session.execute(delete(ImportRowHash).where(
+                ImportRowHash.kind == self.kind, ImportRowHash.key_hash.in_(keys[start:start + 500])))
+        db.session.execute(insert(ImportRowHash), [
+            {'kind': self.kind, 'key_hash': key, 'row_hash': row_hash, 'entity_id': entity_id, 'change_token': token}
+            for key, (row_hash, entity_id) in self.pending.items()])
+        self.pending = {}
@@ -0,0 +1,161 @@
+"""Dry-run validation of import workbooks (``?dry_run=1`` on the import endpoints).
+
+The sheet is loaded column-wise with pandas and every check runs as a
+vectorized operation over whole columns against key sets preloaded with one
+query each, so a large workbook is validated in a single pass without writing
+anything. The column aliases and the insert/update rules mirror the import
+endpoints in app.py.
+"""
+from sqlalchemy import select
+
+from models.software import db, Software, Project, Customer, ITHCSoftware
+
+# Versions such as 1.2.3, v2.0, 2.0rc1 or 1.0.0-beta.2; at most 50 characters
+VERSION_PATTERN = r'^[vV]?\d+[0-9A-Za-z]*(?:[._+-][0-9A-Za-z]+)*$'
+VERSION_MAX_LENGTH = 50
+
+# kind: field -> header aliases in the order the importer tries them, required
+# fields, the fields identifying a row, version fields and name references
+SPECS = {
+    'software': {
+        'fields': {'name': ('name', 'Software'), 'software_type': ('software_type', 'Type'),
+                   'latest_version': ('latest_version', 'Latest Version'), 'check_url': ('check_url', 'URL')},
+        'required': ('name', 'software_type', 'latest_version'),
+        'key': ('name',),
+        'versions': ('latest_version',),
+        'references': {},
+    },
+    'project': {
+        'fields': {'name': ('Name',), 'description': ('Description',), 'software_name': ('Software Name',),
+                   'software_version': ('Software Version',)},
+        'required': ('name',),
+        'key': ('name',),
+        'versions': ('software_version',),
+        'references': {'software_name': 'software'},
+    },
+    'customer': {
+        'fields': {'name': ('Name', 'Customer Name', 'name'), 'email': ('Email', 'email'),
+                   'contact_person': ('Contact Person', 'contact_person')},
+        'required': ('name',),
+        'key': ('name',),
+        'versions': (),
+        'references': {},
+    },
+    'ithc': {
+        'fields': {'project_name': ('Project Name',), 'project_version': ('Project Version',),
+                   'software_name': ('Software Name',), 'current_version': ('Current Version',)},
+        'required': ('project_name', 'project_version', 'software_name', 'current_version'),
+        'key': ('project_name', 'project_version', 'software_name'),
+        'versions': ('project_version', 'current_version'),
+        'references': {'project_name': 'project', 'software_name': 'software'},
+    },
+}
+
+NAME_COLUMNS = {'software': Software.name, 'project': Project.name, 'customer': Customer.name}
+
+
+def read_sheet(source):
+    """The active sheet of an xlsx file as a DataFrame of stripped strings (NA when empty)."""
+    import pandas as pd
+    frame = pd.read_excel(source, dtype=str, engine='openpyxl')
+    frame.columns = [str(c).strip() for c in frame.columns]
+    return frame.apply(lambda column: column.str.strip()).replace('', pd.NA)
+
+
+def _names(kind):
+    return set(db.session.execute(select(NAME_COLUMNS[kind])).scalars())
+
+
+def _existing_ithc(project_names):
+    rows = db.session.execute(
+        select(Project.name, ITHCSoftware.project_version, Software.name)
+        .join(Project, ITHCSoftware.project_id == Project.id)
+        .join(Software, ITHCSoftware.software_id == Software.id)
+        .where(Project.name.in_(project_names))
+    )
+    return set(map(tuple, rows))
+
+
+def validate(kind, frame, max_errors=1000):
+    """Validate a workbook for the ``kind`` importer; returns a JSON-ready report.
+
+    Row numbers are spreadsheet rows (the header is row 1). Rows with errors
+    would be skipped or imported incompletely; ``insert`` and ``update`` count
+    what the import would do with the remaining rows.
+    """
+    import pandas as pd
+    spec = SPECS[kind]
+    report = {'dry_run': True, 'kind': kind, 'rows': len(frame), 'valid': 0, 'insert': 0, 'update': 0,
+              'missing_columns': [], 'error_count': 0, 'errors': []}
+
+    # Each field takes the first non-empty value among its aliases, as the importer does
+    values = {}
+    for field, aliases in spec['fields'].items():
+        present = [a for a in aliases if a in frame.columns]
+        if present:
+            values[field] = frame[present].bfill(axis=1).iloc[:, 0]
+        elif field in spec['required']:
+            report['missing_columns'].append(aliases[0])
+        else:
+            values[field] = pd.Series(pd.NA, index=frame.index, dtype=object)
+    if report['missing_columns']:
+        report['error_count'] = 1
+        report['errors'] = [{'row': 1, 'column': None,
+                             'message': f"Missing required columns: {', '.join(report['missing_columns'])}"}]
+        return report
+    data = pd.DataFrame(values, index=frame.index)
+    errors = []
+
+    def flag(mask, field, message):
+        if mask.any():
+            errors.append(pd.DataFrame({'index': data.index[mask], 'column': spec['fields'][field][0],
+                                        'message': message[mask] if isinstance(message, pd.Series) else message}))
+
+    for field in spec['required']:
+        flag(data[field].isna(), field, 'Required value is missing')
+
+    for field in spec['versions']:
+        present = data[field].notna()
+        valid = data[field].str.fullmatch(VERSION_PATTERN, na=False) & (data[field].str.len() <= VERSION_MAX_LENGTH)
+        flag(present & ~valid, field, 'Invalid version format')
+
+    key = list(spec['key'])
+    complete = data[key].notna().all(axis=1)
+    duplicated = complete & data.duplicated(key, keep='first')
+    if duplicated.any():
+        first_row = data.index.to_series().groupby([data[k] for k in key], dropna=False).transform('min') + 2
+        flag(duplicated, key[-1], 'Duplicate of row ' + first_row.astype(str))
+
+    known = {kind_: _names(kind_) for kind_ in set(spec['references'].values())}
+    for field, target in spec['references'].items():
+        unknown = data[field].notna() & ~data[field].isin(known[target])
+        flag(unknown, field, f'Unknown {target} ' + data[field].fillna('').map(repr))
+
+    existing = pd.Series(False, index=data.index)
+    if kind == 'ithc':
+        pairs = _existing_ithc(set(data['project_name'].dropna()))
+        if pairs:
+            existing = complete & pd.MultiIndex.from_frame(data[key].fillna('')).isin(pairs)
+    else:
+        existing = data['name'].isin(_names(kind))
+    if kind == 'software':
+        # The software importer skips names that already exist
+        flag(existing, 'name', 'Software already exists')
+
+    if errors:
+        found = pd.concat(errors, ignore_index=True).sort_values('index', kind='stable')
+        invalid = data.index.isin(found['index'])
+        report['error_count'] = len(found)
+        report['errors'] = [{'row': int(index) + 2, 'column': column, 'message': message}
+                            for index, column, message in found.head(max_errors).itertuples(index=False)]
+    else:
+        invalid = pd.Series(False, index=data.index).to_numpy()
+    ok = ~invalid
+    report['valid'] = int(ok.sum())
+    report['update'] = int((existing.to_numpy() & ok).sum())
+    report['insert'] = report['valid'] - report['update']
+    return report
+
+
+def validate_upload(kind, source, max_errors=1000):
+    return validate(kind, read_sheet(source), max_errors)
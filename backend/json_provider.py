@@ -0,0 +1,106 @@
+"""JSON provider for API responses.
+
+Uses orjson when it is installed and the standard library otherwise. Both emit
+datetimes as ISO 8601 strings (Flask's default provider uses HTTP dates), so
+the models and ``queries.py`` hand over raw values and leave formatting to the
+provider. ``JSON_PROVIDER`` selects ``'auto'`` (default), ``'orjson'`` or
+``'stdlib'``.
+"""
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, time
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy.engine import Row
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def default(o):
+    """Serialize the types neither encoder handles on its own."""
+    if isinstance(o, (date, time)):
+        return o.isoformat()
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    if isinstance(o, uuid.UUID):
+        return str(o)
+    if isinstance(o, Row):
+        # A JSON array, as the stdlib encoder writes any other tuple
+        return list(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's provider with ISO 8601 dates and SQLAlchemy rows."""
+
+    default = staticmethod(default)
+
+    def dumps(self, obj, **kwargs):
+        kwargs.setdefault('default', self.default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+
+class OrjsonProvider(StdlibJSONProvider):
+    """Serializes with orjson and writes the encoded bytes straight to the response.
+
+    Calls with stdlib keyword arguments, and values orjson refuses (integers
+    beyond 64 bits), go through the stdlib provider.
+    """
+
+    def _options(self, indent=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _encode(self, obj, indent=False):
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._options(indent))
+        except orjson.JSONEncodeError:
+            return None
+
+    def dumps(self, obj, **kwargs):
+        if not kwargs:
+            data = self._encode(obj)
+            if data is not None:
+                return data.decode()
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = not self.compact if self.compact is not None else self._app.debug
+        data = self._encode(obj, indent)
+        if data is None:
+            return super().response(obj)
+        if indent:
+            data += b'\n'
+        return self._app.response_class(data, mimetype=self.mimetype)
+
+
+def create_json_provider(app):
+    choice = app.config.get('JSON_PROVIDER', 'auto')
+    if choice == 'orjson' and orjson is None:
+        raise RuntimeError("JSON_PROVIDER is 'orjson' but orjson is not installed")
+    if choice != 'stdlib' and orjson is not None:
+        return OrjsonProvider(app)
+    return StdlibJSONProvider(app)
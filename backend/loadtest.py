@@ -0,0 +1,295 @@
+"""Concurrent load-replay harness.
+
+Boots the app under gunicorn (or targets an already running server with --url),
+replays a weighted mix of reads, searches, ITHC edits and imports from many
+concurrent clients, and reports throughput, tail latency and error rates per
+endpoint.
+
+    python loadtest.py --workers 4 --clients 32 --duration 60 \
+        --mix read=60,search=20,ithc_edit=15,import=5
+"""
+import argparse
+import io
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import requests
+from openpyxl import Workbook
+
+DEFAULT_MIX = 'read=60,search=20,ithc_edit=15,import=5'
+SCENARIOS = ('read', 'search', 'ithc_edit', 'import')
+LOCK_MARKERS = ('database is locked', 'lock wait timeout', 'deadlock', 'queuepool limit')
+
+
+def parse_mix(text):
+    """Parse ``name=weight,...`` into a dict of scenario weights."""
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(','))):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f'Unknown scenario: {name}')
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError('Traffic mix must have at least one positive weight')
+    return mix
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank percentile
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Stats:
+    """Thread-safe per-endpoint latency and outcome collector."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock_timeouts = defaultdict(int)
+        self.rejections = defaultdict(int)
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, endpoint, elapsed, ok, lock_timeout=False, rejected=False):
+        with self.lock:
+            self.latencies[endpoint].append(elapsed)
+            if not ok:
+                self.errors[endpoint] += 1
+            if lock_timeout:
+                self.lock_timeouts[endpoint] += 1
+            if rejected:
+                self.rejections[endpoint] += 1
+
+    def summary(self):
+        wall = (self.finished or time.perf_counter()) - self.started
+        report = {}
+        with self.lock:
+            for endpoint, values in sorted(self.latencies.items()):
+                values = sorted(values)
+                count = len(values)
+                report[endpoint] = {
+                    'requests': count,
+                    'throughput_rps': round(count / wall, 2) if wall else 0.0,
+                    'p50_ms': round(percentile(values, 50) * 1000, 2),
+                    'p95_ms': round(percentile(values, 95) * 1000, 2),
+                    'p99_ms': round(percentile(values, 99) * 1000, 2),
+                    'max_ms': round(values[-1] * 1000, 2),
+                    'error_rate': round(self.errors[endpoint] / count, 4),
+                    'lock_timeout_rate': round(self.lock_timeouts[endpoint] / count, 4),
+                    # 429s from admission control (admission.py); also counted as errors
+                    'rejected_rate': round(self.rejections[endpoint] / count, 4),
+                }
+        return {'duration_s': round(wall, 2), 'endpoints': report}
+
+
+class Workload:
+    """Ids and names discovered from the target, used to build realistic requests."""
+
+    def __init__(self, base_url, import_rows=200):
+        self.base_url = base_url.rstrip('/')
+        self.import_rows = import_rows
+        self.software = []
+        self.targets = []
+        self.ithc = []
+
+    def discover(self):
+        software = requests.get(f'{self.base_url}/api/software', timeout=60).json()
+        ithc = requests.get(f'{self.base_url}/api/ithc/software', timeout=120).json()
+        self.software = [(s['id'], s['name']) for s in software]
+        self.ithc = [(i['id'], i['project']['name'] if i.get('project') else None,
+                      i['project_version'], i['software']['name'] if i.get('software') else None)
+                     for i in ithc]
+        self.targets = sorted({(i['project_id'], i['project_version']) for i in ithc})
+        return self
+
+    def import_workbook(self, rng):
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet('ITHC Import')
+        ws.append(['Project Name', 'Project Version', 'Software Name', 'Current Version'])
+        rows = rng.sample(self.ithc, min(self.import_rows, len(self.ithc))) if self.ithc else []
+        for _, project_name, project_version, software_name in rows:
+            ws.append([project_name, project_version, software_name,
+                       f'{rng.randint(0, 9)}.{rng.randint(0, 9)}.{rng.randint(0, 99)}'])
+        output = io.BytesIO()
+        wb.save(output)
+        return output.getvalue()
+
+    def request(self, scenario, rng):
+        """Return (endpoint label, method, url, request kwargs) for one scenario."""
+        url = self.base_url
+        if scenario == 'read':
+            choice = rng.randrange(4)
+            if choice == 0 or not self.targets:
+                return 'GET /api/software', 'GET', f'{url}/api/software', {}
+            if choice == 1:
+                return 'GET /api/projects', 'GET', f'{url}/api/projects', {}
+            if choice == 2:
+                return 'GET /api/customers', 'GET', f'{url}/api/customers', {}
+            project_id, version = rng.choice(self.targets)
+            return ('GET /api/ithc/software', 'GET', f'{url}/api/ithc/software',
+                    {'params': {'project_id': project_id, 'project_version': version}})
+        if scenario == 'search':
+            term = rng.choice(self.software)[1].split()[0] if self.software else ''
+            if rng.random() < 0.5:
+                return 'GET /api/software/search', 'GET', f'{url}/api/software/search', {'params': {'q': term}}
+            return ('GET /api/ithc/software/search', 'GET', f'{url}/api/ithc/software/search',
+                    {'params': {'software': term}})
+        if scenario == 'ithc_edit':
+            if not self.ithc:
+                return 'GET /api/ithc/software', 'GET', f'{url}/api/ithc/software', {}
+            ithc_id = rng.choice(self.ithc)[0]
+            version = f'{rng.randint(0, 9)}.{rng.randint(0, 9)}.{rng.randint(0, 99)}'
+            return ('PUT /api/ithc/software/<id>', 'PUT', f'{url}/api/ithc/software/{ithc_id}',
+                    {'json': {'current_software_version': version}})
+        if scenario == 'import':
+            return ('POST /api/ithc/software/import', 'POST', f'{url}/api/ithc/software/import',
+                    {'files': {'file': (f'load-{rng.randrange(10 ** 9)}.xlsx', self.import_workbook(rng))}})
+        raise ValueError(f'Unknown scenario: {scenario}')
+
+
+def is_lock_timeout(response):
+    if response is None or response.status_code < 500:
+        return False
+    body = response.text.lower()
+    return any(marker in body for marker in LOCK_MARKERS)
+
+
+def run_load(base_url, mix, clients=16, duration=30.0, requests_per_client=None,
+             seed=0, timeout=60.0, import_rows=200, workload=None):
+    """Replay the traffic mix from ``clients`` threads and return a Stats summary."""
+    workload = workload or Workload(base_url, import_rows).discover()
+    scenarios = list(mix)
+    weights = [mix[s] for s in scenarios]
+    stats = Stats()
+    deadline = time.perf_counter() + duration
+
+    def client(number):
+        rng = random.Random(seed * 1000 + number)
+        session = requests.Session()
+        sent = 0
+        while True:
+            if requests_per_client is not None and sent >= requests_per_client:
+                break
+            if requests_per_client is None and time.perf_counter() >= deadline:
+                break
+            scenario = rng.choices(scenarios, weights)[0]
+            endpoint, method, url, kwargs = workload.request(scenario, rng)
+            start = time.perf_counter()
+            response = None
+            try:
+                response = session.request(method, url, timeout=timeout, **kwargs)
+                ok = response.status_code < 400
+            except requests.RequestException:
+                ok = False
+            stats.record(endpoint, time.perf_counter() - start, ok, is_lock_timeout(response),
+                         response is not None and response.status_code == 429)
+            sent += 1
+        session.close()
+
+    threads = [threading.Thread(target=client, args=(n,), daemon=True) for n in range(clients)]
+    stats.started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats.finished = time.perf_counter()
+    return stats.summary()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(port, workers=4, worker_class='sync', threads=1, extra_args=(), env=None,
+                   config_file='gunicorn.conf.py'):
+    """Boot ``app:app`` under gunicorn from the backend directory and wait until it answers."""
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    cmd = [sys.executable, '-m', 'gunicorn', '--chdir', backend_dir,
+           '-c', os.path.join(backend_dir, config_file),
+           '-b', f'127.0.0.1:{port}', *extra_args, 'app:app']
+    # Through the environment, so gunicorn.conf.py sizes the pool and stream cap from them
+    sizing = {'GUNICORN_WORKERS': str(workers), 'GUNICORN_WORKER_CLASS': worker_class,
+              'GUNICORN_THREADS': str(threads)}
+    process = subprocess.Popen(cmd, env={**os.environ, **sizing, **(env or {})})
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with status {process.returncode}')
+        try:
+            requests.get(f'http://127.0.0.1:{port}/api/customers', timeout=2)
+            return process
+        except requests.RequestException:
+            time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError('gunicorn did not start within 60 seconds')
+
+
+def format_report(summary):
+    lines = [f"Duration: {summary['duration_s']}s",
+             f"{'endpoint':<34}{'reqs':>7}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'err%':>7}{'lock%':>7}{'429%':>7}"]
+    for endpoint, row in summary['endpoints'].items():
+        lines.append(f"{endpoint:<34}{row['requests']:>7}{row['throughput_rps']:>9}"
+                     f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}{row['max_ms']:>9}"
+                     f"{row['error_rate'] * 100:>7.2f}{row['lock_timeout_rate'] * 100:>7.2f}"
+                     f"{row['rejected_rate'] * 100:>7.2f}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='Target an already running server instead of booting gunicorn')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--worker-class', default='sync')
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--config', default='gunicorn.conf.py', help='Gunicorn config file in backend/')
+    parser.add_argument('--gunicorn-arg', action='append', default=[], help='Extra gunicorn argument')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run')
+    parser.add_argument('--requests', type=int, help='Requests per client (overrides --duration)')
+    parser.add_argument('--mix', default=DEFAULT_MIX)
+    parser.add_argument('--import-rows', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', dest='json_path', help='Also write the report as JSON')
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    process = None
+    base_url = args.url
+    if not base_url:
+        port = free_port()
+        process = start_gunicorn(port, args.workers, args.worker_class, args.threads, args.gunicorn_arg,
+                                 config_file=args.config)
+        base_url = f'http://127.0.0.1:{port}'
+    try:
+        summary = run_load(base_url, mix, args.clients, args.duration, args.requests,
+                           args.seed, import_rows=args.import_rows)
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+
+    summary['config'] = {'workers': args.workers, 'worker_class': args.worker_class,
+                         'threads': args.threads, 'clients': args.clients, 'mix': mix}
+    print(format_report(summary))
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
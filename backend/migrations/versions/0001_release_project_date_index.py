@@ -0,0 +1,34 @@
+"""Index releases by project and release date
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 09:00:00.000000
+
+Tables are created by ``flask init-db`` (db.create_all), which already builds
+this index on a new database, so the migration only adds it where missing.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+INDEX = 'ix_release_project_id_release_date'
+
+
+def _has_index():
+    return INDEX in {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('release')}
+
+
+def upgrade():
+    if not _has_index():
+        op.create_index(INDEX, 'release', ['project_id', 'release_date'])
+
+
+def downgrade():
+    if _has_index():
+        op.drop_index(INDEX, table_name='release')
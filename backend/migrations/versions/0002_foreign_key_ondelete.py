@@ -0,0 +1,81 @@
+"""Add ON DELETE actions to foreign keys
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 11:00:00.000000
+
+Child rows (releases, ITHC rows, customer links) are removed with their
+project, ITHC rows with their software, and a project's software reference is
+cleared when the software is deleted. Orphans left behind by earlier deletes
+are cleaned up first so the rebuilt constraints hold. Tables whose foreign keys
+already carry the right action are left alone.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# table: [(column, referred table, ON DELETE action)]
+FOREIGN_KEYS = {
+    'project': [('software_id', 'software', 'SET NULL')],
+    'release': [('project_id', 'project', 'CASCADE')],
+    'ithc_software': [('project_id', 'project', 'CASCADE'), ('software_id', 'software', 'CASCADE')],
+    'project_customer': [('project_id', 'project', 'CASCADE'), ('customer_id', 'customer', 'CASCADE')],
+}
+# Names SQLite's unnamed foreign keys so batch mode can drop them
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+software = sa.table('software', sa.column('id'))
+customer = sa.table('customer', sa.column('id'))
+project = sa.table('project', sa.column('id'), sa.column('software_id'))
+release = sa.table('release', sa.column('project_id'))
+ithc_software = sa.table('ithc_software', sa.column('project_id'), sa.column('software_id'))
+project_customer = sa.table('project_customer', sa.column('project_id'), sa.column('customer_id'))
+
+
+def _orphans():
+    project_ids, software_ids = sa.select(project.c.id), sa.select(software.c.id)
+    return [
+        sa.delete(release).where(release.c.project_id.not_in(project_ids)),
+        sa.delete(ithc_software).where(sa.or_(ithc_software.c.project_id.not_in(project_ids),
+                                              ithc_software.c.software_id.not_in(software_ids))),
+        sa.delete(project_customer).where(sa.or_(project_customer.c.project_id.not_in(project_ids),
+                                                 project_customer.c.customer_id.not_in(sa.select(customer.c.id)))),
+        sa.update(project).where(project.c.software_id.not_in(software_ids)).values(software_id=None),
+    ]
+
+
+def _set_ondelete(table, wanted):
+    """Recreate the foreign keys of ``table`` whose ON DELETE action differs from ``wanted``."""
+    existing = sa.inspect(op.get_bind()).get_foreign_keys(table)
+    stale = []
+    for column, referred, action in wanted:
+        current = next((fk for fk in existing if fk['constrained_columns'] == [column]), None)
+        current_action = (current or {}).get('options', {}).get('ondelete')
+        if current is None or (current_action or '').upper() != (action or ''):
+            stale.append((current, column, referred, action))
+    if not stale:
+        return
+    with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch:
+        for current, column, referred, action in stale:
+            name = f'fk_{table}_{column}_{referred}'
+            if current is not None:
+                batch.drop_constraint(current['name'] or name, type_='foreignkey')
+            batch.create_foreign_key(name, referred, [column], ['id'], ondelete=action)
+
+
+def upgrade():
+    for statement in _orphans():
+        op.execute(statement)
+    for table, wanted in FOREIGN_KEYS.items():
+        _set_ondelete(table, wanted)
+
+
+def downgrade():
+    for table, wanted in FOREIGN_KEYS.items():
+        _set_ondelete(table, [(column, referred, None) for column, referred, _ in wanted])
@@ -0,0 +1,76 @@
+"""Archive tables for retired project versions
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 13:00:00.000000
+
+Adds ``ithc_software_archive`` and ``release_archive`` (see archive.py) and
+indexes ``ithc_software`` by project and project version, the filter every
+ITHC listing and archive batch uses. As with 0001, ``flask init-db`` already
+creates all of these on a new database, so only missing pieces are added.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+ITHC_INDEX = 'ix_ithc_software_project_id_project_version'
+ARCHIVE_INDEX = 'ix_ithc_software_archive_project_id_project_version'
+
+
+def _tables():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def _indexes(table):
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    tables = _tables()
+    if 'ithc_software_archive' not in tables:
+        op.create_table(
+            'ithc_software_archive',
+            sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('project_id', sa.Integer(), nullable=False),
+            sa.Column('software_id', sa.Integer(), nullable=False),
+            sa.Column('project_version', sa.String(length=50), nullable=False),
+            sa.Column('current_software_version', sa.String(length=50), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.Column('archived_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['project_id'], ['project.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['software_id'], ['software.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index(ARCHIVE_INDEX, 'ithc_software_archive', ['project_id', 'project_version'])
+    if 'release_archive' not in tables:
+        op.create_table(
+            'release_archive',
+            sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('version', sa.String(length=50), nullable=False),
+            sa.Column('release_date', sa.DateTime(), nullable=True),
+            sa.Column('notes', sa.Text(), nullable=True),
+            sa.Column('project_id', sa.Integer(), nullable=False),
+            sa.Column('archived_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['project_id'], ['project.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    if ITHC_INDEX not in _indexes('ithc_software'):
+        op.create_index(ITHC_INDEX, 'ithc_software', ['project_id', 'project_version'])
+
+
+def downgrade():
+    # Archived rows are dropped with their tables; restore them first to keep them
+    if ITHC_INDEX in _indexes('ithc_software'):
+        op.drop_index(ITHC_INDEX, table_name='ithc_software')
+    tables = _tables()
+    if 'release_archive' in tables:
+        op.drop_table('release_archive')
+    if 'ithc_software_archive' in tables:
+        op.drop_table('ithc_software_archive')
@@ -0,0 +1,44 @@
+"""ITHC version history
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 14:00:00.000000
+
+Adds ``ithc_history`` (see history.py) where missing. Run ``flask
+backfill-ithc-history`` afterwards so entries that predate the table appear in
+snapshots.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'ithc_history' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'ithc_history',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('ithc_id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('project_version', sa.String(length=50), nullable=False),
+        sa.Column('software_id', sa.Integer(), nullable=False),
+        sa.Column('current_software_version', sa.String(length=50), nullable=True),
+        sa.Column('valid_from', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['project_id'], ['project.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True,
+    )
+    op.create_index('ix_ithc_history_as_of', 'ithc_history',
+                    ['project_id', 'project_version', 'software_id', 'valid_from'])
+
+
+def downgrade():
+    if 'ithc_history' in sa.inspect(op.get_bind()).get_table_names():
+        op.drop_table('ithc_history')
@@ -0,0 +1,53 @@
+"""Content hashes for incremental re-imports
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 16:00:00.000000
+
+Adds ``import_file`` and ``import_row_hash`` (see import_state.py) where
+missing. Existing data simply has no hashes yet; the next import of each
+workbook records them.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'import_file' not in tables:
+        op.create_table(
+            'import_file',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('kind', sa.String(length=20), nullable=False),
+            sa.Column('sha256', sa.String(length=64), nullable=False),
+            sa.Column('filename', sa.String(length=255), nullable=True),
+            sa.Column('rows', sa.Integer(), nullable=False),
+            sa.Column('change_token', sa.Integer(), nullable=False),
+            sa.Column('imported_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('kind', 'sha256', name='uq_import_file_kind_sha256'),
+        )
+    if 'import_row_hash' not in tables:
+        op.create_table(
+            'import_row_hash',
+            sa.Column('kind', sa.String(length=20), nullable=False),
+            sa.Column('key_hash', sa.String(length=64), nullable=False),
+            sa.Column('row_hash', sa.String(length=64), nullable=False),
+            sa.Column('entity_id', sa.Integer(), nullable=False),
+            sa.Column('change_token', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('kind', 'key_hash'),
+        )
+
+
+def downgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    for table in ('import_row_hash', 'import_file'):
+        if table in tables:
+            op.drop_table(table)
@@ -0,0 +1,76 @@
+"""Change log and prune watermark
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 18:00:00.000000
+
+Adds ``change_log`` (see changes.py), its ``project_id`` index and
+``change_log_prune`` where missing. The change log predates revision 0001 but
+was only ever created by ``flask init-db``, so it is added here rather than
+earlier in the chain, where databases already at 0005 would never run it.
+
+A log that was pruned before the watermark existed gets one: the id just below
+its oldest entry, or SQLite's last issued id when it is empty.
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+    if 'change_log' not in tables:
+        op.create_table(
+            'change_log',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('entity', sa.String(length=20), nullable=False),
+            sa.Column('entity_id', sa.Integer(), nullable=False),
+            sa.Column('op', sa.String(length=6), nullable=False),
+            sa.Column('project_id', sa.Integer(), nullable=True),
+            sa.Column('project_version', sa.String(length=50), nullable=True),
+            sa.Column('changed_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sqlite_autoincrement=True,
+        )
+    if 'ix_change_log_project_id' not in {index['name'] for index in sa.inspect(bind).get_indexes('change_log')}:
+        op.create_index('ix_change_log_project_id', 'change_log', ['project_id'])
+    if 'change_log_prune' in tables:
+        return
+    op.create_table(
+        'change_log_prune',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('pruned_through', sa.Integer(), nullable=False),
+        sa.Column('removed', sa.Integer(), nullable=False),
+        sa.Column('pruned_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    if 'change_log' not in tables:
+        return
+    oldest = bind.execute(sa.text('SELECT MIN(id) FROM change_log')).scalar()
+    if oldest is not None:
+        watermark = oldest - 1
+    elif bind.dialect.name == 'sqlite':
+        watermark = bind.execute(sa.text("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'")).scalar()
+    else:
+        watermark = None
+    if watermark:
+        op.bulk_insert(sa.table('change_log_prune', sa.column('pruned_through', sa.Integer()),
+                                sa.column('removed', sa.Integer()), sa.column('pruned_at', sa.DateTime())),
+                       [{'pruned_through': watermark, 'removed': 0, 'pruned_at': datetime.utcnow()}])
+
+
+def downgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    for table in ('change_log_prune', 'change_log'):
+        if table in tables:
+            op.drop_table(table)
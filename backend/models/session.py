@@ -0,0 +1,27 @@
+from flask import current_app
+from flask_sqlalchemy.session import Session
+
+
+class RoutingSession(Session):
+    """Session that sends reads to the read replica when the request allows it.
+
+    A request opts in by setting ``session.info['use_replica']`` (see replica.py).
+    Anything that writes - a flush or an INSERT/UPDATE/DELETE statement - goes to
+    the primary and pins the rest of the session there, so a request always reads
+    its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._can_use_replica(clause):
+            replica = current_app.extensions.get('read_replica')
+            if replica is not None:
+                return replica.engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _can_use_replica(self, clause):
+        if not self.info.get('use_replica') or self.info.get('pinned_primary'):
+            return False
+        if self._flushing or self.new or self.dirty or self.deleted or getattr(clause, 'is_dml', False):
+            self.info['pinned_primary'] = True
+            return False
+        return True
@@ -1,7 +1,8 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from models.session import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class Software(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -17,14 +18,14 @@ class Software(db.Model):
             'name': self.name,
             'software_type': self.software_type,
             'latest_version': self.latest_version,
-            'last_updated': self.last_updated.isoformat(),
+            'last_updated': self.last_updated,
             'check_url': self.check_url
         }
 
 # Association table for project-customer relationship
 project_customer = db.Table('project_customer',
-    db.Column('project_id', db.Integer, db.ForeignKey('project.id'), primary_key=True),
-    db.Column('customer_id', db.Integer, db.ForeignKey('customer.id'), primary_key=True)
+    db.Column('project_id', db.Integer, db.ForeignKey('project.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('customer_id', db.Integer, db.ForeignKey('customer.id', ondelete='CASCADE'), primary_key=True)
 )
 
 class Project(db.Model):
@@ -32,45 +33,68 @@ class Project(db.Model):
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    software_id = db.Column(db.Integer, db.ForeignKey('software.id'))
+    software_id = db.Column(db.Integer, db.ForeignKey('software.id', ondelete='SET NULL'))
     software_version = db.Column(db.String(50))
-    software = db.relationship('Software', backref='projects')
-    releases = db.relationship('Release', backref='project', lazy=True)
+    # Child rows go with their parent through ON DELETE (see bulk.py for the set-based deletes)
+    software = db.relationship('Software', backref=db.backref('projects', passive_deletes=True))
+    releases = db.relationship('Release', backref='project', lazy=True, passive_deletes=True)
     customers = db.relationship('Customer', secondary=project_customer, lazy='subquery',
-        backref=db.backref('projects', lazy=True))
+        passive_deletes=True, backref=db.backref('projects', lazy=True, passive_deletes=True))
     
     __table_args__ = (
         db.UniqueConstraint('name', 'software_version', name='unique_project_version'),
     )
 
-    def to_dict(self):
-        return {
+    def to_dict(self, releases=True):
+        """``releases=False`` leaves out the release summary and the query behind it."""
+        result = {
             'id': self.id,
             'name': self.name,
             'description': self.description,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'created_at': self.created_at,
             'software': self.software.to_dict() if self.software else None,
             'software_version': self.software_version,
-            'releases': [release.to_dict() for release in self.releases],
-            'customers': [customer.to_dict() for customer in self.customers]
         }
+        if releases:
+            # Count and most recent release in one query; the window count is taken before LIMIT
+            latest = db.session.execute(
+                db.select(Release.id, Release.version, Release.release_date, db.func.count().over())
+                .where(Release.project_id == self.id)
+                .order_by(Release.release_date.desc(), Release.id.desc()).limit(1)
+            ).first()
+            result['release_count'] = latest[3] if latest else 0
+            result['latest_release'] = {'id': latest[0], 'version': latest[1], 'release_date': latest[2]} \
+                if latest else None
+        result['customers'] = [customer.to_dict() for customer in self.customers]
+        return result
 
 class Release(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     version = db.Column(db.String(50), nullable=False)
     release_date = db.Column(db.DateTime, default=datetime.utcnow)
     notes = db.Column(db.Text)
-    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id', ondelete='CASCADE'), nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_release_project_id_release_date', 'project_id', 'release_date'),
+    )
     
     def to_dict(self):
         return {
             'id': self.id,
             'version': self.version,
-            'release_date': self.release_date.isoformat(),
+            'release_date': self.release_date,
             'notes': self.notes,
             'project_id': self.project_id
         }
 
+    def to_summary(self):
+        return {
+            'id': self.id,
+            'version': self.version,
+            'release_date': self.release_date
+        }
+
 class Customer(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -87,16 +111,20 @@ class Customer(db.Model):
 
 class ITHCSoftware(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
-    software_id = db.Column(db.Integer, db.ForeignKey('software.id'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id', ondelete='CASCADE'), nullable=False)
+    software_id = db.Column(db.Integer, db.ForeignKey('software.id', ondelete='CASCADE'), nullable=False)
     project_version = db.Column(db.String(50), nullable=False)
     current_software_version = db.Column(db.String(50), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_ithc_software_project_id_project_version', 'project_id', 'project_version'),
+    )
+    
     # Relationships
-    project = db.relationship('Project', backref='ithc_software')
-    software = db.relationship('Software', backref='ithc_instances')
+    project = db.relationship('Project', backref=db.backref('ithc_software', passive_deletes=True))
+    software = db.relationship('Software', backref=db.backref('ithc_instances', passive_deletes=True))
     
     def to_dict(self):
         return {
@@ -105,8 +133,126 @@ class ITHCSoftware(db.Model):
             'project_version': self.project_version,
             'software_id': self.software_id,
             'current_software_version': self.current_software_version,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'project': self.project.to_dict() if self.project else None,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+            'project': self.project.to_dict(releases=False) if self.project else None,
             'software': self.software.to_dict() if self.software else None
-        }
\ No newline at end of file
+        }
+
+
+class ITHCSoftwareArchive(db.Model):
+    """ITHC rows of retired project versions, moved out of ithc_software (see archive.py)."""
+    __tablename__ = 'ithc_software_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id', ondelete='CASCADE'), nullable=False)
+    software_id = db.Column(db.Integer, db.ForeignKey('software.id', ondelete='CASCADE'), nullable=False)
+    project_version = db.Column(db.String(50), nullable=False)
+    current_software_version = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_ithc_software_archive_project_id_project_version', 'project_id', 'project_version'),
+    )
+
+class ReleaseArchive(db.Model):
+    """Releases of retired project versions, moved out of release (see archive.py)."""
+    __tablename__ = 'release_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    version = db.Column(db.String(50), nullable=False)
+    release_date = db.Column(db.DateTime)
+    notes = db.Column(db.Text)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id', ondelete='CASCADE'), nullable=False)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+class ITHCHistory(db.Model):
+    """Append-only record of the software version deployed in each project version.
+
+    A row holds the ``current_software_version`` of one software in one project
+    version from ``valid_from`` on; ``None`` means the entry was removed. See
+    history.py.
+    """
+    __tablename__ = 'ithc_history'
+    __table_args__ = (
+        db.Index('ix_ithc_history_as_of', 'project_id', 'project_version', 'software_id', 'valid_from'),
+        {'sqlite_autoincrement': True},
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    ithc_id = db.Column(db.Integer, nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id', ondelete='CASCADE'), nullable=False)
+    project_version = db.Column(db.String(50), nullable=False)
+    # No foreign key: deleting software must not rewrite past snapshots
+    software_id = db.Column(db.Integer, nullable=False)
+    current_software_version = db.Column(db.String(50))
+    valid_from = db.Column(db.DateTime, nullable=False)
+
+class ImportFile(db.Model):
+    """A workbook already imported, by content hash (see import_state.py)."""
+    __tablename__ = 'import_file'
+    __table_args__ = (db.UniqueConstraint('kind', 'sha256', name='uq_import_file_kind_sha256'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    sha256 = db.Column(db.String(64), nullable=False)
+    filename = db.Column(db.String(255))
+    rows = db.Column(db.Integer, nullable=False, default=0)
+    # Latest change log id when the import finished
+    change_token = db.Column(db.Integer, nullable=False, default=0)
+    imported_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+class ImportRowHash(db.Model):
+    """Content hash of the last imported version of each workbook row, by row key."""
+    __tablename__ = 'import_row_hash'
+
+    kind = db.Column(db.String(20), primary_key=True)
+    key_hash = db.Column(db.String(64), primary_key=True)
+    row_hash = db.Column(db.String(64), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    change_token = db.Column(db.Integer, nullable=False, default=0)
+
+class ChangeLog(db.Model):
+    """One row per insert/update/delete of a tracked entity (see changes.py).
+
+    The id doubles as the sync token for ``/api/changes``; AUTOINCREMENT keeps
+    SQLite from reusing ids after old entries are pruned.
+    """
+    __tablename__ = 'change_log'
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(6), nullable=False)
+    # Scope for subscribers: set for projects, releases, ITHC rows and customer links
+    project_id = db.Column(db.Integer, index=True)
+    project_version = db.Column(db.String(50))
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'entity': self.entity,
+            'entity_id': self.entity_id,
+            'op': self.op,
+            'project_id': self.project_id,
+            'project_version': self.project_version,
+            'changed_at': self.changed_at
+        }
+
+
+class ChangeLogPrune(db.Model):
+    """One row per prune of ``change_log``; the highest ``pruned_through`` is the watermark.
+
+    Tokens at or below the watermark may have lost entries, even once the log
+    is empty, so they expire instead of replaying from the next retained id.
+    """
+    __tablename__ = 'change_log_prune'
+
+    id = db.Column(db.Integer, primary_key=True)
+    pruned_through = db.Column(db.Integer, nullable=False)
+    removed = db.Column(db.Integer, nullable=False)
+    pruned_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
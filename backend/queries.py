@@ -0,0 +1,310 @@
+"""Core-level read path for the collection endpoints.
+
+Selects only the columns the API returns and builds the response dicts straight
+from row tuples, skipping ORM instances and identity-map bookkeeping. The output
+matches the models' ``to_dict()``;
+datetimes are left for the JSON provider to format.
+"""
+import math
+import re
+
+from sqlalchemy import case, func, literal, select, union_all
+
+from models.software import db, Software, Project, Release, Customer, ITHCSoftware, ReleaseArchive, project_customer
+
+SOFTWARE_COLUMNS = (Software.id, Software.name, Software.software_type, Software.latest_version,
+                    Software.last_updated, Software.check_url)
+
+
+def _software_dict(row):
+    return {
+        'id': row[0],
+        'name': row[1],
+        'software_type': row[2],
+        'latest_version': row[3],
+        'last_updated': row[4],
+        'check_url': row[5],
+    }
+
+
+def software_dicts(*where):
+    rows = db.session.execute(select(*SOFTWARE_COLUMNS).where(*where)).all()
+    return [_software_dict(row) for row in rows]
+
+
+def customer_dicts(*where):
+    rows = db.session.execute(
+        select(Customer.id, Customer.name, Customer.email, Customer.contact_person).where(*where)
+    ).all()
+    return [{'id': r[0], 'name': r[1], 'email': r[2], 'contact_person': r[3]} for r in rows]
+
+
+def project_dicts(*where, releases=True):
+    """Projects with nested software, release summary and customers in three queries.
+
+    ``releases=False`` skips the release summary (see ``Project.to_dict``).
+    """
+    rows = db.session.execute(
+        select(Project.id, Project.name, Project.description, Project.created_at,
+               Project.software_version, *SOFTWARE_COLUMNS)
+        .outerjoin(Software, Project.software_id == Software.id)
+        .where(*where)
+    ).all()
+    if not rows:
+        return []
+
+    projects = {}
+    for row in rows:
+        projects[row[0]] = {
+            'id': row[0],
+            'name': row[1],
+            'description': row[2],
+            'created_at': row[3],
+            'software': _software_dict(row[5:]) if row[5] is not None else None,
+            'software_version': row[4],
+            **({'release_count': 0, 'latest_release': None} if releases else {}),
+            'customers': [],
+        }
+
+    project_ids = select(Project.id).where(*where) if where else None
+
+    # Count and most recent release per project in one pass over (project_id, release_date)
+    if releases:
+        ranked = select(
+            Release.project_id, Release.id, Release.version, Release.release_date,
+            func.count().over(partition_by=Release.project_id).label('release_count'),
+            func.row_number().over(partition_by=Release.project_id,
+                                   order_by=(Release.release_date.desc(), Release.id.desc())).label('rank'),
+        )
+        if project_ids is not None:
+            ranked = ranked.where(Release.project_id.in_(project_ids))
+        ranked = ranked.subquery()
+        latest = select(ranked.c.project_id, ranked.c.id, ranked.c.version, ranked.c.release_date,
+                        ranked.c.release_count).where(ranked.c.rank == 1)
+        for r in db.session.execute(latest):
+            project = projects[r[0]]
+            project['release_count'] = r[4]
+            project['latest_release'] = {'id': r[1], 'version': r[2], 'release_date': r[3]}
+
+    customer_query = (
+        select(project_customer.c.project_id, Customer.id, Customer.name, Customer.email, Customer.contact_person)
+        .join(Customer, Customer.id == project_customer.c.customer_id)
+    )
+    if project_ids is not None:
+        customer_query = customer_query.where(project_customer.c.project_id.in_(project_ids))
+    for c in db.session.execute(customer_query):
+        projects[c[0]]['customers'].append({'id': c[1], 'name': c[2], 'email': c[3], 'contact_person': c[4]})
+
+    return list(projects.values())
+
+
+def ithc_dicts(*where, model=ITHCSoftware):
+    """ITHC rows with nested software and project; each project is built once, without its release summary.
+
+    ``model`` is ``ITHCSoftware`` or ``ITHCSoftwareArchive``, which share columns.
+    """
+    rows = db.session.execute(
+        select(model.id, model.project_id, model.project_version,
+               model.software_id, model.current_software_version,
+               model.created_at, model.updated_at, *SOFTWARE_COLUMNS)
+        .outerjoin(Software, model.software_id == Software.id)
+        .where(*where)
+    ).all()
+    if not rows:
+        return []
+
+    project_filter = (Project.id.in_(select(model.project_id).where(*where)),) if where else ()
+    projects = {p['id']: p for p in project_dicts(*project_filter, releases=False)}
+    software = {}
+    result = []
+    for row in rows:
+        software_id = row[7]
+        if software_id is not None and software_id not in software:
+            software[software_id] = _software_dict(row[7:])
+        result.append({
+            'id': row[0],
+            'project_id': row[1],
+            'project_version': row[2],
+            'software_id': row[3],
+            'current_software_version': row[4],
+            'created_at': row[5],
+            'updated_at': row[6],
+            'project': projects.get(row[1]),
+            'software': software.get(software_id),
+        })
+    return result
+
+
+def ithc_bootstrap():
+    """Project and software choices for the ITHC page in two queries.
+
+    Each project lists its own software version first, then its distinct
+    release versions in release order.
+    """
+    projects = {}
+    rows = db.session.execute(
+        select(Project.id, Project.name, Project.software_version, Release.version)
+        .outerjoin(Release, Release.project_id == Project.id)
+        .order_by(Project.id, Release.id)
+    )
+    for project_id, name, software_version, version in rows:
+        project = projects.get(project_id)
+        if project is None:
+            project = projects[project_id] = {
+                'id': project_id,
+                'name': name,
+                'software_version': software_version,
+                'versions': [software_version] if software_version else [],
+            }
+        if version is not None and version not in project['versions']:
+            project['versions'].append(version)
+
+    software = db.session.execute(
+        select(Software.id, Software.name, Software.latest_version).order_by(Software.id)
+    )
+    return {
+        'projects': list(projects.values()),
+        'software': [{'id': s[0], 'name': s[1], 'latest_version': s[2]} for s in software],
+    }
+
+
+DIFF_STATUSES = ('added', 'removed', 'changed', 'unchanged')
+
+
+def ithc_diff(project_id, from_version, to_version, include_unchanged=False, batch_size=1000):
+    """Compare a project's software between two project versions.
+
+    Yields ``(software_id, software_name, from_version, to_version, status)``
+    ordered by software name. One grouped query pivots both versions onto a
+    row per software (a full outer join that SQLite and MySQL both run) and
+    rows are fetched ``batch_size`` at a time.
+    """
+    in_from = func.max(case((ITHCSoftware.project_version == from_version, ITHCSoftware.current_software_version)))
+    in_to = func.max(case((ITHCSoftware.project_version == to_version, ITHCSoftware.current_software_version)))
+    status = case((in_from.is_(None), 'added'), (in_to.is_(None), 'removed'),
+                  (in_from != in_to, 'changed'), else_='unchanged')
+    query = (
+        select(ITHCSoftware.software_id, Software.name, in_from, in_to, status)
+        .outerjoin(Software, ITHCSoftware.software_id == Software.id)
+        .where(ITHCSoftware.project_id == project_id,
+               ITHCSoftware.project_version.in_({from_version, to_version}))
+        .group_by(ITHCSoftware.software_id, Software.name)
+        .order_by(Software.name, ITHCSoftware.software_id)
+    )
+    if not include_unchanged:
+        query = query.having(status != 'unchanged')
+    yield from db.session.execute(query.execution_options(yield_per=batch_size))
+
+
+def ithc_matrix(*where):
+    """Deployed versions of every software across every project version.
+
+    Built from one ordered scan of ITHC rows joined to their project and
+    software. Returns columnar lists: ``columns`` (one per project version,
+    by project name then version order), ``rows`` (one per software, by name)
+    and ``values[row][column]``, ``None`` where the software is not deployed.
+    """
+    result = db.session.execute(
+        select(ITHCSoftware.software_id, Software.name, Software.software_type, Software.latest_version,
+               ITHCSoftware.project_id, Project.name, ITHCSoftware.project_version,
+               ITHCSoftware.current_software_version)
+        .join(Software, ITHCSoftware.software_id == Software.id)
+        .join(Project, ITHCSoftware.project_id == Project.id)
+        .where(*where)
+        .order_by(Software.name, ITHCSoftware.software_id)
+    )
+    rows = {'software_id': [], 'software_name': [], 'software_type': [], 'latest_version': []}
+    columns = {}
+    cells = []
+    for software_id, name, software_type, latest, project_id, project_name, project_version, version in result:
+        if not rows['software_id'] or rows['software_id'][-1] != software_id:
+            for key, value in zip(rows, (software_id, name, software_type, latest)):
+                rows[key].append(value)
+            cells.append({})
+        column = (project_id, project_version)
+        columns.setdefault(column, project_name)
+        cells[-1][column] = version
+
+    order = sorted(columns, key=lambda c: (columns[c].lower(), c[0], version_key(c[1])))
+    return {
+        'columns': {
+            'project_id': [c[0] for c in order],
+            'project_name': [columns[c] for c in order],
+            'project_version': [c[1] for c in order],
+        },
+        'rows': rows,
+        'values': [[row.get(c) for c in order] for row in cells],
+    }
+
+
+def version_key(version):
+    """Sort key for version strings: numeric parts compare as numbers.
+
+    ``1.10`` sorts after ``1.9``, a pre-release such as ``2.0rc1`` before ``2.0``,
+    and a leading ``v`` is ignored.
+    """
+    key = []
+    for part in re.findall(r'\d+|[A-Za-z]+', re.sub(r'^[vV](?=\d)', '', version or '')):
+        key.append((2, int(part), '') if part.isdigit() else (0, 0, part.lower()))
+    key.append((1, 0, ''))
+    return key
+
+
+RELEASE_COLUMNS = (Release.id, Release.version, Release.release_date, Release.notes, Release.project_id)
+
+
+def _release_dict(row):
+    return {'id': row[0], 'version': row[1], 'release_date': row[2], 'notes': row[3], 'project_id': row[4]}
+
+
+def _release_source(project_id, include_archived):
+    """A project's releases, with archived ones appended when asked for."""
+    hot = select(*RELEASE_COLUMNS, literal(False).label('archived')).where(Release.project_id == project_id)
+    if not include_archived:
+        return hot.subquery()
+    archived = select(ReleaseArchive.id, ReleaseArchive.version, ReleaseArchive.release_date,
+                      ReleaseArchive.notes, ReleaseArchive.project_id, literal(True).label('archived')
+                      ).where(ReleaseArchive.project_id == project_id)
+    return union_all(hot, archived).subquery()
+
+
+def release_page(project_id, sort='version', descending=True, page=1, per_page=50, include_archived=False):
+    """One page of a project's releases, ordered by version key or release date.
+
+    With ``include_archived`` archived releases are listed too, each item
+    carrying an ``archived`` flag.
+    """
+    source = _release_source(project_id, include_archived)
+    columns = (source.c.id, source.c.version, source.c.release_date, source.c.notes, source.c.project_id,
+               source.c.archived)
+    total = db.session.execute(select(func.count()).select_from(source)).scalar()
+    offset = (page - 1) * per_page
+
+    if sort == 'date':
+        order = (source.c.release_date.desc(), source.c.id.desc()) if descending \
+            else (source.c.release_date, source.c.id)
+        rows = db.session.execute(select(*columns).order_by(*order).limit(per_page).offset(offset)).all()
+    else:
+        # Version order cannot be expressed in SQL, so sort the (id, version) pairs
+        # and load full rows for the requested page only
+        versions = db.session.execute(select(source.c.id, source.c.version, source.c.archived)).all()
+        versions.sort(key=lambda r: (version_key(r[1]), r[0]), reverse=descending)
+        keys = [(bool(r[2]), r[0]) for r in versions[offset:offset + per_page]]
+        ids = [key[1] for key in keys]
+        by_key = {(bool(row[5]), row[0]): row
+                  for row in db.session.execute(select(*columns).where(source.c.id.in_(ids)))}
+        rows = [by_key[key] for key in keys]
+
+    items = []
+    for row in rows:
+        item = _release_dict(row)
+        if include_archived:
+            item['archived'] = bool(row[5])
+        items.append(item)
+    return {
+        'items': items,
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'pages': math.ceil(total / per_page) if total else 0,
+    }
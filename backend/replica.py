@@ -0,0 +1,163 @@
+"""Read/write routing to a read-replica engine.
+
+Configure either a real replica with ``READ_REPLICA_URL`` or, for local testing
+on SQLite, ``READ_REPLICA_SNAPSHOT``: a file path that is periodically refreshed
+as a copy of the primary database. GET requests to ``READ_ROUTED_ENDPOINTS`` read
+from the replica while it is no older than ``READ_REPLICA_MAX_STALENESS``
+seconds; everything else, and any read after a write, uses the primary.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+import sqlalchemy as sa
+from flask import request
+
+from engine_profiles import apply_engine_profile
+from models.software import db
+
+
+def replica_url(config):
+    if config.get('READ_REPLICA_SNAPSHOT'):
+        return f"sqlite:///{os.path.abspath(config['READ_REPLICA_SNAPSHOT'])}"
+    return config.get('READ_REPLICA_URL')
+
+
+def create_replica_engine(config):
+    # Kept out of SQLALCHEMY_BINDS so create_all and migrations never touch the replica
+    engine = sa.create_engine(replica_url(config), **config['SQLALCHEMY_ENGINE_OPTIONS'])
+    apply_engine_profile(engine, config, read_only=bool(config.get('READ_REPLICA_SNAPSHOT')))
+    return engine
+
+
+class SnapshotReplica:
+    """A local SQLite copy of the primary, refreshed with the online backup API.
+
+    Staleness is the age of the snapshot file, so every worker process agrees on
+    it. A stale snapshot is refreshed in a background thread while reads fall
+    back to the primary.
+    """
+
+    def __init__(self, app, engine, path):
+        self.app = app
+        self.engine = engine
+        self.path = os.path.abspath(path)
+        self.lock = threading.Lock()
+        self.refreshing = False
+        self.loaded_mtime = None
+
+    def staleness(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        if not stat.st_size:
+            # Empty file left by a connection before the first refresh
+            return None
+        mtime = stat.st_mtime
+        if mtime != self.loaded_mtime:
+            # New snapshot file: pooled connections still point at the replaced one
+            self.engine.dispose()
+            self.loaded_mtime = mtime
+        return time.time() - mtime
+
+    def refresh(self):
+        primary = db.engines[None].url.database
+        tmp_path = f'{self.path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        source = sqlite3.connect(primary)
+        target = sqlite3.connect(tmp_path)
+        try:
+            source.backup(target)
+            # Readers never write, so the copy does not need a WAL
+            target.execute('PRAGMA journal_mode=DELETE')
+        finally:
+            target.close()
+            source.close()
+        os.replace(tmp_path, self.path)
+        self.engine.dispose()
+
+    def refresh_in_background(self):
+        with self.lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+
+        def run():
+            try:
+                with self.app.app_context():
+                    self.refresh()
+            except Exception as e:
+                self.app.logger.warning('Read replica snapshot refresh failed: %s', e)
+            finally:
+                self.refreshing = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+
+class ExternalReplica:
+    """A server-side replica; lag comes from ``READ_REPLICA_LAG_SQL`` if configured.
+
+    The lag query runs on the replica and must return seconds behind the
+    primary. It is cached for ``READ_REPLICA_LAG_CHECK_INTERVAL`` seconds. Without
+    it the replica is assumed to be within tolerance.
+    """
+
+    def __init__(self, app, engine):
+        self.app = app
+        self.engine = engine
+        self.lag_sql = app.config.get('READ_REPLICA_LAG_SQL')
+        self.interval = app.config.get('READ_REPLICA_LAG_CHECK_INTERVAL', 5)
+        self.checked_at = 0.0
+        self.lag = 0.0
+
+    def staleness(self):
+        if not self.lag_sql:
+            return 0.0
+        now = time.monotonic()
+        if now - self.checked_at >= self.interval:
+            try:
+                with self.engine.connect() as connection:
+                    value = connection.execute(db.text(self.lag_sql)).scalar()
+                self.lag = float(value) if value is not None else None
+            except Exception as e:
+                self.app.logger.warning('Read replica lag check failed: %s', e)
+                self.lag = None
+            self.checked_at = now
+        return self.lag
+
+    def refresh_in_background(self):
+        pass
+
+
+def init_read_replica(app):
+    """Create the replica engine and register request routing for it."""
+    engine = create_replica_engine(app.config)
+    if app.config.get('READ_REPLICA_SNAPSHOT'):
+        replica = SnapshotReplica(app, engine, app.config['READ_REPLICA_SNAPSHOT'])
+    else:
+        replica = ExternalReplica(app, engine)
+    app.extensions['read_replica'] = replica
+    routed = set(app.config['READ_ROUTED_ENDPOINTS'])
+    max_staleness = app.config['READ_REPLICA_MAX_STALENESS']
+
+    @app.cli.command('refresh-replica')
+    def refresh_replica_command():
+        """Copy the primary SQLite database to the read replica snapshot."""
+        if not isinstance(replica, SnapshotReplica):
+            print('READ_REPLICA_SNAPSHOT is not configured')
+            return
+        replica.refresh()
+        print(f'Read replica snapshot refreshed: {replica.path}')
+
+    @app.before_request
+    def route_reads_to_replica():
+        if request.method != 'GET' or request.endpoint not in routed:
+            return
+        staleness = replica.staleness()
+        if staleness is not None and staleness <= max_staleness:
+            db.session.info['use_replica'] = True
+        else:
+            replica.refresh_in_background()
+
+    return replica
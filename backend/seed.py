@@ -0,0 +1,241 @@
+import random
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import func, insert
+
+from changes import INSERT, log_bulk
+from history import record_bulk
+from models.software import db, Software, Project, Release, Customer, ITHCSoftware, project_customer
+
+# Columns written for each importer, in the order the import endpoints read them
+WORKBOOK_HEADERS = {
+    'software': ['Software', 'Type', 'Latest Version', 'URL'],
+    'project': ['Name', 'Description', 'Software Name', 'Software Version'],
+    'customer': ['Name', 'Email', 'Contact Person'],
+    'ithc': ['Project Name', 'Project Version', 'Software Name', 'Current Version'],
+}
+
+SOFTWARE_TYPES = ['Operating System', 'Database', 'Web Server', 'Runtime', 'Library',
+                  'Middleware', 'Monitoring', 'Security', 'Application', 'Tool']
+VENDORS = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Stark', 'Wayne', 'Cyberdyne',
+           'Soylent', 'Tyrell', 'Wonka', 'Aperture']
+PRODUCTS = ['Server', 'Agent', 'Gateway', 'Engine', 'Studio', 'Runtime', 'Proxy', 'Cache',
+            'Broker', 'Vault', 'Scanner', 'Console']
+PROJECT_WORDS = ['Atlas', 'Borealis', 'Cobalt', 'Delta', 'Ember', 'Falcon', 'Granite', 'Harbor',
+                 'Ion', 'Juniper', 'Kestrel', 'Lumen', 'Meridian', 'Nimbus', 'Onyx', 'Pioneer']
+CUSTOMER_WORDS = ['Health', 'Transport', 'Energy', 'Finance', 'Retail', 'Defence', 'Water',
+                  'Telecom', 'Education', 'Logistics']
+
+BASE_DATE = datetime(2020, 1, 1)
+
+
+def _version(rng, major_max=12):
+    return f'{rng.randint(0, major_max)}.{rng.randint(0, 20)}.{rng.randint(0, 30)}'
+
+
+def generate_dataset(seed=42, software=500, projects=50, versions=5, customers=100,
+                     components=50, customers_per_project=3):
+    """Build a deterministic dataset as plain row dicts keyed by table.
+
+    The same arguments always produce the same rows, so a database seeded with
+    ``flask seed`` matches workbooks written by ``flask gen-workbook``.
+    Ids are 1-based and relative; ``seed_database`` shifts them past existing rows.
+    """
+    rng = random.Random(seed)
+    data = {'software': [], 'project': [], 'release': [], 'customer': [],
+            'project_customer': [], 'ithc': []}
+
+    for i in range(1, software + 1):
+        vendor = VENDORS[i % len(VENDORS)]
+        product = PRODUCTS[(i // len(VENDORS)) % len(PRODUCTS)]
+        data['software'].append({
+            'id': i,
+            'name': f'{vendor} {product} {i:05d}',
+            'software_type': rng.choice(SOFTWARE_TYPES),
+            'latest_version': _version(rng),
+            'last_updated': BASE_DATE + timedelta(hours=rng.randint(0, 40000)),
+            'check_url': f'https://downloads.{vendor.lower()}.example/{product.lower()}-{i}',
+        })
+
+    for i in range(1, customers + 1):
+        word = CUSTOMER_WORDS[i % len(CUSTOMER_WORDS)]
+        data['customer'].append({
+            'id': i,
+            'name': f'{word} Customer {i:05d}',
+            'email': f'contact{i}@{word.lower()}.example',
+            'contact_person': f'Contact {i:05d}',
+        })
+
+    release_id = 0
+    for i in range(1, projects + 1):
+        name = f'{PROJECT_WORDS[i % len(PROJECT_WORDS)]} {i:05d}'
+        created_at = BASE_DATE + timedelta(days=rng.randint(0, 1500))
+        project_versions = [f'{major}.{rng.randint(0, 9)}.0' for major in range(1, versions + 1)]
+        data['project'].append({
+            'id': i,
+            'name': name,
+            'description': f'Synthetic project {i}',
+            'created_at': created_at,
+            'software_id': rng.randint(1, software) if software else None,
+            'software_version': project_versions[-1] if project_versions else None,
+        })
+
+        for n, version in enumerate(project_versions):
+            release_id += 1
+            data['release'].append({
+                'id': release_id,
+                'version': version,
+                'release_date': created_at + timedelta(days=90 * n),
+                'notes': f'Release {version} of {name}',
+                'project_id': i,
+            })
+
+        if customers:
+            for customer_id in rng.sample(range(1, customers + 1), min(customers_per_project, customers)):
+                data['project_customer'].append({'project_id': i, 'customer_id': customer_id})
+
+        if software:
+            software_ids = rng.sample(range(1, software + 1), min(components, software))
+            for n, version in enumerate(project_versions):
+                stamp = created_at + timedelta(days=90 * n)
+                for software_id in software_ids:
+                    data['ithc'].append({
+                        'id': len(data['ithc']) + 1,
+                        'project_id': i,
+                        'software_id': software_id,
+                        'project_version': version,
+                        'current_software_version': _version(rng),
+                        'created_at': stamp,
+                        'updated_at': stamp,
+                    })
+
+    return data
+
+
+def _offset(model):
+    return db.session.execute(db.select(func.coalesce(func.max(model.id), 0))).scalar()
+
+
+def _renumbered(name, number):
+    """``name`` with its trailing row number replaced: 'Acme Server 00001' -> 'Acme Server 00021'."""
+    return f"{name.rsplit(' ', 1)[0]} {number:05d}"
+
+
+def seed_database(data, batch_size=5000):
+    """Bulk insert a generated dataset, shifting ids past any existing rows.
+
+    Generated names end in the row's id, so they are shifted with it and a
+    second dataset (any seed) can be added to a database seeded before.
+    """
+    offsets = {
+        'software': _offset(Software),
+        'project': _offset(Project),
+        'release': _offset(Release),
+        'customer': _offset(Customer),
+        'ithc': _offset(ITHCSoftware),
+    }
+
+    def shifted(rows, **fields):
+        return [{**row, **{k: row[k] + offsets[table] for k, table in fields.items()
+                           if row.get(k) is not None}} for row in rows]
+
+    def renamed(rows, table):
+        if not offsets[table]:
+            return rows
+        return [{**row, 'name': _renumbered(row['name'], row['id'])} for row in rows]
+
+    projects = renamed(shifted(data['project'], id='project', software_id='software'), 'project')
+    project_names = {p['id']: p['name'] for p in projects}
+    releases = [{**r, 'notes': f"Release {r['version']} of {project_names[r['project_id']]}"}
+                for r in shifted(data['release'], id='release', project_id='project')]
+    tables = [
+        (Software, renamed(shifted(data['software'], id='software'), 'software')),
+        (Customer, renamed(shifted(data['customer'], id='customer'), 'customer')),
+        (Project, projects),
+        (Release, releases),
+        (project_customer, shifted(data['project_customer'], project_id='project', customer_id='customer')),
+        (ITHCSoftware, shifted(data['ithc'], id='ithc', project_id='project', software_id='software')),
+    ]
+    for target, rows in tables:
+        for start in range(0, len(rows), batch_size):
+            db.session.execute(insert(target), rows[start:start + batch_size])
+    for model, key in ((Software, 'software'), (Customer, 'customer'), (Project, 'project'),
+                       (Release, 'release'), (ITHCSoftware, 'ithc')):
+        log_bulk(model, INSERT, model.id > offsets[key])
+    log_bulk(project_customer, INSERT, project_customer.c.project_id > offsets['project'])
+    record_bulk(ITHCSoftware.id > offsets['ithc'], valid_from=ITHCSoftware.updated_at)
+    db.session.commit()
+    return {key: len(rows) for key, rows in data.items()}
+
+
+def workbook_rows(kind, data):
+    """Yield importer rows for ``kind`` (software, project, customer or ithc)."""
+    if kind == 'software':
+        for s in data['software']:
+            yield [s['name'], s['software_type'], s['latest_version'], s['check_url']]
+    elif kind == 'project':
+        software_names = {s['id']: s['name'] for s in data['software']}
+        for p in data['project']:
+            yield [p['name'], p['description'], software_names.get(p['software_id']), p['software_version']]
+    elif kind == 'customer':
+        for c in data['customer']:
+            yield [c['name'], c['email'], c['contact_person']]
+    elif kind == 'ithc':
+        software_names = {s['id']: s['name'] for s in data['software']}
+        project_names = {p['id']: p['name'] for p in data['project']}
+        for i in data['ithc']:
+            yield [project_names[i['project_id']], i['project_version'],
+                   software_names[i['software_id']], i['current_software_version']]
+    else:
+        raise ValueError(f'Unknown workbook type: {kind}')
+
+
+def write_workbook(kind, data, output):
+    """Write an import workbook for ``kind`` to a path or file object; returns the row count."""
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(f'{kind.title()} Import')
+    ws.append(WORKBOOK_HEADERS[kind])
+    count = 0
+    for row in workbook_rows(kind, data):
+        ws.append(row)
+        count += 1
+    wb.save(output)
+    return count
+
+
+def dataset_options(func):
+    """Shared size options so ``seed`` and ``gen-workbook`` generate matching data."""
+    options = [
+        click.option('--seed', 'seed_value', default=42, show_default=True, help='Random seed.'),
+        click.option('--software', default=500, show_default=True, help='Software catalog size.'),
+        click.option('--projects', default=50, show_default=True, help='Number of projects.'),
+        click.option('--versions', default=5, show_default=True, help='Releases per project.'),
+        click.option('--customers', default=100, show_default=True, help='Number of customers.'),
+        click.option('--components', default=50, show_default=True,
+                     help='ITHC software rows per project version.'),
+    ]
+    for option in reversed(options):
+        func = option(func)
+    return func
+
+
+def register_commands(app):
+    @app.cli.command('seed')
+    @dataset_options
+    def seed_command(seed_value, software, projects, versions, customers, components):
+        """Bulk insert a deterministic synthetic dataset."""
+        data = generate_dataset(seed_value, software, projects, versions, customers, components)
+        counts = seed_database(data)
+        click.echo(', '.join(f'{key}: {count}' for key, count in counts.items()))
+
+    @app.cli.command('gen-workbook')
+    @click.argument('kind', type=click.Choice(sorted(WORKBOOK_HEADERS)))
+    @click.argument('output', type=click.Path(dir_okay=False))
+    @dataset_options
+    def gen_workbook_command(kind, output, seed_value, software, projects, versions, customers, components):
+        """Write an .xlsx import workbook matching the seeded dataset."""
+        data = generate_dataset(seed_value, software, projects, versions, customers, components)
+        count = write_workbook(kind, data, output)
+        click.echo(f'Wrote {count} {kind} rows to {output}')
@@ -39,4 +39,34 @@ def sample_customer():
         'name': 'Test Customer',
         'email': 'test@example.com',
         'contact_person': 'Test Person'
-    }
\ No newline at end of file
+    }
+@pytest.fixture
+def ithc_project(client):
+    """Build project 1 ('Alpha', at 1.0) with ITHC rows; returns the client.
+
+    ``software`` lists (name, type) for software 1, 2, ... (latest version 9);
+    ``rows`` lists (software_id, project_version, current version).
+    """
+    from models.software import ITHCSoftware, Project, Software
+
+    def build(software, rows):
+        db.session.add(Project(id=1, name='Alpha', software_version='1.0'))
+        for i, (name, kind) in enumerate(software, start=1):
+            db.session.add(Software(id=i, name=name, software_type=kind, latest_version='9'))
+        for software_id, project_version, version in rows:
+            db.session.add(ITHCSoftware(project_id=1, software_id=software_id, project_version=project_version,
+                                        current_software_version=version))
+        db.session.commit()
+        return client
+    return build
+
+@pytest.fixture
+def ithc_versions():
+    """{software_id: current version} of the ITHC rows at a project version."""
+    from models.software import ITHCSoftware
+
+    def versions(project_version):
+        return dict(db.session.execute(
+            db.select(ITHCSoftware.software_id, ITHCSoftware.current_software_version)
+            .where(ITHCSoftware.project_version == project_version)).all())
+    return versions
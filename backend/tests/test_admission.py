@@ -0,0 +1,87 @@
+import os
+import subprocess
+import sys
+import pytest
+from app import create_app
+from admission import TokenBuckets
+from models.software import db
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "admission.db"}',
+                                 'ADMISSION_ENABLED': True, 'ADMISSION_LOCK_DIR': str(tmp_path / 'locks')})
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+def test_classify(app):
+    control = app.extensions['admission']
+    assert control.classify('import_ithc', {}) == 'import'
+    assert control.classify('get_ithc_matrix', {}) == 'report'
+    assert control.classify('get_ithc_matrix', {'format': 'xlsx'}) == 'export'
+    assert control.classify('get_software', {}) == 'interactive'
+    assert control.classify('static', {}) is None
+
+def test_saturated_class_is_rejected(app):
+    control = app.extensions['admission']
+    client = app.test_client()
+    slot = control.semaphores['import'].acquire()
+    response = client.post('/api/software/import')
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '10'
+    # Other classes are unaffected
+    assert client.get('/api/software').status_code == 200
+    control.semaphores['import'].release(slot)
+    assert client.post('/api/software/import').status_code == 400
+
+def test_slot_released_after_request(app):
+    client = app.test_client()
+    for _ in range(3):
+        assert client.get('/api/templates/software').status_code == 200
+    assert client.get('/api/ithc/diff?project_id=1&from=1&to=2').status_code == 404
+    assert client.get('/api/ithc/diff?project_id=1&from=1&to=2').status_code == 404
+
+def test_slots_are_shared_across_processes(app):
+    # A slot locked by another process (another gunicorn worker) counts against the limit
+    semaphore = app.extensions['admission'].semaphores['import']
+    os.makedirs(semaphore.directory, exist_ok=True)
+    path = semaphore.paths[0]
+    holder = subprocess.Popen(
+        [sys.executable, '-c', 'import fcntl, os, sys; fd = os.open(sys.argv[1], os.O_RDWR | os.O_CREAT); '
+                               'fcntl.flock(fd, fcntl.LOCK_EX); print("locked", flush=True); sys.stdin.read()',
+         path], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        assert holder.stdout.readline().strip() == 'locked'
+        assert app.test_client().post('/api/projects/import').status_code == 429
+    finally:
+        holder.stdin.close()
+        holder.wait(timeout=10)
+    assert app.test_client().post('/api/projects/import').status_code == 400
+
+def test_admission_runs_before_replica_routing(tmp_path):
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "primary.db"}',
+                                 'READ_REPLICA_SNAPSHOT': str(tmp_path / 'replica.db'),
+                                 'ADMISSION_ENABLED': True, 'ADMISSION_LOCK_DIR': str(tmp_path / 'locks')})
+    assert [f.__name__ for f in app.before_request_funcs[None][:2]] == ['admit_request', 'route_reads_to_replica']
+
+def test_token_bucket():
+    buckets = TokenBuckets(per_minute=60, burst=2)
+    assert [buckets.take('a', now=0), buckets.take('a', now=0)] == [0, 0]
+    assert buckets.take('a', now=0.5) == pytest.approx(0.5)
+    assert buckets.take('b', now=0.5) == 0
+    assert buckets.take('a', now=1.0) == 0
+
+def test_rate_limited_client_gets_retry_after(app):
+    app.extensions['admission'].buckets['export'] = TokenBuckets(per_minute=1, burst=2)
+    client = app.test_client()
+    assert [client.get('/api/templates/ithc').status_code for _ in range(3)] == [200, 200, 429]
+    response = client.get('/api/templates/ithc')
+    assert 1 <= int(response.headers['Retry-After']) <= 60
+    # Another client has its own bucket
+    assert client.get('/api/templates/ithc', environ_base={'REMOTE_ADDR': '10.0.0.2'}).status_code == 200
+    app.config['ADMISSION_CLIENT_HEADER'] = 'X-Real-IP'
+    assert client.get('/api/templates/ithc').status_code == 429
+    assert client.get('/api/templates/ithc', headers={'X-Real-IP': '10.0.0.3'}).status_code == 200
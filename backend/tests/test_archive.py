@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+import pytest
+from models.software import db, ChangeLog, ITHCHistory, Project, Release, ITHCSoftware, ITHCSoftwareArchive, ReleaseArchive
+from seed import generate_dataset, seed_database
+import archive
+
+@pytest.fixture
+def seeded(client):
+    seed_database(generate_dataset(seed=5, software=20, projects=3, versions=3, customers=4, components=8))
+    return client
+
+def version_of(project_id):
+    return db.session.execute(db.select(ITHCSoftware.project_version)
+                              .where(ITHCSoftware.project_id == project_id)).scalars().first()
+
+def test_archive_and_restore_round_trip(seeded):
+    version = version_of(1)
+    before = seeded.get(f'/api/ithc/software?project_id=1&project_version={version}').get_json()
+    releases = Release.query.filter_by(project_id=1, version=version).count()
+    others = ITHCSoftware.query.filter(ITHCSoftware.project_version != version).count()
+
+    response = seeded.post('/api/ithc/archive', json={'project_id': 1, 'project_versions': [version],
+                                                      'include_releases': True})
+    assert response.get_json() == {'archived': {'ithc': len(before), 'releases': releases}}
+    assert seeded.get(f'/api/ithc/software?project_id=1&project_version={version}').get_json() == []
+    assert ITHCSoftware.query.filter(ITHCSoftware.project_version != version).count() == others
+    assert ReleaseArchive.query.count() == releases
+    assert ChangeLog.query.filter_by(entity='ithc', op='delete').count() == len(before)
+
+    listed = seeded.get(f'/api/ithc/software?project_id=1&project_version={version}&include_archived=1').get_json()
+    assert all(row.pop('archived') for row in listed)
+    # Nested projects differ only by the archived releases' summary
+    strip = lambda rows: sorted(({**r, 'project': None} for r in rows), key=lambda r: r['id'])
+    assert strip(listed) == strip(before)
+
+    response = seeded.post('/api/ithc/restore', json={'project_id': 1, 'include_releases': True})
+    assert response.get_json() == {'restored': {'ithc': len(before), 'releases': releases}, 'skipped': {'ithc': 0}}
+    assert ITHCSoftwareArchive.query.count() == 0
+    assert seeded.get(f'/api/ithc/software?project_id=1&project_version={version}').get_json() == before
+    assert ChangeLog.query.filter_by(entity='ithc', op='insert').count() == \
+        ChangeLog.query.filter_by(entity='ithc').count() - len(before)
+
+def test_archive_in_batches(seeded):
+    total = ITHCSoftware.query.filter_by(project_id=2).count()
+    assert archive.archive_versions(2, batch_size=7) == {'ithc': total}
+    assert ITHCSoftwareArchive.query.filter_by(project_id=2).count() == total
+
+def test_restore_renumbers_reused_ids(seeded):
+    row = ITHCSoftware.query.order_by(ITHCSoftware.id.desc()).first()
+    archived_id, project_id, version, software_id = row.id, row.project_id, row.project_version, row.software_id
+    archive.archive_versions(project_id, [version])
+    # Without AUTOINCREMENT, SQLite may hand a freed id to a new row
+    db.session.expunge_all()
+    db.session.add(ITHCSoftware(id=archived_id, project_id=3, software_id=1, project_version='new',
+                                current_software_version='1'))
+    db.session.commit()
+
+    archive.restore_versions(project_id, [version])
+    restored = ITHCSoftware.query.filter_by(project_id=project_id, project_version=version).all()
+    assert restored
+    assert archived_id not in {r.id for r in restored}
+    assert all(ChangeLog.query.filter_by(entity='ithc', entity_id=r.id, op='insert').count() for r in restored)
+    # The renumbered row's history follows it; the new row keeps its own
+    new_id = next(r.id for r in restored if r.software_id == software_id)
+    history = ITHCHistory.query.filter_by(project_id=project_id, project_version=version, software_id=software_id)
+    assert {h.ithc_id for h in history} == {new_id}
+    assert ITHCHistory.query.filter_by(ithc_id=archived_id, project_version='new').count() == 1
+
+def test_restore_skips_rows_that_are_live_again(seeded):
+    version = version_of(1)
+    rows = ITHCSoftware.query.filter_by(project_id=1, project_version=version).count()
+    software_id = ITHCSoftware.query.filter_by(project_id=1, project_version=version).first().software_id
+    archive.archive_versions(1, [version])
+    seeded.post('/api/ithc/software', json={'project_id': 1, 'software_id': software_id,
+                                            'project_version': version, 'current_software_version': 'again'})
+    response = seeded.post('/api/ithc/restore', json={'project_id': 1, 'project_versions': [version]})
+    assert response.get_json() == {'restored': {'ithc': rows - 1}, 'skipped': {'ithc': 1}}
+    live = ITHCSoftware.query.filter_by(project_id=1, project_version=version, software_id=software_id)
+    assert [r.current_software_version for r in live] == ['again']
+    assert ITHCSoftwareArchive.query.count() == 1
+
+def test_search_and_releases_include_archived(seeded):
+    project = db.session.get(Project, 1)
+    archive.archive_versions(1, include_releases=True)
+    name = project.name
+    assert seeded.get(f'/api/ithc/software/search?project={name}').get_json() == []
+    rows = seeded.get(f'/api/ithc/software/search?project={name}&include_archived=true').get_json()
+    assert rows and all(r['archived'] for r in rows)
+
+    assert seeded.get('/api/projects/1/releases').get_json()['total'] == 0
+    page = seeded.get('/api/projects/1/releases?include_archived=1&sort=date').get_json()
+    assert page['total'] == ReleaseArchive.query.count() > 0
+    assert all(item['archived'] for item in page['items'])
+    by_version = seeded.get('/api/projects/1/releases?include_archived=1').get_json()
+    assert {i['id'] for i in by_version['items']} == {i['id'] for i in page['items']}
+
+def test_archive_validation(seeded):
+    assert seeded.post('/api/ithc/archive', json={}).status_code == 400
+    assert seeded.post('/api/ithc/archive', json={'project_id': 1, 'project_versions': []}).status_code == 400
+    assert seeded.post('/api/ithc/restore', json={'project_id': 999}).status_code == 404
+
+def test_archive_command_skips_current_version(seeded):
+    db.session.execute(db.update(ITHCSoftware).values(updated_at=datetime.utcnow() - timedelta(days=400)))
+    db.session.commit()
+    current = {p.id: p.software_version for p in Project.query}
+    result = seeded.application.test_cli_runner().invoke(args=['archive-ithc', '--days', '365'])
+    assert result.exit_code == 0, result.output
+    assert ITHCSoftwareArchive.query.count() > 0
+    remaining = {(r.project_id, r.project_version) for r in ITHCSoftware.query}
+    assert all(version == current[pid] for pid, version in remaining)
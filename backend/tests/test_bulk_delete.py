@@ -0,0 +1,80 @@
+import pytest
+from models.software import db, ChangeLog, Software, Project, Release, ITHCSoftware, project_customer
+from seed import generate_dataset, seed_database
+
+@pytest.fixture
+def seeded(client):
+    seed_database(generate_dataset(seed=4, software=30, projects=4, versions=3, customers=6, components=10))
+    return client
+
+def count(model):
+    return db.session.execute(db.select(db.func.count()).select_from(model)).scalar()
+
+def logged(entity, op):
+    return ChangeLog.query.filter_by(entity=entity, op=op).count()
+
+def test_delete_project_removes_children(seeded):
+    project = db.session.get(Project, 1)
+    expected = {
+        'ithc': ITHCSoftware.query.filter_by(project_id=1).count(),
+        'releases': Release.query.filter_by(project_id=1).count(),
+        'customer_links': len(project.customers),
+    }
+    db.session.expunge_all()
+    assert all(expected.values())
+
+    assert seeded.delete('/api/projects/1').status_code == 200
+    assert db.session.get(Project, 1) is None
+    assert ITHCSoftware.query.filter_by(project_id=1).count() == 0
+    assert Release.query.filter_by(project_id=1).count() == 0
+    assert logged('ithc', 'delete') == expected['ithc']
+    assert logged('release', 'delete') == expected['releases']
+    assert logged('project_customer', 'delete') == expected['customer_links']
+    assert seeded.delete('/api/projects/1').status_code == 404
+
+def test_bulk_delete_projects(seeded):
+    response = seeded.post('/api/projects/bulk-delete', json={'ids': [1, 2, 999]})
+    assert response.status_code == 200
+    deleted = response.get_json()['deleted']
+    assert deleted['projects'] == 2
+    assert deleted['ithc'] > 0 and deleted['releases'] > 0
+    assert count(Project) == 2
+    assert db.session.execute(db.select(db.func.count()).select_from(project_customer)
+                              .where(project_customer.c.project_id.in_([1, 2]))).scalar() == 0
+    assert seeded.post('/api/projects/bulk-delete', json={'ids': '1,2'}).status_code == 400
+
+def test_delete_software_detaches_projects(seeded):
+    software_id = db.session.execute(db.select(Project.software_id).where(Project.id == 1)).scalar()
+    ithc_rows = ITHCSoftware.query.filter_by(software_id=software_id).count()
+    response = seeded.post('/api/software/bulk-delete', json={'ids': [software_id]})
+    deleted = response.get_json()['deleted']
+    assert deleted == {'software': 1, 'ithc': ithc_rows, 'projects_detached': 1}
+    db.session.expire_all()
+    assert db.session.get(Project, 1).software_id is None
+    assert logged('project', 'update') == 1
+
+    another = Software.query.filter(Software.id != software_id).first().id
+    assert seeded.delete(f'/api/software/{another}').status_code == 200
+    assert db.session.get(Software, another) is None
+
+def test_bulk_delete_ithc_by_project_version(seeded):
+    row = ITHCSoftware.query.first()
+    matching = ITHCSoftware.query.filter_by(project_id=row.project_id, project_version=row.project_version).count()
+    total = count(ITHCSoftware)
+    response = seeded.post('/api/ithc/software/bulk-delete',
+                           json={'project_id': row.project_id, 'project_version': row.project_version})
+    assert response.get_json() == {'deleted': {'ithc': matching}}
+    assert count(ITHCSoftware) == total - matching
+
+    ids = [i.id for i in ITHCSoftware.query.limit(3)]
+    assert seeded.post('/api/ithc/software/bulk-delete', json={'ids': ids}).get_json() == {'deleted': {'ithc': 3}}
+    assert seeded.post('/api/ithc/software/bulk-delete', json={}).status_code == 400
+
+def test_database_cascades(seeded):
+    # ON DELETE actions also cover deletes that bypass the application
+    db.session.execute(db.text('DELETE FROM project WHERE id = 3'))
+    db.session.execute(db.text('DELETE FROM software WHERE id = (SELECT software_id FROM project WHERE id = 4)'))
+    db.session.commit()
+    assert ITHCSoftware.query.filter_by(project_id=3).count() == 0
+    assert Release.query.filter_by(project_id=3).count() == 0
+    assert db.session.get(Project, 4).software_id is None
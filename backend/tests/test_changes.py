@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+from io import BytesIO
+import pandas as pd
+import changes
+from models.software import db, ChangeLog, Software
+from seed import generate_dataset, seed_database
+
+SOFTWARE = {'name': 'Tracked', 'software_type': 'Tool', 'latest_version': '1.0'}
+
+def sync(client, since, **params):
+    response = client.get('/api/changes', query_string={'since': since, **params})
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_initial_token(client):
+    assert client.get('/api/changes').get_json() == {'token': 0, 'more': False, 'changes': {}}
+    client.post('/api/software', json=SOFTWARE)
+    assert client.get('/api/changes').get_json()['token'] == 1
+
+def test_insert_update_delete(client):
+    software_id = client.post('/api/software', json=SOFTWARE).get_json()['id']
+    first = sync(client, 0)
+    assert [s['name'] for s in first['changes']['software']['upserted']] == ['Tracked']
+
+    client.put(f'/api/software/{software_id}', json={'latest_version': '2.0'})
+    second = sync(client, first['token'])
+    assert second['token'] > first['token']
+    assert second['changes']['software']['upserted'][0]['latest_version'] == '2.0'
+
+    client.delete(f'/api/software/{software_id}')
+    third = sync(client, second['token'])
+    assert third['changes'] == {'software': {'upserted': [], 'deleted': [software_id]}}
+    assert sync(client, third['token']) == {'token': third['token'], 'more': False, 'changes': {}}
+
+def test_unchanged_update_is_not_logged(client):
+    software_id = client.post('/api/software', json=SOFTWARE).get_json()['id']
+    token = changes.latest_token()
+    software = db.session.get(Software, software_id)
+    software.name = software.name
+    db.session.commit()
+    assert changes.latest_token() == token
+
+def test_customer_links_and_scope(client):
+    project_id = client.post('/api/projects', json={'name': 'P', 'software_version': '3.1'}).get_json()['id']
+    customer_id = client.post('/api/customers', json={'name': 'C'}).get_json()['id']
+    token = changes.latest_token()
+    client.post(f'/api/projects/{project_id}/customers/{customer_id}')
+    linked = sync(client, token)
+    assert linked['changes'] == {'project_customer': {
+        'upserted': [{'project_id': project_id, 'customer_id': customer_id}], 'deleted': []}}
+
+    client.delete(f'/api/projects/{project_id}/customers/{customer_id}')
+    unlinked = sync(client, linked['token'])
+    assert unlinked['changes']['project_customer']['deleted'] == [{'project_id': project_id, 'customer_id': customer_id}]
+
+    project_entry = ChangeLog.query.filter_by(entity='project').first()
+    assert (project_entry.project_id, project_entry.project_version) == (project_id, '3.1')
+
+def test_importer_changes_are_logged(client):
+    df = pd.DataFrame({'name': ['Imported 1', 'Imported 2'], 'software_type': ['App', 'Tool'],
+                       'latest_version': ['1.0.0', '2.0.0']})
+    excel_file = BytesIO()
+    df.to_excel(excel_file, index=False)
+    excel_file.seek(0)
+    client.post('/api/software/import', data={'file': (excel_file, 'test.xlsx')},
+                content_type='multipart/form-data')
+    names = {s['name'] for s in sync(client, 0)['changes']['software']['upserted']}
+    assert names == {'Imported 1', 'Imported 2'}
+
+def test_bulk_seed_is_logged_and_paged(client):
+    counts = seed_database(generate_dataset(seed=2, software=20, projects=2, versions=2, customers=4, components=3))
+    assert ChangeLog.query.filter_by(entity='ithc').count() == counts['ithc']
+    assert ChangeLog.query.filter_by(entity='project_customer').count() == counts['project_customer']
+    assert ChangeLog.query.filter_by(entity='release').first().project_id is not None
+
+    seen, token, pages = set(), 0, 0
+    while True:
+        page = sync(client, token, limit=10)
+        seen.update(s['id'] for s in page['changes'].get('software', {}).get('upserted', []))
+        token, pages = page['token'], pages + 1
+        if not page['more']:
+            break
+    assert seen == {s.id for s in Software.query.all()}
+    assert pages > 2
+
+def test_expired_and_invalid_tokens(client):
+    for name in ('A', 'B', 'C'):
+        client.post('/api/software', json={**SOFTWARE, 'name': name})
+    ChangeLog.query.filter(ChangeLog.id < 3).update({'changed_at': datetime.utcnow() - timedelta(days=60)})
+    assert changes.prune(datetime.utcnow() - timedelta(days=30)) == 2
+    assert client.get('/api/changes?since=0').status_code == 410
+    assert sync(client, 2)['token'] == 3
+    assert client.get('/api/changes?since=abc').status_code == 400
+
+def test_fully_pruned_log_expires_older_tokens(client):
+    for name in ('A', 'B'):
+        client.post('/api/software', json={**SOFTWARE, 'name': name})
+    assert changes.prune(datetime.utcnow() + timedelta(days=1)) == 2
+    assert ChangeLog.query.count() == 0
+    for since in (0, 1):
+        response = client.get(f'/api/changes?since={since}')
+        assert (response.status_code, response.get_json()['token']) == (410, 2)
+    assert client.get('/api/changes').get_json()['token'] == 2
+    assert sync(client, 2) == {'token': 2, 'more': False, 'changes': {}}
+    # Pruning nothing leaves the watermark alone
+    assert changes.prune(datetime.utcnow() - timedelta(days=30)) == 0
+    client.post('/api/software', json={**SOFTWARE, 'name': 'C'})
+    assert sync(client, 2)['token'] == 3
@@ -0,0 +1,43 @@
+import pytest
+from models.software import ChangeLog, ITHCHistory, Release
+
+@pytest.fixture
+def project(ithc_project):
+    return ithc_project([('Agent', 'Tool'), ('Broker', 'Tool'), ('Cache', 'Tool')],
+                        [(1, '1.0', '1'), (2, '1.0', '2'), (3, '1.0', '3'), (1, '0.9', '0')])
+
+def test_clone_copies_rows_and_adds_release(project, ithc_versions):
+    response = project.post('/api/ithc/clone', json={'project_id': 1, 'from_version': '1.0', 'to_version': '2.0',
+                                                     'overrides': {'2': '4.1'}, 'notes': 'Next release'})
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['cloned'] == 3
+    assert (body['release']['version'], body['release']['notes']) == ('2.0', 'Next release')
+    assert ithc_versions('2.0') == {1: '1', 2: '4.1', 3: '3'}
+    assert ithc_versions('1.0') == {1: '1', 2: '2', 3: '3'}
+    assert ChangeLog.query.filter_by(entity='ithc', op='insert', project_version='2.0').count() == 3
+    assert ChangeLog.query.filter_by(entity='release', op='insert').count() == 1
+    assert ITHCHistory.query.filter_by(project_version='2.0').count() == 3
+
+def test_clone_without_release(project):
+    project.post('/api/projects/1/releases', json={'version': '2.0'})
+    body = project.post('/api/ithc/clone', json={'project_id': 1, 'from_version': '1.0',
+                                                 'to_version': '2.0'}).get_json()
+    assert body['release'] is None
+    assert Release.query.count() == 1
+    body = project.post('/api/ithc/clone', json={'project_id': 1, 'from_version': '1.0', 'to_version': '3.0',
+                                                 'create_release': False}).get_json()
+    assert body['release'] is None and Release.query.count() == 1
+
+def test_clone_errors(project, ithc_versions):
+    def clone(**data):
+        return project.post('/api/ithc/clone', json={'project_id': 1, 'from_version': '1.0', 'to_version': '2.0',
+                                                     **data})
+    assert clone(to_version='0.9').status_code == 409
+    assert clone(from_version='5.0').status_code == 404
+    assert clone(project_id=7).status_code == 404
+    assert clone(to_version='1.0').status_code == 400
+    response = clone(overrides={'9': '1'})
+    assert (response.status_code, response.get_json()['ids']) == (400, [9])
+    assert clone(overrides={'x': '1'}).status_code == 400
+    assert ithc_versions('2.0') == {}
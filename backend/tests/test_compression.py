@@ -0,0 +1,80 @@
+import gzip
+import json
+import pytest
+from flask import Response
+from app import create_app
+from models.software import db
+from compression import brotli
+from seed import generate_dataset, seed_database
+
+GZIP = {'Accept-Encoding': 'gzip'}
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+
+    @app.route('/test/stream')
+    def stream():
+        return Response((json.dumps({'chunk': i, 'pad': 'x' * 200}) + '\n' for i in range(50)),
+                        mimetype='text/plain')
+
+    with app.app_context():
+        db.create_all()
+        seed_database(generate_dataset(seed=5, software=60, projects=3, versions=2, customers=5, components=4))
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def test_large_json_is_gzipped(app):
+    client = app.test_client()
+    plain = client.get('/api/software')
+    response = client.get('/api/software', headers=GZIP)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert int(response.headers['Content-Length']) < len(plain.get_data()) / 3
+    assert gzip.decompress(response.get_data()) == plain.get_data()
+
+def test_no_compression_without_accept_encoding(app):
+    response = app.test_client().get('/api/software')
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+def test_refused_encoding_is_not_used(app):
+    response = app.test_client().get('/api/software', headers={'Accept-Encoding': 'gzip;q=0, identity'})
+    assert 'Content-Encoding' not in response.headers
+
+def test_small_payloads_are_skipped(app):
+    response = app.test_client().get('/api/software/1', headers=GZIP)
+    assert 'Content-Encoding' not in response.headers
+
+def test_xlsx_downloads_are_not_recompressed(app):
+    response = app.test_client().get('/api/templates/software', headers=GZIP)
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data()[:2] == b'PK'
+
+def test_streamed_response_is_compressed_incrementally(app):
+    response = app.test_client().get('/test/stream', headers=GZIP)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    chunks = list(response.response)
+    assert len(chunks) > 1
+    lines = gzip.decompress(b''.join(chunks)).decode().splitlines()
+    assert [json.loads(line)['chunk'] for line in lines] == list(range(50))
+
+def test_level_and_disable_settings(app):
+    client = app.test_client()
+    app.config['COMPRESSION_GZIP_LEVEL'] = 1
+    fast = client.get('/api/software', headers=GZIP).get_data()
+    app.config['COMPRESSION_GZIP_LEVEL'] = 9
+    small = client.get('/api/software', headers=GZIP).get_data()
+    assert len(small) < len(fast)
+    app.config['COMPRESSION_ENABLED'] = False
+    assert 'Content-Encoding' not in client.get('/api/software', headers=GZIP).headers
+
+@pytest.mark.skipif(brotli is None, reason='brotli is not installed')
+def test_brotli_preferred_when_accepted(app):
+    client = app.test_client()
+    response = client.get('/api/software', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.get_data()) == client.get('/api/software').get_data()
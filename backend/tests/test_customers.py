@@ -2,7 +2,7 @@ import json
 import pytest
 import io
 import pandas as pd
-from models.software import Customer
+from models.software import db, Customer
 
 def test_get_customers_empty(client):
     """Test getting customers list when empty"""
@@ -105,4 +105,72 @@ def test_import_customers_invalid_file(client):
                          content_type='multipart/form-data')
     assert response.status_code == 400
     data = json.loads(response.data)
-    assert 'error' in data
\ No newline at end of file
+    assert 'error' in data
+
+
+def make_projects(client, count):
+    return [client.post('/api/projects', json={'name': f'Project {i}'}).get_json()['id'] for i in range(count)]
+
+
+def make_customers(client, count):
+    return [client.post('/api/customers', json={'name': f'Customer {i}'}).get_json()['id'] for i in range(count)]
+
+
+def linked_customers(client, project_id):
+    return sorted(c['id'] for c in client.get(f'/api/projects/{project_id}').get_json()['customers'])
+
+
+def test_replace_and_patch_project_customers(client):
+    project_id = make_projects(client, 1)[0]
+    a, b, c = make_customers(client, 3)
+
+    response = client.put(f'/api/projects/{project_id}/customers', json={'customer_ids': [a, b]})
+    assert response.get_json() == {'project_id': project_id, 'added': 2, 'removed': 0, 'customer_count': 2}
+    response = client.put(f'/api/projects/{project_id}/customers', json={'customer_ids': [b, c]})
+    assert response.get_json() == {'project_id': project_id, 'added': 1, 'removed': 1, 'customer_count': 2}
+    assert linked_customers(client, project_id) == [b, c]
+
+    response = client.patch(f'/api/projects/{project_id}/customers', json={'add': [a, b], 'remove': [c]})
+    assert response.get_json() == {'project_id': project_id, 'added': 1, 'removed': 1, 'customer_count': 2}
+    assert linked_customers(client, project_id) == [a, b]
+
+    changes = client.get('/api/changes?since=0').get_json()['changes']['project_customer']
+    assert sorted(link['customer_id'] for link in changes['upserted']) == [a, b]
+    assert changes['deleted'] == [{'project_id': project_id, 'customer_id': c}]
+
+
+def test_membership_validation(client):
+    project_id = make_projects(client, 1)[0]
+    customer_id = make_customers(client, 1)[0]
+    response = client.put(f'/api/projects/{project_id}/customers', json={'customer_ids': [customer_id, 999]})
+    assert response.status_code == 400
+    assert response.get_json()['ids'] == [999]
+    assert linked_customers(client, project_id) == []
+    assert client.put(f'/api/projects/{project_id}/customers', json={'customer_ids': 'all'}).status_code == 400
+    assert client.put(f'/api/projects/{project_id}/customers', json=[customer_id]).status_code == 400
+    assert client.put('/api/projects/999/customers', json={'customer_ids': []}).status_code == 404
+
+
+def test_assign_customer_to_many_projects_in_constant_statements(client):
+    customer_id = make_customers(client, 1)[0]
+    project_ids = make_projects(client, 200)
+    statements = []
+    engine = db.engine
+    record = lambda conn, cursor, statement, *args: statements.append(statement)
+    db.event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.patch(f'/api/customers/{customer_id}/projects', json={'add': project_ids})
+    finally:
+        db.event.remove(engine, 'before_cursor_execute', record)
+    assert response.get_json() == {'customer_id': customer_id, 'added': 200, 'removed': 0, 'project_count': 200}
+    assert len(statements) < 10
+
+    response = client.put(f'/api/customers/{customer_id}/projects', json={'project_ids': project_ids[:50]})
+    assert response.get_json() == {'customer_id': customer_id, 'added': 0, 'removed': 150, 'project_count': 50}
+    assert linked_customers(client, project_ids[0]) == [customer_id]
+    assert linked_customers(client, project_ids[-1]) == []
+
+
+def test_cors_preflight_allows_patch(client):
+    response = client.options('/api/customers/1/projects')
+    assert 'PATCH' in response.headers['Access-Control-Allow-Methods'].split(',')
@@ -0,0 +1,49 @@
+import io
+import pytest
+from openpyxl import load_workbook
+from models.software import db, Project, Software, ITHCSoftware
+
+@pytest.fixture
+def versions(client):
+    db.session.add(Project(id=1, name='Alpha', software_version='2.0'))
+    for i, name in enumerate(['Agent', 'Broker', 'Cache', 'Daemon'], start=1):
+        db.session.add(Software(id=i, name=name, software_type='Tool', latest_version='9'))
+    # Agent unchanged, Broker upgraded, Cache dropped in 2.0, Daemon new in 2.0
+    for software_id, project_version, version in ((1, '1.0', '1'), (1, '2.0', '1'), (2, '1.0', '3'), (2, '2.0', '4'),
+                                                  (3, '1.0', '5'), (4, '2.0', '6'), (4, '3.0', '7')):
+        db.session.add(ITHCSoftware(project_id=1, software_id=software_id, project_version=project_version,
+                                    current_software_version=version))
+    db.session.commit()
+    return client
+
+def test_diff_between_versions(versions):
+    response = versions.get('/api/ithc/diff?project_id=1&from=1.0&to=2.0')
+    assert response.status_code == 200
+    assert response.is_streamed
+    body = response.get_json()
+    assert (body['project_id'], body['from'], body['to']) == (1, '1.0', '2.0')
+    assert [(i['software_name'], i['from_version'], i['to_version'], i['status']) for i in body['items']] == [
+        ('Broker', '3', '4', 'changed'), ('Cache', '5', None, 'removed'), ('Daemon', None, '6', 'added')]
+    assert body['summary'] == {'added': 1, 'removed': 1, 'changed': 1, 'unchanged': 0}
+
+def test_diff_include_unchanged(versions):
+    body = versions.get('/api/ithc/diff?project_id=1&from=2.0&to=1.0&include_unchanged=1').get_json()
+    assert [(i['software_name'], i['status']) for i in body['items']] == [
+        ('Agent', 'unchanged'), ('Broker', 'changed'), ('Cache', 'added'), ('Daemon', 'removed')]
+
+def test_diff_empty_versions(versions):
+    body = versions.get('/api/ithc/diff?project_id=1&from=8.0&to=9.0').get_json()
+    assert body['items'] == [] and sum(body['summary'].values()) == 0
+
+def test_diff_xlsx(versions):
+    response = versions.get('/api/ithc/diff?project_id=1&from=1.0&to=2.0&format=xlsx')
+    assert response.mimetype == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    rows = list(load_workbook(io.BytesIO(response.data)).active.values)
+    assert rows[0] == ('Software ID', 'Software Name', '1.0', '2.0', 'Status')
+    assert rows[1:] == [(2, 'Broker', '3', '4', 'changed'), (3, 'Cache', '5', None, 'removed'),
+                        (4, 'Daemon', None, '6', 'added')]
+
+def test_diff_validation(versions):
+    assert versions.get('/api/ithc/diff?project_id=1&from=1.0').status_code == 400
+    assert versions.get('/api/ithc/diff?project_id=1&from=1.0&to=2.0&format=csv').status_code == 400
+    assert versions.get('/api/ithc/diff?project_id=5&from=1.0&to=2.0').status_code == 404
@@ -0,0 +1,85 @@
+import json
+import threading
+import pytest
+from io import BytesIO
+from app import create_app
+from models.software import db
+from engine_profiles import engine_options
+from seed import generate_dataset, seed_database, write_workbook
+
+MYSQL_CONFIG = {'SQLALCHEMY_DATABASE_URI': 'mysql+pymysql://u:p@localhost/db', 'DB_POOL_SIZE': 4,
+                'DB_MAX_OVERFLOW': 2, 'DB_POOL_RECYCLE': 280, 'DB_POOL_PRE_PING': True}
+
+@pytest.fixture
+def file_app(tmp_path):
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "profile.db"}'})
+    with app.app_context():
+        db.create_all()
+    return app
+
+def pragma(name):
+    return db.session.execute(db.text(f'PRAGMA {name}')).scalar()
+
+def test_sqlite_pragmas_applied(file_app):
+    with file_app.app_context():
+        assert pragma('journal_mode') == 'wal'
+        assert pragma('synchronous') == 1  # NORMAL
+        assert pragma('busy_timeout') == 5000
+        assert pragma('cache_size') == -64000
+
+def test_sqlite_pragma_overrides(tmp_path):
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "o.db"}',
+                                 'SQLITE_PRAGMAS': {'busy_timeout': 15000}})
+    with app.app_context():
+        assert pragma('busy_timeout') == 15000
+        assert pragma('journal_mode') == 'wal'
+
+def test_default_profile_opts_out(tmp_path):
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "d.db"}',
+                                 'DB_ENGINE_PROFILE': 'default'})
+    with app.app_context():
+        assert pragma('journal_mode') == 'delete'
+
+def test_mysql_engine_options():
+    options = engine_options(MYSQL_CONFIG)
+    assert options == {'pool_size': 4, 'max_overflow': 2, 'pool_recycle': 280, 'pool_pre_ping': True}
+    assert engine_options({**MYSQL_CONFIG, 'DB_ENGINE_PROFILE': 'default'}) == {}
+    assert engine_options({**MYSQL_CONFIG, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'}) == {}
+
+def test_reads_during_import(file_app):
+    """Readers keep succeeding while another thread runs a long ITHC import"""
+    data = generate_dataset(seed=5, software=200, projects=10, versions=4, customers=5, components=10)
+    with file_app.app_context():
+        seed_database({**data, 'ithc': []})
+    workbook = BytesIO()
+    write_workbook('ithc', data, workbook)
+    workbook.seek(0)
+
+    failures = []
+    done = threading.Event()
+
+    def run_import():
+        try:
+            with file_app.test_client() as client:
+                response = client.post('/api/ithc/software/import',
+                                       data={'file': (workbook, 'concurrent.xlsx')},
+                                       content_type='multipart/form-data')
+                if response.status_code != 200 or json.loads(response.data)['imported'] != 400:
+                    failures.append(('import', response.status_code, response.data[:200]))
+        finally:
+            done.set()
+
+    def hammer_reads():
+        with file_app.test_client() as client:
+            while not done.is_set():
+                for url in ('/api/software', '/api/ithc/software?project_id=1&project_version=1.0.0'):
+                    response = client.get(url)
+                    if response.status_code != 200:
+                        failures.append((url, response.status_code, response.data[:200]))
+
+    threads = [threading.Thread(target=run_import)] + [threading.Thread(target=hammer_reads) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=120)
+    assert failures == []
@@ -0,0 +1,112 @@
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+import pytest
+import changes
+from app import create_app
+from models.software import db
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "events.db"}',
+                                 'EVENTS_POLL_INTERVAL': 0.02, 'EVENTS_HEARTBEAT': 0.2,
+                                 'EVENTS_STREAM_SECONDS': 3})
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+def read_events(response, count):
+    """Collect ``count`` change events from a streamed response."""
+    events = []
+    for chunk in response.response:
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if chunk.startswith('id: '):
+            lines = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+            events.append((int(lines['id']), lines['event'], json.loads(lines['data'])))
+            if len(events) == count:
+                break
+    response.close()
+    return events
+
+def add_software(client, name):
+    return client.post('/api/software', json={'name': name, 'software_type': 'Tool', 'latest_version': '1'}).get_json()
+
+def test_replays_from_last_event_id(app):
+    client = app.test_client()
+    for name in ('A', 'B', 'C'):
+        add_software(client, name)
+    response = client.get('/api/events', headers={'Last-Event-ID': '1'}, buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    assert 'Content-Encoding' not in response.headers
+    events = read_events(response, 2)
+    assert [(e[0], e[1], e[2]['entity'], e[2]['op']) for e in events] == \
+        [(2, 'change', 'software', 'insert'), (3, 'change', 'software', 'insert')]
+
+def test_live_events_filtered_by_project_version(app):
+    client = app.test_client()
+    software = add_software(client, 'Agent')
+    first = client.post('/api/projects', json={'name': 'First', 'software_version': '1.0'}).get_json()
+    second = client.post('/api/projects', json={'name': 'Second', 'software_version': '1.0'}).get_json()
+
+    response = client.get(f"/api/events?project_id={first['id']}&project_version=2.0&entities=ithc",
+                          buffered=False)
+    stream = iter(response.response)
+    assert next(stream).startswith(b'retry:')
+    for project, version in ((second, '2.0'), (first, '1.0'), (first, '2.0')):
+        assert client.post('/api/ithc/software', json={
+            'project_id': project['id'], 'software_id': software['id'],
+            'project_version': version, 'current_software_version': '1'}).status_code == 201
+    events = read_events(response, 1)
+    assert [(e[2]['project_id'], e[2]['project_version']) for e in events] == [(first['id'], '2.0')]
+    assert not app.extensions['change_events'].subscribers
+
+def test_stale_last_event_id_asks_for_resync(app):
+    app.config['CHANGES_PAGE_SIZE'] = 2
+    client = app.test_client()
+    for name in ('A', 'B', 'C', 'D'):
+        add_software(client, name)
+    response = client.get('/api/events', headers={'Last-Event-ID': '0'}, buffered=False)
+    chunks = iter(response.response)
+    next(chunks)
+    assert next(chunks).startswith(b'event: resync')
+    response.close()
+
+def test_last_event_id_before_full_prune_asks_for_resync(app):
+    client = app.test_client()
+    for name in ('A', 'B'):
+        add_software(client, name)
+    with app.app_context():
+        changes.prune(datetime.utcnow() + timedelta(days=1))
+    response = client.get('/api/events', headers={'Last-Event-ID': '1'}, buffered=False)
+    chunks = iter(response.response)
+    next(chunks)
+    assert next(chunks).startswith(b'event: resync')
+    response.close()
+
+def test_stream_limit(app):
+    app.config['EVENTS_MAX_CLIENTS'] = 1
+    client = app.test_client()
+    first = client.get('/api/events', buffered=False)
+    second = client.get('/api/events')
+    assert second.status_code == 503
+    assert second.headers['Retry-After'] == '5'
+    first.close()
+    third = client.get('/api/events', buffered=False)
+    assert third.status_code == 200
+    third.close()
+
+def test_debug_logging_does_not_buffer_stream(app):
+    app.config['DEBUG'] = True
+    app.logger.setLevel(logging.DEBUG)
+    client = app.test_client()
+    add_software(client, 'Agent')
+    start = time.monotonic()
+    response = client.get('/api/events', headers={'Last-Event-ID': '0'}, buffered=False)
+    events = read_events(response, 1)
+    # EVENTS_STREAM_SECONDS is 3: the event must arrive well before the stream closes
+    assert time.monotonic() - start < 2
+    assert events[0][2]['entity'] == 'software'
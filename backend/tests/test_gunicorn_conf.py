@@ -0,0 +1,62 @@
+import os
+import runpy
+from types import SimpleNamespace
+from unittest import mock
+import pytest
+from app import create_app
+from models.software import db
+
+CONF_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gunicorn.conf.py')
+
+@pytest.fixture
+def load_conf(monkeypatch):
+    def load(**env):
+        environ = {k: v for k, v in os.environ.items() if not k.startswith(('GUNICORN_', 'DB_', 'EVENTS_'))}
+        environ.update(env)
+        monkeypatch.setattr(os, 'environ', environ)
+        return runpy.run_path(CONF_PATH), environ
+    return load
+
+def test_defaults(load_conf):
+    conf, environ = load_conf()
+    assert conf['preload_app'] is True
+    assert conf['worker_class'] == 'sync'
+    assert conf['max_requests'] == 1000
+    assert conf['max_requests_jitter'] == 100
+    assert 1 <= conf['workers'] <= 8
+    assert environ['DB_POOL_SIZE'] == '1'
+    # A sync worker's only thread is kept for API requests
+    assert environ['EVENTS_MAX_CLIENTS'] == '0'
+
+def test_threaded_profile_sizes_pool(load_conf):
+    conf, environ = load_conf(GUNICORN_THREADS='8', GUNICORN_WORKERS='3')
+    assert conf['worker_class'] == 'gthread'
+    assert conf['workers'] == 3
+    assert environ['DB_POOL_SIZE'] == '8'
+    assert environ['DB_MAX_OVERFLOW'] == '4'
+    assert environ['EVENTS_MAX_CLIENTS'] == '4'
+
+def test_command_line_threads(load_conf):
+    conf, _ = load_conf(GUNICORN_THREADS='8')
+    server = SimpleNamespace(cfg=SimpleNamespace(threads=2), log=mock.Mock())
+    conf['on_starting'](server)
+    server.log.warning.assert_called_once()
+    app = create_app('testing')
+    conf['size_for_threads'](app, 2)
+    assert app.config['EVENTS_MAX_CLIENTS'] == 1
+    # An explicit cap is left alone
+    conf, _ = load_conf(GUNICORN_THREADS='8', EVENTS_MAX_CLIENTS='3')
+    app.config['EVENTS_MAX_CLIENTS'] = 3
+    conf['size_for_threads'](app, 2)
+    assert app.config['EVENTS_MAX_CLIENTS'] == 3
+
+def test_post_fork_disposes_engines(load_conf, tmp_path):
+    conf, _ = load_conf()
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "fork.db"}'})
+    with app.app_context():
+        engine = db.engine
+        engine.connect().close()
+        assert engine.pool.checkedin() == 1
+    conf['dispose_engines'](app)
+    with app.app_context():
+        assert db.engine.pool.checkedin() == 0
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+import pytest
+from models.software import db, ITHCHistory, ITHCSoftware
+import history
+
+@pytest.fixture
+def entry(client):
+    software = client.post('/api/software', json={'name': 'Agent', 'software_type': 'Tool',
+                                                  'latest_version': '3'}).get_json()
+    project = client.post('/api/projects', json={'name': 'Alpha', 'software_version': '1.0'}).get_json()
+    created = client.post('/api/ithc/software', json={
+        'project_id': project['id'], 'software_id': software['id'],
+        'project_version': '1.0', 'current_software_version': '1'}).get_json()
+    return created
+
+def snapshot(client, as_of=None, version='1.0'):
+    params = {'project_id': 1, 'project_version': version}
+    if as_of is not None:
+        params['as_of'] = as_of.isoformat()
+    response = client.get('/api/ithc/snapshot', query_string=params)
+    assert response.status_code == 200
+    return [(s['software_name'], s['current_software_version']) for s in response.get_json()['software']]
+
+def test_snapshot_as_of_past_times(client, entry):
+    client.put(f"/api/ithc/software/{entry['id']}", json={'current_software_version': '2'})
+    client.put(f"/api/ithc/software/{entry['id']}", json={'project_version': '2.0'})
+    client.delete(f"/api/ithc/software/{entry['id']}")
+    rows = ITHCHistory.query.order_by(ITHCHistory.id).all()
+    assert [(h.project_version, h.current_software_version) for h in rows] == \
+        [('1.0', '1'), ('1.0', '2'), ('1.0', None), ('2.0', '2'), ('2.0', None)]
+
+    # Spread the changes an hour apart: created, upgraded, moved to 2.0, deleted
+    start = datetime(2024, 1, 1)
+    for row, hours in zip(rows, (0, 1, 2, 2, 3)):
+        row.valid_from = start + timedelta(hours=hours)
+    db.session.commit()
+    at = lambda hours: start + timedelta(hours=hours)
+
+    assert snapshot(client, at(-1)) == []
+    assert snapshot(client, at(0)) == [('Agent', '1')]
+    assert snapshot(client, at(1.5)) == [('Agent', '2')]
+    assert snapshot(client, at(2)) == []
+    assert snapshot(client, at(2), version='2.0') == [('Agent', '2')]
+    assert snapshot(client, version='2.0') == []
+
+def test_unchanged_update_writes_no_history(client, entry):
+    client.put(f"/api/ithc/software/{entry['id']}", json={'current_software_version': '1'})
+    assert ITHCHistory.query.count() == 1
+
+def test_backfill_records_untracked_rows(client, entry):
+    db.session.execute(db.delete(ITHCHistory))
+    db.session.commit()
+    assert snapshot(client) == []
+    assert history.backfill() == 1
+    assert history.backfill() == 0
+    db.session.commit()
+    assert snapshot(client) == [('Agent', '1')]
+
+def test_snapshot_validation(client, entry):
+    assert client.get('/api/ithc/snapshot?project_id=1').status_code == 400
+    assert client.get('/api/ithc/snapshot?project_id=1&project_version=1.0&as_of=yesterday').status_code == 400
+    assert client.get('/api/ithc/snapshot?project_id=9&project_version=1.0').status_code == 404
+    aware = client.get('/api/ithc/snapshot?project_id=1&project_version=1.0&as_of=2999-01-01T00:00:00%2B02:00')
+    assert [s['current_software_version'] for s in aware.get_json()['software']] == ['1']
+
+def test_bulk_paths_record_history(client):
+    from seed import generate_dataset, seed_database
+    seed_database(generate_dataset(seed=6, software=10, projects=2, versions=2, customers=2, components=5))
+    total = ITHCSoftware.query.count()
+    assert ITHCHistory.query.count() == total
+    row = ITHCSoftware.query.filter_by(project_id=1).first()
+    # Seeded rows are dated from their own timestamps
+    assert ITHCHistory.query.filter_by(ithc_id=row.id).one().valid_from == row.updated_at
+
+    response = client.post('/api/ithc/software/bulk-delete', json={'project_id': 1})
+    removed = response.get_json()['deleted']['ithc']
+    assert ITHCHistory.query.filter(ITHCHistory.current_software_version.is_(None)).count() == removed
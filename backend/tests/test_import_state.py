@@ -0,0 +1,124 @@
+import io
+from datetime import datetime, timedelta
+import pandas as pd
+import pytest
+import changes
+from models.software import db, ChangeLog, Customer, ITHCSoftware, ImportRowHash, Project, Software
+from seed import generate_dataset, write_workbook
+
+DATA = generate_dataset(seed=8, software=15, projects=3, versions=2, customers=6, components=10)
+WORKBOOKS = {}
+
+def workbook(kind):
+    # Written once: workbooks carry a creation time, so rewriting changes the bytes
+    if kind not in WORKBOOKS:
+        output = io.BytesIO()
+        write_workbook(kind, DATA, output)
+        WORKBOOKS[kind] = output.getvalue()
+    return io.BytesIO(WORKBOOKS[kind])
+
+def upload(client, endpoint, kind, force=False, edit=None):
+    output = workbook(kind)
+    if edit:
+        frame = pd.read_excel(output, dtype=str)
+        edit(frame)
+        output = io.BytesIO()
+        frame.to_excel(output, index=False)
+        output.seek(0)
+    response = client.post(endpoint + ('?force=1' if force else ''),
+                           data={'file': (output, f'{kind}.xlsx')}, content_type='multipart/form-data')
+    assert response.status_code == 200
+    return response.get_json()
+
+@pytest.fixture
+def imported(client):
+    for kind, endpoint in (('software', '/api/software/import'), ('project', '/api/projects/import'),
+                           ('ithc', '/api/ithc/software/import')):
+        assert upload(client, endpoint, kind)['imported'] == len(DATA[kind])
+    return client
+
+def test_same_file_is_skipped(imported):
+    before = ChangeLog.query.count()
+    result = upload(imported, '/api/ithc/software/import', 'ithc')
+    assert result['message'] == 'File already imported'
+    assert result['unchanged'] == len(DATA['ithc'])
+    assert ChangeLog.query.count() == before
+
+def test_only_changed_rows_are_written(imported):
+    def bump(frame):
+        frame.loc[3, 'Current Version'] = '99.0.0'
+    before = ChangeLog.query.count()
+    result = upload(imported, '/api/ithc/software/import', 'ithc', edit=bump)
+    assert (result['updated'], result['unchanged']) == (1, len(DATA['ithc']) - 1)
+    assert ChangeLog.query.count() == before + 1
+    assert ITHCSoftware.query.filter_by(current_software_version='99.0.0').count() == 1
+
+def test_rows_changed_elsewhere_are_reimported(imported):
+    row = ITHCSoftware.query.first()
+    original = row.current_software_version
+    imported.put(f'/api/ithc/software/{row.id}', json={'current_software_version': 'edited'})
+    result = upload(imported, '/api/ithc/software/import', 'ithc')
+    assert (result['updated'], result['unchanged']) == (1, len(DATA['ithc']) - 1)
+    assert db.session.get(ITHCSoftware, row.id).current_software_version == original
+
+def test_edits_pruned_from_the_log_are_still_reimported(imported):
+    row = ITHCSoftware.query.first()
+    original = row.current_software_version
+    imported.put(f'/api/ithc/software/{row.id}', json={'current_software_version': 'edited'})
+    # The edit's entry is pruned with the rest, so the stored hashes cannot be trusted
+    changes.prune(datetime.utcnow() + timedelta(days=1))
+    assert ChangeLog.query.count() == 0
+    result = upload(imported, '/api/ithc/software/import', 'ithc')
+    assert result.get('message') != 'File already imported'
+    assert result['unchanged'] == 0
+    assert db.session.get(ITHCSoftware, row.id).current_software_version == original
+
+def test_force_reimports_everything(imported):
+    result = upload(imported, '/api/projects/import', 'project', force=True)
+    assert (result['updated'], result['unchanged']) == (len(DATA['project']), 0)
+    assert ImportRowHash.query.filter_by(kind='project').count() == len(DATA['project'])
+
+def test_customer_hashes_survive_formatting_noise(client):
+    rows = {'Name': ['Acme', 'Bolt'], 'Email': ['a@example.com', 'b@example.com']}
+    def post(frame):
+        output = io.BytesIO()
+        frame.to_excel(output, index=False)
+        output.seek(0)
+        return client.post('/api/customers/import', data={'file': (output, 'c.xlsx')},
+                           content_type='multipart/form-data').get_json()
+    assert post(pd.DataFrame(rows))['imported'] == 2
+    padded = pd.DataFrame({'Name': [' Acme ', 'Bolt'], 'Email': ['a@example.com', 'new@example.com'],
+                           'Contact Person': [None, None]})
+    result = post(padded)
+    assert (result['updated'], result['unchanged']) == (1, 1)
+    assert Customer.query.filter_by(name='Bolt').one().email == 'new@example.com'
+
+def test_rows_skipped_for_unknown_names_are_imported_later(client):
+    output = io.BytesIO()
+    pd.DataFrame({'Project Name': ['Alpha'], 'Project Version': ['1.0'], 'Software Name': ['Agent'],
+                  'Current Version': ['1.0']}).to_excel(output, index=False)
+    data = output.getvalue()
+    def post():
+        return client.post('/api/ithc/software/import', data={'file': (io.BytesIO(data), 'ithc.xlsx')},
+                           content_type='multipart/form-data').get_json()
+    assert post()['skipped'] == 1
+    client.post('/api/software', json={'name': 'Agent', 'software_type': 'Tool', 'latest_version': '1.0'})
+    client.post('/api/projects', json={'name': 'Alpha'})
+    result = post()
+    assert (result['message'], result['imported']) == ('Import successful', 1)
+    assert ITHCSoftware.query.count() == 1
+    assert post()['message'] == 'File already imported'
+
+def test_project_rows_with_unknown_software_are_applied_later(client):
+    output = io.BytesIO()
+    pd.DataFrame({'Name': ['Alpha'], 'Software Name': ['Agent'], 'Software Version': ['2.0']}).to_excel(
+        output, index=False)
+    data = output.getvalue()
+    def post():
+        return client.post('/api/projects/import', data={'file': (io.BytesIO(data), 'projects.xlsx')},
+                           content_type='multipart/form-data').get_json()
+    assert post()['imported'] == 1
+    client.post('/api/software', json={'name': 'Agent', 'software_type': 'Tool', 'latest_version': '2.0'})
+    assert post()['updated'] == 1
+    assert Project.query.one().software_version == '2.0'
+    assert Project.query.one().software_id == Software.query.one().id
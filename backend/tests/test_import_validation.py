@@ -0,0 +1,80 @@
+import io
+import pandas as pd
+import pytest
+from models.software import db, Customer, Project, Software, ITHCSoftware
+
+def workbook(rows):
+    output = io.BytesIO()
+    pd.DataFrame(rows).to_excel(output, index=False)
+    output.seek(0)
+    return output
+
+def dry_run(client, endpoint, rows):
+    response = client.post(f'{endpoint}?dry_run=1', data={'file': (workbook(rows), 'import.xlsx')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 200
+    return response.get_json()
+
+@pytest.fixture
+def existing(client):
+    db.session.add(Software(id=1, name='Agent', software_type='Tool', latest_version='1.0'))
+    db.session.add(Project(id=1, name='Alpha', software_version='1.0'))
+    db.session.add(Customer(id=1, name='Acme', email='a@example.com', contact_person='A'))
+    db.session.add(ITHCSoftware(project_id=1, software_id=1, project_version='1.0', current_software_version='1.0'))
+    db.session.commit()
+    return client
+
+def test_ithc_dry_run_report(existing):
+    report = dry_run(existing, '/api/ithc/software/import', {
+        'Project Name': ['Alpha', 'Alpha', 'Alpha', 'Beta', 'Alpha', 'Alpha'],
+        'Project Version': ['1.0', '2.0', '2.0', '1.0', '2.0', 'next'],
+        'Software Name': ['Agent', 'Agent', 'Agent', 'Agent', 'Ghost', 'Agent'],
+        'Current Version': ['1.1', '2.0', '2.1', '1.0', None, '1.0'],
+    })
+    assert (report['rows'], report['valid'], report['insert'], report['update']) == (6, 2, 1, 1)
+    assert [(e['row'], e['column'], e['message']) for e in report['errors']] == [
+        (4, 'Software Name', 'Duplicate of row 3'),
+        (5, 'Project Name', "Unknown project 'Beta'"),
+        (6, 'Current Version', 'Required value is missing'),
+        (6, 'Software Name', "Unknown software 'Ghost'"),
+        (7, 'Project Version', 'Invalid version format'),
+    ]
+    assert ITHCSoftware.query.count() == 1
+
+def test_software_dry_run_uses_importer_aliases(existing):
+    report = dry_run(existing, '/api/software/import', {
+        'Software': ['Agent', 'Broker', 'Cache'],
+        'Type': ['Tool', 'Service', None],
+        'Latest Version': ['2.0', 'v3.1rc1', '4'],
+    })
+    assert (report['valid'], report['insert'], report['update']) == (1, 1, 0)
+    assert [(e['row'], e['message']) for e in report['errors']] == [
+        (2, 'Software already exists'), (4, 'Required value is missing')]
+    assert Software.query.count() == 1
+
+def test_project_and_customer_dry_run(existing):
+    report = dry_run(existing, '/api/projects/import', {
+        'Name': ['Alpha', 'Beta'], 'Software Name': ['Agent', 'Nope'], 'Software Version': ['2.0', '1.0']})
+    assert (report['valid'], report['update']) == (1, 1)
+    assert report['errors'][0]['message'] == "Unknown software 'Nope'"
+
+    report = dry_run(existing, '/api/customers/import', {'Customer Name': ['Acme', 'Bolt', 'Bolt']})
+    assert (report['valid'], report['insert'], report['update']) == (2, 1, 1)
+    assert Customer.query.count() == 1
+
+def test_dry_run_missing_columns(existing):
+    report = dry_run(existing, '/api/ithc/software/import', {'Project Name': ['Alpha'], 'Version': ['1']})
+    assert report['missing_columns'] == ['Project Version', 'Software Name', 'Current Version']
+    assert report['valid'] == 0
+
+def test_dry_run_caps_error_list(existing):
+    existing.application.config['IMPORT_DRY_RUN_MAX_ERRORS'] = 5
+    report = dry_run(existing, '/api/customers/import', {'Name': ['Dup'] * 20})
+    assert report['error_count'] == 19
+    assert len(report['errors']) == 5
+
+def test_dry_run_unreadable_file(existing):
+    response = existing.post('/api/software/import?dry_run=1',
+                             data={'file': (io.BytesIO(b'not a workbook'), 'import.xlsx')},
+                             content_type='multipart/form-data')
+    assert response.status_code == 400
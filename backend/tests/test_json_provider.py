@@ -0,0 +1,82 @@
+import json
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+import pytest
+from app import create_app
+from models.software import db
+from json_provider import OrjsonProvider, StdlibJSONProvider, orjson
+from seed import generate_dataset, seed_database
+
+needs_orjson = pytest.mark.skipif(orjson is None, reason='orjson is not installed')
+
+SAMPLES = [
+    {'naive': datetime(2024, 2, 29, 13, 5, 9), 'micro': datetime(2024, 1, 1, 0, 0, 0, 120)},
+    {'utc': datetime(2024, 6, 1, 8, 30, tzinfo=timezone.utc),
+     'offset': datetime(2024, 6, 1, 8, 30, tzinfo=timezone(timedelta(hours=5, minutes=30)))},
+    {'date': date(1999, 12, 31), 'none': None, 'flag': True},
+    {'decimal': Decimal('12.340'), 'uuid': uuid.UUID(int=1)},
+    {'unicode': 'Grüße – 日本語  ', 'escapes': 'quote " backslash \\ tab \t'},
+    {3: 'int keys', 1: [1, 2.5, -0.0, 10 ** 15]},
+    [{'nested': {'list': [{'z': 1, 'a': 2}]}}, [], {}],
+    {'big': 2 ** 70},
+]
+
+def stdlib_app():
+    return create_app('testing', {'JSON_PROVIDER': 'stdlib'})
+
+def orjson_app():
+    return create_app('testing', {'JSON_PROVIDER': 'orjson'})
+
+def test_stdlib_provider_formats_iso_dates():
+    app = stdlib_app()
+    assert isinstance(app.json, StdlibJSONProvider)
+    assert json.loads(app.json.dumps({'at': datetime(2024, 1, 2, 3, 4, 5)})) == {'at': '2024-01-02T03:04:05'}
+
+@needs_orjson
+def test_auto_prefers_orjson():
+    assert isinstance(create_app('testing').json, OrjsonProvider)
+
+@needs_orjson
+@pytest.mark.parametrize('value', SAMPLES)
+def test_dumps_equivalent(value):
+    expected = json.loads(stdlib_app().json.dumps(value))
+    assert json.loads(orjson_app().json.dumps(value)) == expected
+
+@needs_orjson
+def test_rows_serialize_like_tuples():
+    app = orjson_app()
+    with app.app_context():
+        row = db.session.execute(db.text("SELECT 1 AS id, 'x' AS name")).first()
+    assert json.loads(app.json.dumps([row])) == json.loads(stdlib_app().json.dumps([row])) == [[1, 'x']]
+
+@needs_orjson
+def test_response_is_bytes_with_json_mimetype():
+    app = orjson_app()
+    with app.app_context():
+        response = app.json.response({'b': 1, 'a': [datetime(2024, 1, 1)]})
+    assert response.mimetype == 'application/json'
+    assert response.get_data() == b'{"a":["2024-01-01T00:00:00"],"b":1}'
+
+@needs_orjson
+def test_debug_responses_are_indented():
+    app = create_app('testing', {'JSON_PROVIDER': 'orjson', 'DEBUG': True})
+    app.debug = True
+    with app.app_context():
+        data = app.json.response({'a': 1}).get_data()
+    assert data == b'{\n  "a": 1\n}\n'
+
+@needs_orjson
+@pytest.mark.parametrize('url', ['/api/software', '/api/projects', '/api/customers', '/api/ithc/software',
+                                 '/api/software/search?q=Acme'])
+def test_api_listings_equivalent(url):
+    bodies = []
+    for app in (stdlib_app(), orjson_app()):
+        with app.app_context():
+            db.create_all()
+            seed_database(generate_dataset(seed=3, software=30, projects=4, versions=2, customers=8, components=6))
+            bodies.append(json.loads(app.test_client().get(url).get_data()))
+            db.session.remove()
+            db.drop_all()
+    assert bodies[0] == bodies[1]
+    assert bodies[0]
@@ -0,0 +1,48 @@
+import threading
+import pytest
+from werkzeug.serving import make_server
+from loadtest import parse_mix, percentile, run_load, Stats
+from seed import generate_dataset, seed_database
+
+def test_parse_mix():
+    assert parse_mix('read=60, search=20,import=5') == {'read': 60.0, 'search': 20.0, 'import': 5.0}
+    assert parse_mix('ithc_edit') == {'ithc_edit': 1.0}
+    with pytest.raises(ValueError):
+        parse_mix('delete=10')
+    with pytest.raises(ValueError):
+        parse_mix('read=0')
+
+def test_percentile():
+    values = sorted(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 100) == 100
+    assert percentile([], 95) == 0.0
+
+def test_stats_summary():
+    stats = Stats()
+    stats.record('GET /api/software', 0.010, True)
+    stats.record('GET /api/software', 0.030, False, lock_timeout=True)
+    stats.record('GET /api/software', 0.001, False, rejected=True)
+    report = stats.summary()['endpoints']['GET /api/software']
+    assert report['requests'] == 3
+    assert report['p95_ms'] == 30.0
+    assert report['error_rate'] == 0.6667
+    assert report['lock_timeout_rate'] == 0.3333
+    assert report['rejected_rate'] == 0.3333
+
+def test_run_load_against_server(client):
+    """Replay a short mix against a real WSGI server"""
+    seed_database(generate_dataset(seed=3, software=10, projects=2, versions=2, customers=4, components=3))
+    server = make_server('127.0.0.1', 0, client.application)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        summary = run_load(f'http://127.0.0.1:{server.server_port}',
+                           parse_mix('read=5,search=3,ithc_edit=2,import=1'),
+                           clients=3, requests_per_client=8, import_rows=5)
+    finally:
+        server.shutdown()
+    endpoints = summary['endpoints']
+    assert sum(row['requests'] for row in endpoints.values()) == 24
+    assert all(row['error_rate'] == 0 for row in endpoints.values())
@@ -0,0 +1,44 @@
+import io
+import pytest
+from openpyxl import load_workbook
+from models.software import db, Customer, Project, Software, ITHCSoftware
+
+@pytest.fixture
+def deployments(client):
+    alpha = Project(id=1, name='Alpha', software_version='1.10')
+    beta = Project(id=2, name='beta', software_version='1.0')
+    db.session.add_all([alpha, beta])
+    db.session.add(Software(id=1, name='Agent', software_type='Tool', latest_version='3'))
+    db.session.add(Software(id=2, name='Broker', software_type='Service', latest_version='5'))
+    db.session.add(Customer(id=1, name='Acme', email='a@example.com', contact_person='A', projects=[beta]))
+    for project_id, project_version, software_id, version in ((1, '1.10', 1, '3'), (1, '1.9', 1, '2'),
+                                                              (1, '1.9', 2, '4'), (2, '1.0', 2, '5')):
+        db.session.add(ITHCSoftware(project_id=project_id, software_id=software_id,
+                                    project_version=project_version, current_software_version=version))
+    db.session.commit()
+    return client
+
+def test_matrix_columnar_json(deployments):
+    matrix = deployments.get('/api/ithc/matrix').get_json()
+    assert matrix['columns'] == {'project_id': [1, 1, 2], 'project_name': ['Alpha', 'Alpha', 'beta'],
+                                 'project_version': ['1.9', '1.10', '1.0']}
+    assert matrix['rows'] == {'software_id': [1, 2], 'software_name': ['Agent', 'Broker'],
+                              'software_type': ['Tool', 'Service'], 'latest_version': ['3', '5']}
+    assert matrix['values'] == [['2', '3', None], ['4', None, '5']]
+
+def test_matrix_filters(deployments):
+    by_type = deployments.get('/api/ithc/matrix?software_type=Service').get_json()
+    assert by_type['rows']['software_name'] == ['Broker']
+    assert by_type['columns']['project_version'] == ['1.9', '1.0']
+    by_customer = deployments.get('/api/ithc/matrix?customer_id=1').get_json()
+    assert by_customer['values'] == [['5']]
+    empty = deployments.get('/api/ithc/matrix?customer_id=99').get_json()
+    assert empty['values'] == [] and empty['columns']['project_id'] == []
+
+def test_matrix_xlsx(deployments):
+    response = deployments.get('/api/ithc/matrix?format=xlsx')
+    rows = list(load_workbook(io.BytesIO(response.data)).active.values)
+    assert rows == [('Software', 'Type', 'Latest Version', 'Alpha 1.9', 'Alpha 1.10', 'beta 1.0'),
+                    ('Agent', 'Tool', '3', '2', '3', None),
+                    ('Broker', 'Service', '5', '4', None, '5')]
+    assert deployments.get('/api/ithc/matrix?format=pdf').status_code == 400
@@ -0,0 +1,116 @@
+import os
+import pytest
+from app import create_app, init_migrations
+from models.software import db
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+INDEX = 'ix_release_project_id_release_date'
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "migrate.db"}'})
+    init_migrations(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+def release_indexes():
+    return {index['name'] for index in db.inspect(db.engine).get_indexes('release')}
+
+def test_upgrade_adds_missing_index_and_is_idempotent(app):
+    from flask_migrate import downgrade, upgrade
+
+    with app.app_context():
+        db.session.execute(db.text(f'DROP INDEX {INDEX}'))
+        db.session.commit()
+        upgrade(directory=MIGRATIONS)
+        assert INDEX in release_indexes()
+        downgrade(directory=MIGRATIONS, revision='base')
+        assert INDEX not in release_indexes()
+        upgrade(directory=MIGRATIONS)
+        upgrade(directory=MIGRATIONS)
+        assert INDEX in release_indexes()
+
+def test_upgrade_on_database_from_init_db(app):
+    from flask_migrate import upgrade
+
+    with app.app_context():
+        assert INDEX in release_indexes()
+        upgrade(directory=MIGRATIONS)
+        assert INDEX in release_indexes()
+
+def foreign_key_actions(table):
+    return {fk['constrained_columns'][0]: fk['options'].get('ondelete')
+            for fk in db.inspect(db.engine).get_foreign_keys(table)}
+
+def test_ondelete_migration_rebuilds_old_schema(app):
+    from flask_migrate import downgrade, upgrade
+
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+        downgrade(directory=MIGRATIONS, revision='0001')
+        assert foreign_key_actions('ithc_software') == {'project_id': None, 'software_id': None}
+        with db.engine.connect() as connection:
+            connection.exec_driver_sql('PRAGMA foreign_keys=OFF')
+            connection.exec_driver_sql("INSERT INTO software (id, name, software_type) VALUES (1, 'S', 'T')")
+            connection.exec_driver_sql("INSERT INTO project (id, name, software_id) VALUES (1, 'Kept', 1), (2, 'Dangling', 99)")
+            connection.exec_driver_sql("INSERT INTO release (id, version, project_id) VALUES (1, '1.0', 1), (2, '1.0', 42)")
+            connection.exec_driver_sql("INSERT INTO ithc_software (id, project_id, software_id, project_version, "
+                                       "current_software_version) VALUES (1, 1, 1, '1', '1'), (2, 1, 77, '1', '1')")
+            connection.commit()
+
+        upgrade(directory=MIGRATIONS)
+        assert foreign_key_actions('ithc_software') == {'project_id': 'CASCADE', 'software_id': 'CASCADE'}
+        assert foreign_key_actions('release') == {'project_id': 'CASCADE'}
+        assert foreign_key_actions('project') == {'software_id': 'SET NULL'}
+        assert foreign_key_actions('project_customer') == {'project_id': 'CASCADE', 'customer_id': 'CASCADE'}
+        query = lambda sql: db.session.execute(db.text(sql)).all()
+        assert query('SELECT id FROM release') == [(1,)]
+        assert query('SELECT id FROM ithc_software') == [(1,)]
+        assert query('SELECT id, software_id FROM project ORDER BY id') == [(1, 1), (2, None)]
+
+        # The rebuilt constraints act on plain SQL deletes
+        db.session.execute(db.text('DELETE FROM project WHERE id = 1'))
+        db.session.commit()
+        assert query('SELECT COUNT(*) FROM release') == [(0,)]
+        assert query('SELECT COUNT(*) FROM ithc_software') == [(0,)]
+
+def test_archive_migration(app):
+    from flask_migrate import downgrade, upgrade
+
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+        downgrade(directory=MIGRATIONS, revision='0002')
+        tables = set(db.inspect(db.engine).get_table_names())
+        assert not {'ithc_software_archive', 'release_archive'} & tables
+        upgrade(directory=MIGRATIONS)
+        inspector = db.inspect(db.engine)
+        assert {'ithc_software_archive', 'release_archive'} <= set(inspector.get_table_names())
+        assert 'ix_ithc_software_project_id_project_version' in \
+            {index['name'] for index in inspector.get_indexes('ithc_software')}
+
+def test_change_log_migration(app):
+    from flask_migrate import downgrade, upgrade
+    import changes
+    from models.software import ChangeLog
+
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+        downgrade(directory=MIGRATIONS, revision='0005')
+        assert not {'change_log', 'change_log_prune'} & set(db.inspect(db.engine).get_table_names())
+        upgrade(directory=MIGRATIONS)
+        indexes = {index['name'] for index in db.inspect(db.engine).get_indexes('change_log')}
+        assert 'ix_change_log_project_id' in indexes
+        assert changes.pruned_through() == 0
+
+        # A log pruned before the watermark existed starts expiring tokens below its oldest entry
+        downgrade(directory=MIGRATIONS, revision='0005')
+        ChangeLog.__table__.create(db.engine)
+        db.session.execute(db.text("INSERT INTO change_log (id, entity, entity_id, op, changed_at) "
+                                   "VALUES (5, 'software', 1, 'insert', '2026-01-01'), "
+                                   "(6, 'software', 2, 'insert', '2026-01-01')"))
+        db.session.commit()
+        upgrade(directory=MIGRATIONS)
+        upgrade(directory=MIGRATIONS)
+        assert changes.pruned_through() == 4
+        assert changes.log_covers(4) and not changes.log_covers(3)
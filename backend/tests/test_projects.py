@@ -2,11 +2,13 @@ import pytest
 import json
 from datetime import datetime
 from app import create_app
-from models.software import Software
+from models.software import db, Software
 
 @pytest.fixture
 def app():
     app = create_app('testing')
+    with app.app_context():
+        db.create_all()
     return app
 
 @pytest.fixture
@@ -183,4 +185,66 @@ def test_project_customer_validation(client):
     project_id = json.loads(project_response.data)['id']
     
     response = client.post(f'/api/projects/{project_id}/customers/99999')
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+
+def test_list_releases_paged_by_version(client):
+    project_id = client.post('/api/projects', json={'name': 'Paged Project'}).get_json()['id']
+    for version in ['1.9', '1.10', '2.0rc1', '2.0', '1.2']:
+        client.post(f'/api/projects/{project_id}/releases', json={'version': version})
+
+    first = client.get(f'/api/projects/{project_id}/releases?per_page=2').get_json()
+    assert [r['version'] for r in first['items']] == ['2.0', '2.0rc1']
+    assert (first['total'], first['pages'], first['page']) == (5, 3, 1)
+    last = client.get(f'/api/projects/{project_id}/releases?per_page=2&page=3').get_json()
+    assert [r['version'] for r in last['items']] == ['1.2']
+    ascending = client.get(f'/api/projects/{project_id}/releases?order=asc').get_json()
+    assert [r['version'] for r in ascending['items']] == ['1.2', '1.9', '1.10', '2.0rc1', '2.0']
+    by_date = client.get(f'/api/projects/{project_id}/releases?sort=date').get_json()
+    assert by_date['items'][0]['version'] == '1.2'
+
+    assert client.get(f'/api/projects/{project_id}/releases?sort=name').status_code == 400
+    assert client.get('/api/projects/999/releases').status_code == 404
+
+
+def test_project_payload_summarizes_releases(client):
+    project_id = client.post('/api/projects', json={'name': 'Summary Project'}).get_json()['id']
+    project = client.get(f'/api/projects/{project_id}').get_json()
+    assert 'releases' not in project
+    assert (project['release_count'], project['latest_release']) == (0, None)
+
+    client.post(f'/api/projects/{project_id}/releases', json={'version': '1.0'})
+    latest = client.post(f'/api/projects/{project_id}/releases', json={'version': '1.1'}).get_json()
+    for project in (client.get(f'/api/projects/{project_id}').get_json(), client.get('/api/projects').get_json()[-1]):
+        assert project['release_count'] == 2
+        assert project['latest_release']['id'] == latest['id']
+        assert project['latest_release']['version'] == '1.1'
+
+
+def test_release_summary_is_one_query_and_not_nested_in_ithc_rows(client):
+    from models.software import ITHCSoftware, Project
+
+    project_id = client.post('/api/projects', json={'name': 'Counted Project'}).get_json()['id']
+    for version in ('1.0', '1.1'):
+        client.post(f'/api/projects/{project_id}/releases', json={'version': version})
+    software_id = client.post('/api/software', json={'name': 'Counted Tool', 'software_type': 'Tool',
+                                                     'latest_version': '1'}).get_json()['id']
+    ithc_id = client.post('/api/ithc/software', json={'project_id': project_id, 'software_id': software_id,
+                                                      'project_version': '1.0',
+                                                      'current_software_version': '1'}).get_json()['id']
+
+    statements = []
+    record = lambda conn, cursor, statement, *args: statements.append(statement)
+    with client.application.app_context():
+        project = db.session.get(Project, project_id)
+        project.to_dict(releases=False)
+        db.event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            summary = project.to_dict()
+        finally:
+            db.event.remove(db.engine, 'before_cursor_execute', record)
+        assert (summary['release_count'], summary['latest_release']['version']) == (2, '1.1')
+        assert len(statements) == 1
+        assert 'release_count' not in db.session.get(ITHCSoftware, ithc_id).to_dict()['project']
+    assert 'release_count' not in client.get(f'/api/ithc/software/{ithc_id}').get_json()['project']
+    assert 'release_count' not in client.get('/api/ithc/software').get_json()[0]['project']
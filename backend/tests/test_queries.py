@@ -0,0 +1,73 @@
+import pytest
+import queries
+from models.software import db, Software, Project, Customer, ITHCSoftware
+from seed import generate_dataset, seed_database
+
+def normalized(items):
+    """Sort nested release/customer lists so both paths compare equal regardless of row order"""
+    result = []
+    for item in sorted(items, key=lambda i: i['id']):
+        item = dict(item)
+        for key in ('releases', 'customers'):
+            if key in item:
+                item[key] = sorted(item[key], key=lambda i: i['id'])
+        if item.get('project'):
+            item['project'] = normalized([item['project']])[0]
+        result.append(item)
+    return result
+
+@pytest.fixture
+def seeded(client):
+    seed_database(generate_dataset(seed=11, software=40, projects=6, versions=3, customers=12, components=8))
+    client.post('/api/projects', json={'name': 'No Software Project'})
+    return client
+
+def test_software_dicts_match_orm(seeded):
+    assert normalized(queries.software_dicts()) == normalized([s.to_dict() for s in Software.query.all()])
+    condition = Software.name.ilike('%Acme%')
+    assert normalized(queries.software_dicts(condition)) == \
+        normalized([s.to_dict() for s in Software.query.filter(condition).all()])
+
+def test_customer_dicts_match_orm(seeded):
+    assert normalized(queries.customer_dicts()) == normalized([c.to_dict() for c in Customer.query.all()])
+
+def test_project_dicts_match_orm(seeded):
+    assert normalized(queries.project_dicts()) == normalized([p.to_dict() for p in Project.query.all()])
+    condition = Project.name.ilike('%Borealis%')
+    assert normalized(queries.project_dicts(condition)) == \
+        normalized([p.to_dict() for p in Project.query.filter(condition).all()])
+
+def test_ithc_dicts_match_orm(seeded):
+    assert normalized(queries.ithc_dicts()) == normalized([i.to_dict() for i in ITHCSoftware.query.all()])
+    condition = ITHCSoftware.project_id == 2
+    assert normalized(queries.ithc_dicts(condition)) == \
+        normalized([i.to_dict() for i in ITHCSoftware.query.filter(condition).all()])
+
+def test_empty_tables(client):
+    assert queries.software_dicts() == []
+    assert queries.project_dicts() == []
+    assert queries.ithc_dicts() == []
+
+def test_ithc_bootstrap_lists_versions(seeded):
+    bundle = seeded.get('/api/ithc/bootstrap').get_json()
+    assert len(bundle['projects']) == Project.query.count()
+    assert len(bundle['software']) == Software.query.count()
+    for entry in bundle['projects']:
+        project = db.session.get(Project, entry['id'])
+        expected = [project.software_version] if project.software_version else []
+        for release in sorted(project.releases, key=lambda r: r.id):
+            if release.version not in expected:
+                expected.append(release.version)
+        assert entry == {'id': project.id, 'name': project.name,
+                         'software_version': project.software_version, 'versions': expected}
+    assert set(bundle['software'][0]) == {'id', 'name', 'latest_version'}
+
+def test_ithc_bootstrap_revalidates_with_etag(seeded):
+    response = seeded.get('/api/ithc/bootstrap')
+    assert response.headers['Cache-Control'] == 'no-cache'
+    etag = response.headers['ETag']
+    assert seeded.get('/api/ithc/bootstrap', headers={'If-None-Match': etag}).status_code == 304
+    gzipped = seeded.get('/api/ithc/bootstrap', headers={'Accept-Encoding': 'gzip'})
+    assert seeded.get('/api/ithc/bootstrap', headers={'If-None-Match': gzipped.headers['ETag']}).status_code == 304
+    assert seeded.post('/api/software', json={'name': 'New Tool', 'software_type': 'Tool', 'latest_version': '1.0'}).status_code == 201
+    assert seeded.get('/api/ithc/bootstrap', headers={'If-None-Match': etag}).status_code == 200
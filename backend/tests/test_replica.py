@@ -0,0 +1,83 @@
+import json
+import os
+import time
+import pytest
+from app import create_app
+from models.software import db, Software
+
+@pytest.fixture
+def replica_app(tmp_path):
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "primary.db"}',
+        'READ_REPLICA_SNAPSHOT': str(tmp_path / 'replica.db'),
+        'READ_REPLICA_MAX_STALENESS': 60,
+    })
+    with app.app_context():
+        db.create_all()
+    return app
+
+def add_software(client, name):
+    response = client.post('/api/software', json={'name': name, 'software_type': 'App', 'latest_version': '1.0'})
+    assert response.status_code == 201
+    return json.loads(response.data)['id']
+
+def names(response):
+    return [s['name'] for s in json.loads(response.data)]
+
+def refresh(app):
+    with app.app_context():
+        app.extensions['read_replica'].refresh()
+
+def test_missing_snapshot_reads_primary(replica_app):
+    client = replica_app.test_client()
+    add_software(client, 'Fresh')
+    assert names(client.get('/api/software')) == ['Fresh']
+
+def test_routed_reads_use_snapshot(replica_app):
+    client = replica_app.test_client()
+    add_software(client, 'Old')
+    refresh(replica_app)
+    new_id = add_software(client, 'New')
+
+    # Routed list endpoint reads the snapshot, unrouted lookups read the primary
+    assert names(client.get('/api/software')) == ['Old']
+    assert client.get(f'/api/software/{new_id}').status_code == 200
+
+    refresh(replica_app)
+    assert names(client.get('/api/software')) == ['Old', 'New']
+
+def test_stale_snapshot_falls_back_to_primary(replica_app):
+    client = replica_app.test_client()
+    add_software(client, 'Old')
+    refresh(replica_app)
+    add_software(client, 'New')
+    old = time.time() - 120
+    os.utime(replica_app.config['READ_REPLICA_SNAPSHOT'], (old, old))
+    assert names(client.get('/api/software')) == ['Old', 'New']
+
+def test_read_after_write_stays_on_primary(replica_app):
+    client = replica_app.test_client()
+    add_software(client, 'Old')
+    refresh(replica_app)
+    with replica_app.test_request_context('/api/software'):
+        db.session.info['use_replica'] = True
+        assert db.session.get_bind(Software) is replica_app.extensions['read_replica'].engine
+        assert [s.name for s in Software.query.all()] == ['Old']
+
+        db.session.add(Software(name='Written', software_type='App', latest_version='1.0'))
+        db.session.flush()
+        assert db.session.get_bind(Software) is db.engines[None]
+        assert [s.name for s in Software.query.order_by(Software.id).all()] == ['Old', 'Written']
+        db.session.rollback()
+
+def test_snapshot_is_read_only(replica_app):
+    refresh(replica_app)
+    with replica_app.app_context():
+        with replica_app.extensions['read_replica'].engine.connect() as connection:
+            with pytest.raises(Exception):
+                connection.execute(db.text("DELETE FROM software"))
+
+def test_refresh_replica_command(replica_app):
+    result = replica_app.test_cli_runner().invoke(args=['refresh-replica'])
+    assert result.exit_code == 0, result.output
+    assert os.path.exists(replica_app.config['READ_REPLICA_SNAPSHOT'])
@@ -0,0 +1,106 @@
+import json
+import pytest
+from io import BytesIO
+from openpyxl import load_workbook
+from models.software import db, Software, Project, Release, Customer, ITHCSoftware, project_customer
+from seed import generate_dataset, seed_database, write_workbook, WORKBOOK_HEADERS
+
+SMALL = dict(seed=7, software=20, projects=4, versions=3, customers=10, components=5)
+
+def test_generate_dataset_is_deterministic():
+    """Same seed and sizes produce identical rows"""
+    assert generate_dataset(**SMALL) == generate_dataset(**SMALL)
+    assert generate_dataset(**SMALL) != generate_dataset(**{**SMALL, 'seed': 8})
+
+def test_generate_dataset_sizes():
+    """Row counts follow the requested sizes"""
+    data = generate_dataset(**SMALL)
+    assert len(data['software']) == 20
+    assert len(data['project']) == 4
+    assert len(data['release']) == 4 * 3
+    assert len(data['customer']) == 10
+    assert len(data['project_customer']) == 4 * 3
+    assert len(data['ithc']) == 4 * 3 * 5
+    assert len({s['name'] for s in data['software']}) == 20
+
+def test_seed_database(client):
+    """Seeding bulk inserts every table"""
+    counts = seed_database(generate_dataset(**SMALL))
+    assert counts['ithc'] == 60
+    assert Software.query.count() == 20
+    assert Project.query.count() == 4
+    assert Release.query.count() == 12
+    assert Customer.query.count() == 10
+    assert ITHCSoftware.query.count() == 60
+    assert db.session.execute(db.select(db.func.count()).select_from(project_customer)).scalar() == 12
+
+    response = client.get('/api/ithc/software')
+    assert response.status_code == 200
+    assert len(json.loads(response.data)) == 60
+
+def test_seed_database_shifts_ids(client, sample_software, sample_project):
+    """Seeding into a populated database appends rows instead of colliding on ids"""
+    client.post('/api/software', json=sample_software)
+    client.post('/api/projects', json=sample_project)
+    seed_database(generate_dataset(**SMALL))
+    assert Software.query.count() == 21
+    assert Project.query.count() == 5
+    assert Release.query.filter(Release.project_id == 1).count() == 0
+    assert ITHCSoftware.query.filter(ITHCSoftware.software_id == 1).count() == 0
+
+def test_seed_database_twice(client):
+    """Names move with the shifted ids, so a second dataset does not collide with the first"""
+    seed_database(generate_dataset(**SMALL))
+    seed_database(generate_dataset(**{**SMALL, 'seed': 9}))
+    assert Software.query.count() == 40
+    assert db.session.get(Software, 21).name.endswith(' 00021')
+    project = db.session.get(Project, 5)
+    assert project.name.endswith(' 00005')
+    assert all(r.notes.endswith(project.name) for r in Release.query.filter_by(project_id=5))
+
+@pytest.mark.parametrize('kind', sorted(WORKBOOK_HEADERS))
+def test_write_workbook(kind):
+    """Workbooks carry the importer headers and one row per entity"""
+    data = generate_dataset(**SMALL)
+    output = BytesIO()
+    count = write_workbook(kind, data, output)
+    output.seek(0)
+    rows = list(load_workbook(output).active.iter_rows(values_only=True))
+    assert list(rows[0]) == WORKBOOK_HEADERS[kind]
+    assert len(rows) == count + 1
+
+def test_generated_workbooks_import(client):
+    """Generated workbooks load through the import endpoints"""
+    data = generate_dataset(**SMALL)
+    expected = {'software': 20, 'project': 4, 'customer': 10, 'ithc': 60}
+    endpoints = {
+        'software': '/api/software/import',
+        'project': '/api/projects/import',
+        'customer': '/api/customers/import',
+        'ithc': '/api/ithc/software/import',
+    }
+    for kind in ['software', 'project', 'customer', 'ithc']:
+        output = BytesIO()
+        write_workbook(kind, data, output)
+        output.seek(0)
+        response = client.post(endpoints[kind],
+                               data={'file': (output, f'{kind}.xlsx')},
+                               content_type='multipart/form-data')
+        assert response.status_code == 200
+        assert json.loads(response.data)['imported'] == expected[kind]
+
+def test_cli_commands(client, tmp_path):
+    """flask seed and flask gen-workbook run through the CLI"""
+    runner = client.application.test_cli_runner()
+    result = runner.invoke(args=['seed', '--seed', '7', '--software', '20', '--projects', '4',
+                                 '--versions', '3', '--customers', '10', '--components', '5'])
+    assert result.exit_code == 0, result.output
+    assert 'ithc: 60' in result.output
+    assert ITHCSoftware.query.count() == 60
+
+    output = tmp_path / 'ithc.xlsx'
+    result = runner.invoke(args=['gen-workbook', 'ithc', str(output), '--seed', '7', '--software', '20',
+                                 '--projects', '4', '--versions', '3', '--customers', '10',
+                                 '--components', '5'])
+    assert result.exit_code == 0, result.output
+    assert load_workbook(output).active.max_row == 61
@@ -5,10 +5,13 @@ from io import BytesIO
 import pandas as pd
 from app import create_app
 from backend.models.software import Software  # Updated import path
+from models.software import db
 
 @pytest.fixture
 def app():
     app = create_app('testing')
+    with app.app_context():
+        db.create_all()
     return app
 
 @pytest.fixture
@@ -93,6 +96,19 @@ def test_import_excel(client):
     data = json.loads(response.data)
     assert data['imported'] == 2
 
+@pytest.mark.parametrize('endpoint', ['/api/software/import', '/api/projects/import', '/api/customers/import',
+                                      '/api/ithc/software/import'])
+def test_import_reports_upload_errors(app, client, tmp_path, endpoint):
+    # The upload folder cannot be created under a regular file
+    (tmp_path / 'blocker').write_text('')
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'blocker' / 'uploads')
+    excel_file = BytesIO()
+    pd.DataFrame({'name': ['Unsaved']}).to_excel(excel_file, index=False)
+    excel_file.seek(0)
+    response = client.post(endpoint, data={'file': (excel_file, 'test.xlsx')}, content_type='multipart/form-data')
+    assert response.status_code == 500
+    assert 'Error processing file' in response.get_json()['error']
+
 def test_invalid_software_data(client):
     invalid_data = {
         'name': '',  # Empty name should be invalid
@@ -0,0 +1,63 @@
+import json
+import os
+import subprocess
+import sys
+from app import create_app
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Importing app.py should stay well under this, leaving headroom for slow CI agents
+IMPORT_BUDGET_SECONDS = 1.0
+
+IMPORT_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+heavy = [m for m in ('openpyxl', 'pandas', 'alembic', 'flask_migrate') if m in sys.modules]
+print(json.dumps({'elapsed': elapsed, 'heavy': heavy, 'config': app.app.config['SQLALCHEMY_DATABASE_URI']}))
+'''
+
+def run_import_probe(env):
+    result = subprocess.run([sys.executable, '-c', IMPORT_PROBE], cwd=BACKEND_DIR,
+                            env={**os.environ, **env}, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_import_has_no_side_effects(tmp_path):
+    """Importing app.py neither creates the database nor the upload folder"""
+    db_file = tmp_path / 'startup.db'
+    uploads = tmp_path / 'uploads'
+    probe = run_import_probe({'DATABASE_URL': f'sqlite:///{db_file}', 'UPLOAD_FOLDER': str(uploads),
+                              'APP_CONFIG': 'production'})
+    assert probe['config'] == f'sqlite:///{db_file}'
+    assert not db_file.exists()
+    assert not uploads.exists()
+
+def test_import_time_budget(tmp_path):
+    """Heavy modules are deferred and the import stays within budget"""
+    probe = run_import_probe({'DATABASE_URL': f'sqlite:///{tmp_path / "startup.db"}'})
+    assert probe['heavy'] == []
+    assert probe['elapsed'] < IMPORT_BUDGET_SECONDS
+
+def test_config_selected_from_environment(monkeypatch):
+    monkeypatch.setenv('APP_CONFIG', 'production')
+    monkeypatch.setenv('DATABASE_URL', 'sqlite:////tmp/ithc-prod.db')
+    app = create_app()
+    assert not app.debug
+    assert app.config['SQLALCHEMY_DATABASE_URI'] == 'sqlite:////tmp/ithc-prod.db'
+
+    monkeypatch.setenv('TEST_DATABASE_URL', 'sqlite:////tmp/ithc-test.db')
+    app = create_app('testing')
+    assert app.testing
+    assert app.config['SQLALCHEMY_DATABASE_URI'] == 'sqlite:////tmp/ithc-test.db'
+
+def test_init_db_command(tmp_path):
+    """Schema creation happens through flask init-db, not create_app"""
+    db_file = tmp_path / 'init.db'
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_file}'})
+    assert not db_file.exists()
+    result = app.test_cli_runner().invoke(args=['init-db'])
+    assert result.exit_code == 0, result.output
+    assert db_file.exists()
+    with app.test_client() as client:
+        assert client.get('/api/software').status_code == 200
@@ -0,0 +1,36 @@
+import pytest
+from models.software import ChangeLog, ITHCHistory
+
+@pytest.fixture
+def project(ithc_project):
+    # Cache is already on its latest version; the 2.0 row is another project version
+    return ithc_project([('Agent', 'Tool'), ('Broker', 'Service'), ('Cache', 'Service')],
+                        [(1, '1.0', '1'), (2, '1.0', '2'), (3, '1.0', '9'), (1, '2.0', '1')])
+
+def test_upgrade_project_version(project, ithc_versions):
+    response = project.post('/api/ithc/upgrade', json={'project_id': 1, 'project_version': '1.0'})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['upgraded'] == 2
+    assert [(i['software_name'], i['from_version'], i['to_version']) for i in body['items']] == [
+        ('Agent', '1', '9'), ('Broker', '2', '9')]
+    assert ithc_versions('1.0') == {1: '9', 2: '9', 3: '9'}
+    assert ithc_versions('2.0') == {1: '1'}
+    assert ChangeLog.query.filter_by(entity='ithc', op='update').count() == 2
+    # Cache's row was recorded at 9 when it was added
+    assert ITHCHistory.query.filter_by(current_software_version='9').count() == 3
+
+def test_upgrade_filters(project, ithc_versions):
+    body = project.post('/api/ithc/upgrade', json={'project_id': 1, 'project_version': '1.0',
+                                                   'software_type': 'Service'}).get_json()
+    assert [i['software_id'] for i in body['items']] == [2]
+    body = project.post('/api/ithc/upgrade', json={'project_id': 1, 'project_version': '2.0',
+                                                   'software_ids': [2, 3]}).get_json()
+    assert body['upgraded'] == 0
+    assert ithc_versions('1.0') == {1: '1', 2: '9', 3: '9'}
+
+def test_upgrade_validation(project):
+    assert project.post('/api/ithc/upgrade', json={'project_id': 1}).status_code == 400
+    assert project.post('/api/ithc/upgrade', json={'project_id': 1, 'project_version': '1.0',
+                                                   'software_ids': 'all'}).status_code == 400
+    assert project.post('/api/ithc/upgrade', json={'project_id': 5, 'project_version': '1.0'}).status_code == 404
@@ -0,0 +1,159 @@
+import io
+from openpyxl import Workbook, load_workbook
+from models.software import db, ChangeLog, Customer, ITHCHistory, ITHCSoftware, Project, Software
+from seed import WORKBOOK_HEADERS, generate_dataset, workbook_rows
+from workbook_import import sheet_kind
+
+DATA = generate_dataset(seed=5, software=12, projects=3, versions=2, customers=5, components=8)
+
+def combined(edit=None, kinds=('ithc', 'customer', 'project', 'software')):
+    # Sheets deliberately out of dependency order
+    wb = Workbook()
+    wb.remove(wb.active)
+    for kind in kinds:
+        ws = wb.create_sheet(f'{kind.title()} Import')
+        ws.append(WORKBOOK_HEADERS[kind])
+        for row in workbook_rows(kind, DATA):
+            ws.append(row)
+        if edit:
+            edit(kind, ws)
+    output = io.BytesIO()
+    wb.save(output)
+    output.seek(0)
+    return output
+
+def upload(client, output, force=False):
+    return client.post('/api/import/workbook' + ('?force=1' if force else ''),
+                       data={'file': (output, 'workbook.xlsx')}, content_type='multipart/form-data')
+
+def test_sheet_kind():
+    assert [sheet_kind(t) for t in ('Software', 'Projects', 'customers', 'ITHC Import', 'ITHC Import Template',
+                                    'Notes')] == ['software', 'project', 'customer', 'ithc', 'ithc', None]
+
+def test_imports_all_sheets_in_dependency_order(client):
+    response = upload(client, combined())
+    assert response.status_code == 200
+    body = response.get_json()
+    for kind in ('software', 'project', 'customer', 'ithc'):
+        assert body['sheets'][kind]['imported'] == len(DATA[kind])
+    assert body['error_count'] == 0 and body['unknown_sheets'] == []
+    assert (Software.query.count(), Project.query.count(), Customer.query.count(), ITHCSoftware.query.count()) == (
+        len(DATA['software']), len(DATA['project']), len(DATA['customer']), len(DATA['ithc']))
+
+    # Names from the other sheets resolved to the new ids
+    names = {s['id']: s['name'] for s in DATA['software']}
+    project = DATA['project'][0]
+    assert db.session.get(Software, Project.query.filter_by(name=project['name']).one().software_id).name == \
+        names[project['software_id']]
+    assert ChangeLog.query.filter_by(entity='ithc', op='insert').count() == len(DATA['ithc'])
+    assert ITHCHistory.query.count() == len(DATA['ithc'])
+
+def test_reimport_writes_only_changes(client):
+    upload(client, combined())
+    # Same rows in another sheet order: a different file, but every row is unchanged
+    reordered = combined(kinds=('software', 'project', 'customer', 'ithc'))
+    assert upload(client, reordered).get_json()['sheets']['ithc'] == {
+        'imported': 0, 'updated': 0, 'skipped': 0, 'unchanged': len(DATA['ithc'])}
+
+    def bump(kind, ws):
+        if kind == 'ithc':
+            ws.cell(row=3, column=4, value='99.0.0')
+        elif kind == 'customer':
+            ws.cell(row=2, column=2, value='new@example.com')
+    before = ChangeLog.query.count()
+    body = upload(client, combined(bump)).get_json()
+    assert (body['sheets']['ithc']['updated'], body['sheets']['customer']['updated']) == (1, 1)
+    assert body['sheets']['software']['unchanged'] == len(DATA['software'])
+    assert ChangeLog.query.count() == before + 2
+    assert ITHCSoftware.query.filter_by(current_software_version='99.0.0').count() == 1
+
+def test_same_file_is_skipped(client):
+    output = combined().getvalue()
+    upload(client, io.BytesIO(output))
+    body = upload(client, io.BytesIO(output)).get_json()
+    assert body['message'] == 'File already imported'
+    assert upload(client, io.BytesIO(output), force=True).get_json()['sheets']['ithc']['updated'] == len(DATA['ithc'])
+
+def test_unresolved_rows_are_reported(client):
+    def break_rows(kind, ws):
+        if kind == 'ithc':
+            ws.append(['No Such Project', '1.0', DATA['software'][0]['name'], '1.0'])
+        elif kind == 'project':
+            ws.append(['Orphan', '', 'Ghost', '1.0'])
+    body = upload(client, combined(break_rows)).get_json()
+    assert [(e['sheet'], e['message']) for e in body['errors']] == [
+        ('project', "Unknown software 'Ghost'"), ('ithc', 'Unknown project or software')]
+    assert body['sheets']['ithc']['skipped'] == 1
+    assert Project.query.filter_by(name='Orphan').one().software_id is None
+
+def test_failure_rolls_back_every_sheet(client, monkeypatch):
+    import workbook_import
+
+    def fail(self, *args):
+        raise RuntimeError('boom')
+    monkeypatch.setattr(workbook_import.WorkbookImport, '_ithc_rows', fail)
+    response = upload(client, combined())
+    assert response.status_code == 500
+    assert (Software.query.count(), Project.query.count(), Customer.query.count()) == (0, 0, 0)
+
+def test_rejects_workbook_without_known_sheets(client):
+    wb = Workbook()
+    wb.active.title = 'Notes'
+    output = io.BytesIO()
+    wb.save(output)
+    output.seek(0)
+    response = upload(client, output)
+    assert response.status_code == 400
+    assert response.get_json()['unknown_sheets'] == ['Notes']
+
+def test_workbook_template(client):
+    response = client.get('/api/templates/workbook')
+    assert load_workbook(io.BytesIO(response.data)).sheetnames == ['Software', 'Projects', 'Customers', 'ITHC']
+
+def test_rows_with_unknown_names_are_applied_on_reupload(client):
+    def orphan(kind, ws):
+        if kind == 'ithc':
+            ws.append(['Late Project', '1.0', DATA['software'][0]['name'], '1.0'])
+    output = combined(orphan).getvalue()
+    assert upload(client, io.BytesIO(output)).get_json()['sheets']['ithc']['skipped'] == 1
+    client.post('/api/projects', json={'name': 'Late Project'})
+    body = upload(client, io.BytesIO(output)).get_json()
+    assert body['sheets']['ithc']['imported'] == 1
+    assert ITHCSoftware.query.count() == len(DATA['ithc']) + 1
+
+def test_projects_are_told_apart_by_version(client):
+    tool, other = DATA['software'][0]['name'], DATA['software'][1]['name']
+
+    def twins(kind, ws):
+        if kind == 'project':
+            ws.append(['Twin', 'First', tool, '1.0'])
+            ws.append(['Twin', 'Second', tool, '2.0'])
+        elif kind == 'ithc':
+            ws.append(['Twin', '2.0', other, '5'])
+            ws.append(['Twin', '3.0', other, '6'])
+    body = upload(client, combined(twins)).get_json()
+    projects = {p.software_version: p for p in Project.query.filter_by(name='Twin')}
+    assert {v: p.description for v, p in projects.items()} == {'1.0': 'First', '2.0': 'Second'}
+    assert [(r.project_id, r.project_version) for r in ITHCSoftware.query.filter_by(current_software_version='5')] \
+        == [(projects['2.0'].id, '2.0')]
+    # Neither project is at 3.0, so the row cannot say which one it means
+    assert [e['message'] for e in body['errors']] == ["Project 'Twin' has several versions and none is '3.0'"]
+
+def test_rows_inserted_meanwhile_are_not_logged_as_imported(client):
+    # Another request's row lands between reading max(id) and the import's own INSERT
+    engine = db.engine
+    done = []
+
+    def interleave(conn, cursor, statement, parameters, context, executemany):
+        if not done and statement.startswith('INSERT INTO software'):
+            done.append(True)
+            conn.exec_driver_sql("INSERT INTO software (name, software_type, latest_version) "
+                                 "VALUES ('Concurrent', 'Tool', '1')")
+    db.event.listen(engine, 'before_cursor_execute', interleave)
+    try:
+        assert upload(client, combined(kinds=('software',))).status_code == 200
+    finally:
+        db.event.remove(engine, 'before_cursor_execute', interleave)
+    concurrent = Software.query.filter_by(name='Concurrent').one()
+    logged = [c.entity_id for c in ChangeLog.query.filter_by(entity='software')]
+    assert len(logged) == len(DATA['software']) and concurrent.id not in logged
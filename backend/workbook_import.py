@@ -0,0 +1,359 @@
+"""One-request import of a workbook holding software, projects, customers and ITHC rows.
+
+``POST /api/import/workbook`` takes a workbook with one sheet per entity
+(``Software``, ``Projects``, ``Customers``, ``ITHC``; the ``<Kind> Import``
+sheets written by ``flask gen-workbook`` and the workbook template work too). Sheets are read in one
+read-only pass and applied in dependency order, so projects can name software
+and ITHC rows can name projects and software defined earlier in the same
+workbook. Names are resolved against maps preloaded with one query per table
+and extended in memory as rows are added. Projects are keyed by name and
+software version, as the table is; an ITHC row names the project at its
+project version, or the only project with that name, and is rejected when the
+name alone is ambiguous.
+
+Each row follows the rules of its single-sheet import endpoint: new names are
+inserted, existing ones updated (software is only ever added), and rows whose
+content matches the hash from an earlier import are skipped (import_state.py).
+All writes are set-based statements in one transaction, logged to the change
+log and ITHC history like the other bulk paths (bulk.py), so the database sees
+either the whole workbook or none of it.
+"""
+from datetime import datetime
+
+from sqlalchemy import func, insert, select, update
+
+import import_state
+from changes import INSERT, UPDATE, log_bulk
+from history import record_bulk
+from import_validation import SPECS
+from models.software import db, Software, Project, Customer, ITHCSoftware
+
+# Dependency order
+KINDS = ('software', 'project', 'customer', 'ithc')
+MODELS = {'software': Software, 'project': Project, 'customer': Customer, 'ithc': ITHCSoftware}
+# Columns identifying a new row, to match inserted rows to their ids
+NEW_KEYS = {'software': ('name',), 'project': ('name', 'software_version'), 'customer': ('name',),
+            'ithc': ('project_id', 'project_version', 'software_id')}
+
+
+def sheet_kind(title):
+    """The entity a sheet holds, from its title ('Projects', 'Project Import', ...), or None."""
+    name = title.strip().lower()
+    for suffix in (' template', ' import'):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    if name.endswith('s') and name[:-1] in KINDS:
+        name = name[:-1]
+    return name if name in KINDS else None
+
+
+def read_workbook(source):
+    """``{kind: (headers, [(row number, values), ...])}`` and the titles of sheets that match no kind."""
+    from openpyxl import load_workbook
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    sheets, unknown = {}, []
+    try:
+        for worksheet in workbook.worksheets:
+            kind = sheet_kind(worksheet.title)
+            if kind is None or kind in sheets:
+                unknown.append(worksheet.title)
+                continue
+            rows = worksheet.iter_rows(values_only=True)
+            headers = [str(h).strip() if h is not None else '' for h in next(rows, ())]
+            sheets[kind] = (headers, [(number, row) for number, row in enumerate(rows, start=2)
+                                      if any(v is not None for v in row)])
+    finally:
+        workbook.close()
+    return sheets, unknown
+
+
+def _text(value):
+    return str(value).strip() if value is not None else ''
+
+
+def _fields(kind, headers, row):
+    """Field values for a row, taking the first non-empty alias as the importer does."""
+    cells = {header: row[i] for i, header in enumerate(headers) if i < len(row) and row[i] is not None}
+    values = {}
+    for field, aliases in SPECS[kind]['fields'].items():
+        values[field] = next((cells[a] for a in aliases if a in cells), None)
+    return values
+
+
+def _chunks(ids, size=500):
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+class WorkbookImport:
+    def __init__(self, max_errors=1000, force=False):
+        self.max_errors = max_errors
+        self.force = force
+        self.errors = []
+        self.error_count = 0
+        self.counts = {}
+        self.software = dict(db.session.execute(select(Software.name, Software.id)).all())
+        # Projects are unique by (name, software_version), so one name can stand for several
+        self.projects = {(name, version): project_id for name, version, project_id in db.session.execute(
+            select(Project.name, Project.software_version, Project.id))}
+
+    def error(self, kind, row_number, message):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'sheet': kind, 'row': row_number, 'message': message})
+
+    def _insert(self, kind, rows):
+        """Insert new rows; returns their ids by key (name, or the tuple of NEW_KEYS columns).
+
+        Ids are read back by those keys rather than by id range, so rows other
+        requests insert meanwhile are neither returned nor logged as this import's.
+        """
+        model = MODELS[kind]
+        if not rows:
+            return {}
+        names = NEW_KEYS[kind]
+        keys = {tuple(row[c] for c in names) for row in rows}
+        offset = db.session.execute(select(func.coalesce(func.max(model.id), 0))).scalar()
+        db.session.execute(insert(model), rows)
+        columns = [getattr(model, c) for c in names]
+        ids = {}
+        for chunk in _chunks({key[0] for key in keys}):
+            for row in db.session.execute(select(model.id, *columns)
+                                          .where(model.id > offset, columns[0].in_(chunk)).order_by(model.id)):
+                if tuple(row[1:]) in keys:
+                    ids.setdefault(tuple(row[1:]), row[0])
+        for chunk in _chunks(ids.values()):
+            log_bulk(model, INSERT, model.id.in_(chunk))
+            if model is ITHCSoftware:
+                record_bulk(ITHCSoftware.id.in_(chunk))
+        return {(key[0] if len(key) == 1 else key): entity_id for key, entity_id in ids.items()}
+
+    def _update(self, kind, rows):
+        model = MODELS[kind]
+        if not rows:
+            return
+        db.session.execute(update(model), rows)
+        for ids in _chunks(row['id'] for row in rows):
+            log_bulk(model, UPDATE, model.id.in_(ids))
+            if model is ITHCSoftware:
+                record_bulk(ITHCSoftware.id.in_(ids))
+
+    def _apply(self, kind, new, changed, hashes, dirty=()):
+        """Write pending rows: ``new`` maps key -> (row, hash key, values), ``changed`` id -> the same.
+
+        Only the ``dirty`` ids of ``changed`` differ from the database and are updated.
+        """
+        ids = self._insert(kind, [row for row, _, _ in new.values()])
+        # Rows with a hash key of None had unresolved names and are not hashed
+        for key, (row, hash_key, values) in new.items():
+            entity_id = ids[key]
+            if hash_key is not None:
+                hashes.record(hash_key, values, entity_id)
+            if kind == 'software':
+                self.software[key] = entity_id
+            elif kind == 'project':
+                self.projects[key] = entity_id
+        self._update(kind, [row for entity_id, (row, _, _) in changed.items() if entity_id in dirty])
+        for entity_id, (_, hash_key, values) in changed.items():
+            if hash_key is not None:
+                hashes.record(hash_key, values, entity_id)
+        hashes.save()
+
+    def run(self, sheets):
+        now = datetime.utcnow()
+        for kind in KINDS:
+            if kind not in sheets:
+                continue
+            headers, rows = sheets[kind]
+            counts = self.counts[kind] = {'imported': 0, 'updated': 0, 'skipped': 0, 'unchanged': 0}
+            hashes = import_state.RowHashes(kind)
+            if self.force:
+                # Stored hashes are ignored but still refreshed, as with ?force=1 on the other importers
+                hashes.stored = {}
+            getattr(self, f'_{kind}_rows')(headers, rows, counts, hashes, now)
+        return self.counts
+
+    def _software_rows(self, headers, rows, counts, hashes, now):
+        new = {}
+        for number, row in rows:
+            data = _fields('software', headers, row)
+            values = list(data.values())
+            if hashes.unchanged(data['name'], values):
+                counts['unchanged'] += 1
+                continue
+            name = _text(data['name'])
+            if not (name and data['software_type'] and data['latest_version']):
+                self.error('software', number, 'Name, type and latest version are required')
+                counts['skipped'] += 1
+            elif name in self.software or name in new:
+                counts['skipped'] += 1
+            else:
+                new[name] = ({'name': name, 'software_type': _text(data['software_type']),
+                              'latest_version': _text(data['latest_version']),
+                              'check_url': _text(data['check_url']) or None, 'last_updated': now},
+                             data['name'], values)
+                counts['imported'] += 1
+        self._apply('software', new, {}, hashes)
+
+    def _project_rows(self, headers, rows, counts, hashes, now):
+        current = {row[0]: row for row in db.session.execute(
+            select(Project.id, Project.description, Project.software_id, Project.software_version))}
+        new, changed = {}, {}
+        for number, row in rows:
+            data = _fields('project', headers, row)
+            data['description'] = data['description'] or ''
+            values = list(data.values())
+            hash_key = [data['name'], data['software_version']]
+            if hashes.unchanged(hash_key, values):
+                counts['unchanged'] += 1
+                continue
+            name = _text(data['name'])
+            if not name:
+                self.error('project', number, 'Name is required')
+                counts['skipped'] += 1
+                continue
+            software_id = self.software.get(_text(data['software_name'])) if data['software_name'] else None
+            if data['software_name'] and software_id is None:
+                self.error('project', number, f"Unknown software {_text(data['software_name'])!r}")
+                hash_key = None
+            # The same name at another version is another project
+            key = (name, _text(data['software_version']) or None)
+            if key in new:
+                # A repeated row updates the one added earlier in the sheet
+                pending = new[key][0]
+                pending['description'] = _text(data['description']) or pending['description']
+                if software_id:
+                    pending['software_id'] = software_id
+                new[key] = (pending, hash_key, values)
+                counts['updated'] += 1
+            elif key in self.projects:
+                project_id = self.projects[key]
+                previous = changed[project_id][0] if project_id in changed else dict(zip(
+                    ('id', 'description', 'software_id', 'software_version'), current[project_id]))
+                target = dict(previous, description=_text(data['description']) or previous['description'])
+                if software_id:
+                    target['software_id'] = software_id
+                changed[project_id] = (target, hash_key, values)
+                counts['updated'] += 1
+            else:
+                new[key] = ({'name': name, 'description': _text(data['description']),
+                             'software_id': software_id, 'software_version': key[1]}, hash_key, values)
+                counts['imported'] += 1
+        # Rows that match the database already need no UPDATE
+        dirty = {i for i, v in changed.items()
+                 if tuple(v[0][c] for c in ('description', 'software_id', 'software_version')) != tuple(current[i][1:])}
+        self._apply('project', new, changed, hashes, dirty)
+
+    def _customer_rows(self, headers, rows, counts, hashes, now):
+        current = {row[1]: row for row in db.session.execute(
+            select(Customer.id, Customer.name, Customer.email, Customer.contact_person))}
+        new, changed = {}, {}
+        for number, row in rows:
+            data = _fields('customer', headers, row)
+            data['email'] = data['email'] or ''
+            data['contact_person'] = data['contact_person'] or ''
+            values = list(data.values())
+            if hashes.unchanged(data['name'], values):
+                counts['unchanged'] += 1
+                continue
+            name = _text(data['name'])
+            if not name:
+                self.error('customer', number, 'Name is required')
+                counts['skipped'] += 1
+                continue
+            email, contact = _text(data['email']), _text(data['contact_person'])
+            if name in new:
+                pending = new[name][0]
+                pending.update(email=email or pending['email'], contact_person=contact or pending['contact_person'])
+                new[name] = (pending, data['name'], values)
+                counts['updated'] += 1
+            elif name in current:
+                customer_id = current[name][0]
+                previous = changed[customer_id][0] if customer_id in changed else {
+                    'id': customer_id, 'email': current[name][2], 'contact_person': current[name][3]}
+                changed[customer_id] = ({'id': customer_id, 'email': email or previous['email'],
+                                         'contact_person': contact or previous['contact_person']},
+                                        data['name'], values)
+                counts['updated'] += 1
+            else:
+                new[name] = ({'name': name, 'email': email, 'contact_person': contact}, data['name'], values)
+                counts['imported'] += 1
+        by_id = {row[0]: row for row in current.values()}
+        dirty = {i for i, v in changed.items() if (v[0]['email'], v[0]['contact_person']) != tuple(by_id[i][2:])}
+        self._apply('customer', new, changed, hashes, dirty)
+
+    def _ithc_rows(self, headers, rows, counts, hashes, now):
+        parsed = [(number, {field: _text(value) for field, value in _fields('ithc', headers, row).items()})
+                  for number, row in rows]
+        by_name = {}
+        for (name, version), project_id in self.projects.items():
+            by_name.setdefault(name, []).append(project_id)
+
+        def project_for(name, version):
+            """The project at that version, else the only project with the name; a list when ambiguous."""
+            project_id = self.projects.get((name, version or None))
+            if project_id is not None:
+                return project_id
+            candidates = by_name.get(name, [])
+            return candidates[0] if len(candidates) == 1 else candidates or None
+
+        # Existing rows of the projects the sheet names only
+        resolved = {number: project_for(d['project_name'], d['project_version']) for number, d in parsed}
+        project_ids = {p for p in resolved.values() if isinstance(p, int)}
+        current = {}
+        for ids in _chunks(project_ids):
+            current.update({(row[1], row[2], row[3]): (row[0], row[4]) for row in db.session.execute(
+                select(ITHCSoftware.id, ITHCSoftware.project_id, ITHCSoftware.project_version,
+                       ITHCSoftware.software_id, ITHCSoftware.current_software_version)
+                .where(ITHCSoftware.project_id.in_(ids)))})
+        new, changed = {}, {}
+        for number, data in parsed:
+            hash_key = [data['project_name'], data['project_version'], data['software_name']]
+            values = hash_key + [data['current_version']]
+            if hashes.unchanged(hash_key, values):
+                counts['unchanged'] += 1
+                continue
+            project_id = resolved[number]
+            software_id = self.software.get(data['software_name'])
+            if isinstance(project_id, list):
+                self.error('ithc', number, f"Project {data['project_name']!r} has several versions and none is "
+                                           f"{data['project_version']!r}")
+                counts['skipped'] += 1
+                continue
+            if project_id is None or software_id is None:
+                self.error('ithc', number, 'Unknown project or software')
+                counts['skipped'] += 1
+                continue
+            if not data['project_version'] or not data['current_version']:
+                self.error('ithc', number, 'Project version and current version are required')
+                counts['skipped'] += 1
+                continue
+            key = (project_id, data['project_version'], software_id)
+            if key in new:
+                new[key][0]['current_software_version'] = data['current_version']
+                new[key] = (new[key][0], hash_key, values)
+                counts['updated'] += 1
+            elif key in current:
+                ithc_id, version = current[key]
+                changed[ithc_id] = ({'id': ithc_id, 'current_software_version': data['current_version']},
+                                    hash_key, values)
+                counts['updated'] += 1
+            else:
+                new[key] = ({'project_id': project_id, 'software_id': software_id,
+                             'project_version': data['project_version'],
+                             'current_software_version': data['current_version']}, hash_key, values)
+                counts['imported'] += 1
+        versions = {ithc_id: version for ithc_id, version in current.values()}
+        dirty = {i for i, v in changed.items() if v[0]['current_software_version'] != versions[i]}
+        self._apply('ithc', new, changed, hashes, dirty)
+
+
+def import_workbook(sheets, max_errors=1000, force=False):
+    """Apply parsed ``sheets`` (see :func:`read_workbook`); the caller commits.
+
+    Returns ``{'sheets': {kind: counts}, 'error_count', 'errors'}``.
+    """
+    job = WorkbookImport(max_errors, force)
+    counts = job.run(sheets)
+    return {'sheets': counts, 'error_count': job.error_count, 'errors': job.errors}
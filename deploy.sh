@@ -16,10 +16,11 @@ source venv/bin/activate
 # Install dependencies for backend
 cd backend
 pip install -r requirements.txt
-pip install gunicorn
 
-# Run database migrations
+# Create missing tables, then run database migrations
 export FLASK_APP=app.py
+export FLASK_ENV=production
+flask init-db
 flask db upgrade
 
 # Create systemd service for Flask (Gunicorn)
@@ -33,7 +34,11 @@ User=zeeshan
 WorkingDirectory=${DEPLOY_DIR}/backend
 Environment="PATH=${DEPLOY_DIR}/venv/bin"
 Environment="FLASK_ENV=production"
-ExecStart=${DEPLOY_DIR}/venv/bin/gunicorn -w 4 -b 0.0.0.0:8000 app:app
+Environment="GUNICORN_WORKERS=4"
+# gthread workers; each keeps half its threads for /api/events streams
+Environment="GUNICORN_THREADS=16"
+Environment="GUNICORN_BIND=0.0.0.0:8000"
+ExecStart=${DEPLOY_DIR}/venv/bin/gunicorn -c gunicorn.conf.py app:app
 
 [Install]
 WantedBy=multi-user.target
@@ -51,8 +56,12 @@ server {
         proxy_set_header X-Real-IP \$remote_addr;
     }
 
+    # API responses are compressed by the app (backend/compression.py)
     location /static/ {
         alias ${DEPLOY_DIR}/frontend/static/;
+        gzip on;
+        gzip_vary on;
+        gzip_types text/css application/javascript image/svg+xml;
     }
 }
 NGINX
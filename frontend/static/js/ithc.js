@@ -8,10 +8,15 @@ function initializeApp() {
     }
 }
 
+// Projects from the bootstrap bundle, keyed by id, for the version dropdown
+let projectsById = {};
+// Live updates for the selected project version (see /api/events)
+let eventSource = null;
+let refreshTimer = null;
+
 function initializeITHC() {
-    loadProjects();
     setupProjectVersionSelect();
-    loadSoftwareList();
+    loadBootstrap();
 }
 
 function setupEventListeners() {
@@ -45,78 +50,77 @@ function setupEventListeners() {
     
     // Save ITHC button click
     document.getElementById('saveITHC').addEventListener('click', saveITHC);
+
+    // Upgrade every software in the selected version to its latest version
+    document.getElementById('upgradeITHCBtn')?.addEventListener('click', upgradeToLatest);
 }
 
-async function loadProjects() {
+async function loadBootstrap() {
     try {
-        const response = await fetch('/api/projects');
-        const projects = await response.json();
-        
-        const select = document.getElementById('projectSelect');
-        select.innerHTML = '<option value="">Select Project...</option>';
-        
-        // Group projects by name for the dropdown
-        const projectsByName = {};
-        projects.forEach(project => {
-            if (!projectsByName[project.name]) {
-                projectsByName[project.name] = [];
-            }
-            projectsByName[project.name].push(project);
-        });
-        
-        // Create optgroup for each project name with multiple versions
-        Object.entries(projectsByName).forEach(([name, versions]) => {
-            if (versions.length > 1) {
-                const group = document.createElement('optgroup');
-                group.label = name;
-                versions.forEach(project => {
-                    const option = document.createElement('option');
-                    option.value = project.id;
-                    option.textContent = `${project.name} (${project.software_version || 'No version'})`;
-                    group.appendChild(option);
-                });
-                select.appendChild(group);
-            } else {
-                // Single version projects don't need a group
-                const option = document.createElement('option');
-                option.value = versions[0].id;
-                option.textContent = `${versions[0].name} ${versions[0].software_version ? `(${versions[0].software_version})` : ''}`;
-                select.appendChild(option);
-            }
-        });
+        // One request for the project and software dropdowns
+        const response = await fetch('/api/ithc/bootstrap');
+        const data = await response.json();
+        renderProjects(data.projects);
+        renderSoftwareList(data.software);
     } catch (error) {
-        console.error('Error loading projects:', error);
-        alert('Error loading projects: ' + error.message);
+        console.error('Error loading ITHC data:', error);
+        alert('Error loading ITHC data: ' + error.message);
     }
 }
 
-async function loadSoftwareList() {
-    try {
-        const softwareSelect = document.getElementById('softwareSelect');
-        if (!softwareSelect) {
-            console.warn('Software select element not found - not on ITHC page');
-            return;
-        }
+function renderProjects(projects) {
+    const select = document.getElementById('projectSelect');
+    select.innerHTML = '<option value="">Select Project...</option>';
+    projectsById = {};
 
-        const response = await fetch('/api/software');
-        const software = await response.json();
-        
-        softwareSelect.innerHTML = '<option value="">Select Software...</option>';
-        
-        software.forEach(s => {
+    // Group projects by name for the dropdown
+    const projectsByName = {};
+    projects.forEach(project => {
+        projectsById[project.id] = project;
+        if (!projectsByName[project.name]) {
+            projectsByName[project.name] = [];
+        }
+        projectsByName[project.name].push(project);
+    });
+    
+    // Create optgroup for each project name with multiple versions
+    Object.entries(projectsByName).forEach(([name, versions]) => {
+        if (versions.length > 1) {
+            const group = document.createElement('optgroup');
+            group.label = name;
+            versions.forEach(project => {
+                const option = document.createElement('option');
+                option.value = project.id;
+                option.textContent = `${project.name} (${project.software_version || 'No version'})`;
+                group.appendChild(option);
+            });
+            select.appendChild(group);
+        } else {
+            // Single version projects don't need a group
             const option = document.createElement('option');
-            option.value = s.id;
-            option.textContent = s.name;
-            option.dataset.latestVersion = s.latest_version;
-            softwareSelect.appendChild(option);
-        });
-    } catch (error) {
-        console.error('Error loading software list:', error);
-        if (document.getElementById('softwareSelect')) {
-            // Only show alert if we're actually on the ITHC page
-            alert('Error loading software list: ' + error.message);
+            option.value = versions[0].id;
+            option.textContent = `${versions[0].name} ${versions[0].software_version ? `(${versions[0].software_version})` : ''}`;
+            select.appendChild(option);
         }
+    });
+}
+
+function renderSoftwareList(software) {
+    const softwareSelect = document.getElementById('softwareSelect');
+    if (!softwareSelect) {
+        console.warn('Software select element not found - not on ITHC page');
+        return;
     }
+
+    softwareSelect.innerHTML = '<option value="">Select Software...</option>';
+    
+    software.forEach(s => {
+        const option = document.createElement('option');
+        option.value = s.id;
+        option.textContent = s.name;
+        option.dataset.latestVersion = s.latest_version;
+        softwareSelect.appendChild(option);
+    });
 }
 
 function setupProjectVersionSelect() {
@@ -124,6 +128,12 @@ function setupProjectVersionSelect() {
     select.innerHTML = '<option value="">Select Version...</option>';
     select.disabled = true;
     document.getElementById('addITHCBtn').disabled = true;
+    setUpgradeEnabled(false);
+}
+
+function setUpgradeEnabled(enabled) {
+    const button = document.getElementById('upgradeITHCBtn');
+    if (button) button.disabled = !enabled;
 }
 
 async function handleProjectChange(event) {
@@ -136,31 +146,17 @@ async function handleProjectChange(event) {
     }
     
     try {
-        const response = await fetch(`/api/projects/${projectId}`);
-        const project = await response.json();
+        const project = projectsById[projectId];
         
         versionSelect.innerHTML = '<option value="">Select Version...</option>';
         
-        // First add the project's own version if it exists
-        if (project.software_version) {
+        // The project's own version first, then its distinct release versions
+        (project ? project.versions : []).forEach(version => {
             const option = document.createElement('option');
-            option.value = project.software_version;
-            option.textContent = project.software_version;
+            option.value = version;
+            option.textContent = version;
             versionSelect.appendChild(option);
-        }
-        
-        // Then add all release versions
-        if (project.releases && project.releases.length > 0) {
-            project.releases.forEach(release => {
-                // Check if this version already exists in the dropdown
-                if (!Array.from(versionSelect.options).some(opt => opt.value === release.version)) {
-                    const option = document.createElement('option');
-                    option.value = release.version;
-                    option.textContent = release.version;
-                    versionSelect.appendChild(option);
-                }
-            });
-        }
+        });
         
         // If no versions available, add a default "No Version" option
         if (versionSelect.options.length === 1) {
@@ -173,6 +169,8 @@ async function handleProjectChange(event) {
         // Enable version select but keep Add button disabled until version is selected
         versionSelect.disabled = false;
         document.getElementById('addITHCBtn').disabled = true;
+        setUpgradeEnabled(false);
+        subscribeToChanges();
         await loadITHCList();
     } catch (error) {
         console.error('Error loading project versions:', error);
@@ -186,7 +184,34 @@ function handleVersionChange() {
     
     // Only disable the Add button if we don't have both project and version
     document.getElementById('addITHCBtn').disabled = !projectId || !version;
+    setUpgradeEnabled(projectId && version);
     loadITHCList();
+    subscribeToChanges();
+}
+
+function subscribeToChanges() {
+    const projectId = document.getElementById('projectSelect').value;
+    const version = document.getElementById('projectVersionSelect').value;
+
+    if (eventSource) {
+        eventSource.close();
+        eventSource = null;
+    }
+    if (!projectId || !version || typeof EventSource === 'undefined') {
+        return;
+    }
+
+    // EventSource reconnects by itself and resumes from the last event it saw
+    const params = new URLSearchParams({ project_id: projectId, project_version: version, entities: 'ithc,software' });
+    eventSource = new EventSource(`/api/events?${params}`);
+    eventSource.addEventListener('change', scheduleITHCRefresh);
+    eventSource.addEventListener('resync', scheduleITHCRefresh);
+}
+
+function scheduleITHCRefresh() {
+    // Coalesce bursts of changes (e.g. an import) into one reload
+    clearTimeout(refreshTimer);
+    refreshTimer = setTimeout(loadITHCList, 300);
 }
 
 async function handleSoftwareChange(event) {
@@ -355,20 +380,58 @@ async function deleteITHC(id) {
     }
 }
 
+async function upgradeToLatest() {
+    const projectId = document.getElementById('projectSelect').value;
+    const projectVersion = document.getElementById('projectVersionSelect').value;
+    if (!projectId || !projectVersion) return;
+    if (!confirm(`Upgrade all software in version ${projectVersion} to its latest version?`)) {
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/ithc/upgrade', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                project_id: parseInt(projectId),
+                project_version: projectVersion
+            })
+        });
+        const result = await response.json();
+
+        if (response.ok) {
+            loadITHCList();
+            alert(result.upgraded
+                ? `Upgraded ${result.upgraded} software version(s):\n` +
+                  result.items.map(i => `${i.software_name}: ${i.from_version} → ${i.to_version}`).join('\n')
+                : 'All software is already on its latest version');
+        } else {
+            throw new Error(result.error || 'Failed to upgrade software versions');
+        }
+    } catch (error) {
+        console.error('Error upgrading ITHC:', error);
+        alert('Error upgrading software versions: ' + error.message);
+    }
+}
+
 // Expose functions to global scope
 window.editITHC = editITHC;
 window.deleteITHC = deleteITHC;
 
 export {
-    loadProjects,
+    loadBootstrap,
     handleProjectChange,
     saveITHC,
     displayITHCList,
     editITHC,
     deleteITHC,
+    upgradeToLatest,
     handleVersionChange,
     handleSoftwareChange,
     loadITHCList,
+    subscribeToChanges,
     initializeITHC,
     setupEventListeners
 };
\ No newline at end of file
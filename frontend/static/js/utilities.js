@@ -22,6 +22,12 @@ function setupImportForms() {
         e.preventDefault();
         await handleImport(e.target, '/api/ithc/software/import', 'ITHC');
     });
+
+    // Combined workbook import
+    document.getElementById('workbookImportForm')?.addEventListener('submit', async (e) => {
+        e.preventDefault();
+        await handleWorkbookImport(e.target);
+    });
 }
 
 async function handleImport(form, url, type) {
@@ -49,6 +55,34 @@ async function handleImport(form, url, type) {
     }
 }
 
+async function handleWorkbookImport(form) {
+    try {
+        const response = await fetch('/api/import/workbook', {
+            method: 'POST',
+            body: new FormData(form)
+        });
+
+        const result = await response.json();
+
+        if (response.ok) {
+            const lines = Object.entries(result.sheets || {}).map(([sheet, counts]) =>
+                `${sheet}: ${counts.imported || 0} imported, ${counts.updated || 0} updated, ` +
+                `${counts.skipped || 0} skipped, ${counts.unchanged || 0} unchanged`);
+            if (result.error_count) {
+                lines.push(`${result.error_count} row(s) with errors, e.g. ` +
+                           result.errors.slice(0, 3).map(e => `${e.sheet} row ${e.row}: ${e.message}`).join('; '));
+            }
+            alert(`${result.message}\n` + lines.join('\n'));
+            form.reset();
+        } else {
+            throw new Error(result.error || 'Failed to import workbook');
+        }
+    } catch (error) {
+        console.error('Error importing workbook:', error);
+        alert(`Error importing workbook: ${error.message}`);
+    }
+}
+
 function setupTemplateDownloads() {
     // Software Template
     document.getElementById('downloadSoftwareTemplate')?.addEventListener('click', () => {
@@ -64,6 +98,11 @@ function setupTemplateDownloads() {
     document.getElementById('downloadITHCTemplate')?.addEventListener('click', () => {
         downloadTemplate('/api/templates/ithc', 'ithc_template.xlsx');
     });
+
+    // Combined workbook template
+    document.getElementById('downloadWorkbookTemplate')?.addEventListener('click', () => {
+        downloadTemplate('/api/templates/workbook', 'workbook_template.xlsx');
+    });
 }
 
 async function downloadTemplate(url, filename) {
@@ -89,6 +128,7 @@ async function downloadTemplate(url, filename) {
 // Export functions for testing
 export {
     handleImport,
+    handleWorkbookImport,
     downloadTemplate,
     setupImportForms,
     setupTemplateDownloads
@@ -148,22 +148,40 @@ describe('ITHC Software Management', () => {
         };
     });
 
-    test('loadProjects fetches and displays projects correctly', async () => {
+    test('loadBootstrap fills the project, software and version selects', async () => {
         global.fetch.mockImplementationOnce(() => Promise.resolve({
             ok: true,
-            json: () => Promise.resolve([{
-                id: 1,
-                name: 'Test Project',
-                software_version: '1.0.0'
-            }])
+            json: () => Promise.resolve({
+                projects: [{
+                    id: 1,
+                    name: 'Test Project',
+                    software_version: '1.0.0',
+                    versions: ['1.0.0', '1.1.0']
+                }],
+                software: [{
+                    id: 7,
+                    name: 'Test Software',
+                    latest_version: '2.0.0'
+                }]
+            })
         }));
 
-        await ithcModule.loadProjects();
+        await ithcModule.loadBootstrap();
 
-        expect(fetch).toHaveBeenCalledWith('/api/projects');
+        expect(fetch).toHaveBeenCalledWith('/api/ithc/bootstrap');
         const projectSelect = document.getElementById('projectSelect');
         expect(projectSelect.innerHTML).toContain('Test Project');
         expect(projectSelect.innerHTML).toContain('1.0.0');
+        const softwareOption = document.querySelector('#softwareSelect option[value="7"]');
+        expect(softwareOption.textContent).toBe('Test Software');
+        expect(softwareOption.dataset.latestVersion).toBe('2.0.0');
+
+        // Versions come from the bootstrap payload, without another request
+        projectSelect.value = '1';
+        await ithcModule.handleProjectChange({ target: projectSelect });
+        const versions = Array.from(document.getElementById('projectVersionSelect').options).map(o => o.value);
+        expect(versions).toEqual(['', '1.0.0', '1.1.0']);
+        expect(fetch).toHaveBeenCalledTimes(1);
     });
 
     test('displayITHCList renders entries correctly', () => {
@@ -49,6 +49,25 @@ describe('Utilities Management', () => {
         expect(global.alert).toHaveBeenCalledWith(expect.stringContaining('Error'));
     });
 
+    test('handleWorkbookImport reports counts per sheet', async () => {
+        global.fetch = jest.fn().mockResolvedValue({
+            ok: true,
+            json: () => Promise.resolve({
+                message: 'Import successful',
+                sheets: { software: { imported: 3, updated: 0, skipped: 0, unchanged: 0 } },
+                error_count: 1,
+                errors: [{ sheet: 'ithc', row: 4, message: 'Unknown project or software' }]
+            })
+        });
+        const form = document.getElementById('softwareImportForm');
+
+        await utilitiesModule.handleWorkbookImport(form);
+
+        expect(fetch.mock.calls[0][0]).toBe('/api/import/workbook');
+        expect(global.alert).toHaveBeenCalledWith(expect.stringContaining('software: 3 imported'));
+        expect(global.alert).toHaveBeenCalledWith(expect.stringContaining('ithc row 4'));
+    });
+
     test('downloadTemplate fetches and downloads template', async () => {
         const blob = new Blob(['test content'], { type: 'application/vnd.ms-excel' });
         global.fetch = jest.fn().mockResolvedValue({